@@ -0,0 +1,88 @@
+"""
+Peak memory of whole-frame feature engineering vs. the chunked stream.
+
+Writes ``--tickers`` CSVs of ``--rows`` bars each in the yfinance layout, then
+runs each mode in a fresh process and reports its peak RSS and wall time:
+``batch`` reads every file, concatenates, cleans and calls
+``engineer_features`` as the regular assets do; ``chunked`` pushes
+``--chunk-rows`` chunks through ``RollingFeatureState`` and keeps only row
+counts. Both modes produce the same number of engineered rows.
+
+Run from the project root:
+
+    python -m benchmarks.bench_chunked --tickers 8 --rows 1000000 --chunk-rows 50000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks import synthetic
+from src.pipelines import chunked, features, readers, schemas
+
+
+def write_files(directory: str, n_tickers: int, n_rows: int, seed: int = 42):
+    for i in range(n_tickers):
+        ticker = synthetic.ticker_name(i)
+        # Minute bars, so long histories stay within the datetime range
+        df = synthetic.ohlcv(i, n_rows, seed=seed, start="2015-01-02 09:30", freq="min")
+        synthetic.write_csv(os.path.join(directory, f"stock_data_{ticker}.csv"), ticker, df)
+
+
+def run_batch(raw_dir: str, chunk_rows: int) -> int:
+    frames = []
+    for path in sorted(os.listdir(raw_dir)):
+        df = readers.read_stock_csv(os.path.join(raw_dir, path))[0]
+        df['Ticker'] = path[len("stock_data_"):-len(".csv")]
+        frames.append(df)
+
+    df = schemas.apply_schema(pd.concat(frames, ignore_index=True), schemas.RAW_STOCK_SCHEMA)
+    df = df.dropna(subset=['Date', 'Close']).reset_index(drop=True)
+    return len(features.engineer_features(df))
+
+
+def run_chunked(raw_dir: str, chunk_rows: int) -> int:
+    stream = chunked.engineer_chunks(chunked.clean_chunks(chunked.read_chunks(raw_dir, chunk_rows)))
+    return sum(len(df) for df in stream)
+
+
+def _measure(fn, raw_dir, chunk_rows, results):
+    start = time.perf_counter()
+    rows = fn(raw_dir, chunk_rows)
+    results.put((rows, time.perf_counter() - start, schemas.peak_rss_mb()))
+
+
+def measure(fn, raw_dir: str, chunk_rows: int) -> tuple:
+    """Run ``fn`` in a fresh process so its peak RSS is its own."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(fn, raw_dir, chunk_rows, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_files(tmp, args.tickers, args.rows)
+        size_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 1e6
+        print(f"{args.tickers} tickers x {args.rows:,} rows ({size_mb:,.0f} MB of CSV)")
+
+        for name, fn in [("batch", run_batch), (f"chunked ({args.chunk_rows:,} rows)", run_chunked)]:
+            rows, seconds, peak = measure(fn, tmp, args.chunk_rows)
+            print(f"{name:<26} {seconds:8.2f} s  peak RSS {peak:8.1f} MB  {rows:,} rows")
+
+
+if __name__ == "__main__":
+    main()
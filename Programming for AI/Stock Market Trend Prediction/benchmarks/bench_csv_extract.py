@@ -0,0 +1,81 @@
+"""
+Files/sec of the CSV extraction reader, serial and on a worker pool.
+
+Writes ``--files`` ticker CSVs in the yfinance three-line-header layout and
+times the original double read (``nrows=1`` header + ``skiprows=3`` body),
+``read_stock_csv`` on one thread and ``read_stock_csv`` on thread and process
+pools, as ``raw_stock_csv_data`` does.
+
+Run from the project root:
+
+    python -m benchmarks.bench_csv_extract --files 1000 --years 10 --workers 8
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from benchmarks import synthetic
+from src.pipelines import readers
+
+
+def write_files(directory: str, n_files: int, n_years: int, seed: int = 42):
+    for i in range(n_files):
+        ticker = synthetic.ticker_name(i)
+        df = synthetic.ohlcv(i, n_years * synthetic.TRADING_DAYS_PER_YEAR, seed=seed)
+        synthetic.write_csv(os.path.join(directory, f"stock_data_{ticker}.csv"), ticker, df)
+
+
+def legacy_read(file_path: str) -> pd.DataFrame:
+    header_df = pd.read_csv(file_path, nrows=1)
+    column_names = header_df.columns.tolist()
+    df = pd.read_csv(file_path, skiprows=3, names=column_names)
+    df.rename(columns={'Price': 'Date'}, inplace=True)
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    return df
+
+
+def reader_read(file_path: str) -> pd.DataFrame:
+    return readers.read_stock_csv(file_path)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_files(tmp, args.files, args.years)
+        paths = sorted(glob.glob(os.path.join(tmp, "*.csv")))
+
+        suites = [
+            ("legacy serial", lambda: [legacy_read(p) for p in paths]),
+            (f"reader serial ({readers.CSV_ENGINE})", lambda: [reader_read(p) for p in paths]),
+        ]
+        for name, executor_class in [("thread", ThreadPoolExecutor), ("process", ProcessPoolExecutor)]:
+            def run(executor_class=executor_class):
+                with executor_class(max_workers=args.workers) as executor:
+                    return list(executor.map(reader_read, paths))
+            suites.append((f"reader {name} x{args.workers}", run))
+
+        print(f"{args.files} files x {args.years} years")
+
+        baseline = None
+        for name, fn in suites:
+            start = time.perf_counter()
+            frames = fn()
+            seconds = time.perf_counter() - start
+            files_per_sec = len(frames) / seconds
+            baseline = baseline or files_per_sec
+            print(f"{name:<26} {seconds:8.3f} s  {files_per_sec:>10,.1f} files/s  x{files_per_sec / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
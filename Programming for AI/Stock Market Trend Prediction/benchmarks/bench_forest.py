@@ -0,0 +1,95 @@
+"""
+Rows/sec of the compiled forest against sklearn's predict_proba.
+
+Fits a forest shaped like ``trained_model``'s (100 trees, max_depth 10) on
+synthetic features, then scores ``--rows`` rows in bulk with sklearn
+(``n_jobs`` 1 and -1) and ``CompiledForest`` (``n_jobs`` 1 and cpu_count),
+checks the probabilities match, and times the small batches the prediction
+service sends.
+
+Run from the project root:
+
+    python -m benchmarks.bench_forest --rows 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.model.forest import CompiledForest
+from src.model.serving import FEATURE_COLUMNS
+
+
+def build_data(n_rows: int, seed: int = 42) -> tuple:
+    rng = np.random.default_rng(seed)
+    scale = np.array([50, 0.02, 5, 0.05, 2])
+    center = np.array([150, 0, 0, 0, 3])
+    X = (rng.normal(size=(n_rows, len(FEATURE_COLUMNS))) * scale + center).astype(np.float32)
+    y = ((X[:, 1] + 0.01 * X[:, 3] + rng.normal(0, 0.02, n_rows)) > 0).astype(int)
+    return X, y
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    X_train, y_train = build_data(args.train_rows)
+    X, _ = build_data(args.rows, seed=7)
+
+    model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
+    model.fit(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        CompiledForest.from_sklearn(model).save(tmp)
+        compiled = CompiledForest.load(tmp, mmap_mode='r')
+
+        max_diff = float(np.abs(compiled.predict_proba(X) - model.predict_proba(X)).max())
+        print(f"{args.rows:,} rows, {compiled.n_trees} trees, {compiled.n_nodes:,} nodes, "
+              f"max abs diff {max_diff:g}")
+
+        n_cpus = os.cpu_count()
+        suites = []
+        for n_jobs in (1, -1):
+            def run(n_jobs=n_jobs):
+                model.n_jobs = n_jobs
+                model.predict_proba(X)
+            suites.append((f"sklearn n_jobs={n_jobs}", run))
+        for n_jobs in sorted({1, n_cpus}):
+            suites.append((f"compiled n_jobs={n_jobs}", lambda n_jobs=n_jobs: compiled.predict_proba(X, n_jobs=n_jobs)))
+
+        baseline = None
+        for name, fn in suites:
+            seconds = best_of(fn, args.repeat)
+            rows_per_sec = args.rows / seconds
+            baseline = baseline or rows_per_sec
+            print(f"{name:<22} {seconds:8.3f} s  {rows_per_sec:>12,.0f} rows/s  x{rows_per_sec / baseline:.1f}")
+
+        # Micro-batch latency, as seen by PredictionService
+        model.n_jobs = 1
+        print()
+        for batch_rows in (1, 64, 1024):
+            batch = X[:batch_rows]
+            sklearn_ms = best_of(lambda: model.predict_proba(batch), 50) * 1000
+            compiled_ms = best_of(lambda: compiled.predict_proba(batch), 50) * 1000
+            print(f"batch {batch_rows:>5} rows   sklearn {sklearn_ms:7.3f} ms   compiled {compiled_ms:7.3f} ms   "
+                  f"x{sklearn_ms / compiled_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
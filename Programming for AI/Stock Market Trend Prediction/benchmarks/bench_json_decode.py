@@ -0,0 +1,125 @@
+"""
+Rows/sec of the columnar JSON decoder against the original dict-of-dicts path.
+
+Builds a multi-ticker payload in the yfinance ``to_json`` layout and times
+both decoders on it. The legacy path only understands one ticker per file, so
+it is fed the payload split per ticker (the split itself is not timed).
+
+Run from the project root:
+
+    python -m benchmarks.bench_json_decode --tickers 500 --years 10
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks import synthetic
+from src.pipelines import readers
+
+
+def build_payload(n_tickers: int, n_years: int, seed: int = 42) -> dict:
+    n_rows = n_years * synthetic.TRADING_DAYS_PER_YEAR
+    frames = {synthetic.ticker_name(i): synthetic.ohlcv(i, n_rows, seed=seed) for i in range(n_tickers)}
+    return json.loads(synthetic.json_frame(frames).to_json())
+
+
+def legacy_decode(data: dict) -> pd.DataFrame:
+    rows = {}
+    for key, values in data.items():
+        col_name = key.split("'")[1]
+
+        for timestamp, value in values.items():
+            timestamp_int = int(timestamp)
+            if timestamp_int not in rows:
+                rows[timestamp_int] = {}
+            rows[timestamp_int][col_name] = value
+
+    df = pd.DataFrame.from_dict(rows, orient='index')
+    df.index.name = 'Timestamp'
+    df.reset_index(inplace=True)
+    df['Date'] = pd.to_datetime(df['Timestamp'], unit='ms')
+    df.drop('Timestamp', axis=1, inplace=True)
+
+    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def split_by_ticker(data: dict) -> dict:
+    by_ticker = {}
+    for key, values in data.items():
+        ticker = key.split("'")[3]
+        by_ticker.setdefault(ticker, {})[key] = values
+    return by_ticker
+
+
+def _time(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payload = build_payload(args.tickers, args.years)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stock_data_MULTI.json")
+        with open(path, "w") as f:
+            json.dump(payload, f)
+        size_mb = os.path.getsize(path) / 1e6
+
+        def run_legacy():
+            with open(path, "r") as f:
+                data = json.load(f)
+            frames = []
+            for ticker, ticker_data in split_by_ticker(data).items():
+                df = legacy_decode(ticker_data)
+                df['Ticker'] = ticker
+                frames.append(df)
+            return pd.concat(frames, ignore_index=True)
+
+        def run_columnar_json():
+            orjson = readers.orjson
+            readers.orjson = None
+            try:
+                return readers.read_stock_json(path)
+            finally:
+                readers.orjson = orjson
+
+        def run_columnar():
+            return readers.read_stock_json(path)
+
+        print(f"Payload: {args.tickers} tickers x {args.years} years ({size_mb:.1f} MB)")
+
+        suites = [("legacy dict-of-dicts", run_legacy), ("columnar (json)", run_columnar_json)]
+        if readers.orjson is not None:
+            suites.append(("columnar (orjson)", run_columnar))
+
+        baseline = None
+        for name, fn in suites:
+            seconds, df = _time(fn, args.repeat)
+            rows_per_sec = len(df) / seconds
+            baseline = baseline or rows_per_sec
+            print(
+                f"{name:<22} {len(df):>10,} rows  {seconds:8.3f} s  "
+                f"{rows_per_sec:>12,.0f} rows/s  x{rows_per_sec / baseline:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
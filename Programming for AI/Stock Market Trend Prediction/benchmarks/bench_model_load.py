@@ -0,0 +1,89 @@
+"""
+Cold-start time of a scoring worker: pickled model vs. model artifact.
+
+Fits a forest shaped like ``trained_model``'s, saves it with ``joblib.dump``
+and with ``write_artifact``, then starts ``--workers`` fresh Python processes
+at once for each format. Every worker imports what it needs, loads the model
+and scores one row; the wall time of the slowest worker and the mean
+in-process load time are reported.
+
+Run from the project root:
+
+    python -m benchmarks.bench_model_load --workers 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.bench_forest import build_data
+from src.model.artifact import write_artifact
+from src.model.serving import FEATURE_COLUMNS
+
+
+PICKLE_WORKER = """
+import json, time, sys
+start = time.perf_counter()
+import joblib, numpy as np
+model = joblib.load(sys.argv[1])
+model.n_jobs = 1
+model.predict_proba(np.zeros((1, 5), dtype=np.float32))
+print(json.dumps({"load_seconds": time.perf_counter() - start}))
+"""
+
+ARTIFACT_WORKER = """
+import json, time, sys
+start = time.perf_counter()
+import numpy as np
+from src.model.artifact import ModelArtifact
+artifact = ModelArtifact.open(sys.argv[1])
+artifact.model.predict_proba(np.zeros((1, 5), dtype=np.float32))
+print(json.dumps({"load_seconds": time.perf_counter() - start}))
+"""
+
+
+def run_workers(script: str, path: str, n_workers: int) -> tuple:
+    start = time.perf_counter()
+    workers = [
+        subprocess.Popen([sys.executable, "-W", "ignore", "-c", script, path], stdout=subprocess.PIPE, text=True)
+        for _ in range(n_workers)
+    ]
+    outputs = [json.loads(worker.communicate()[0]) for worker in workers]
+    wall = time.perf_counter() - start
+    return wall, sum(o["load_seconds"] for o in outputs) / len(outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    X, y = build_data(args.train_rows)
+    model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
+    model.fit(X, y)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "random_forest_model.pkl")
+        joblib.dump(model, pickle_path)
+        artifact_path = write_artifact(
+            os.path.join(tmp, "artifacts"), model, FEATURE_COLUMNS,
+            hyperparameters={}, data_hash="0" * 40, metrics={},
+        )
+
+        print(f"{args.workers} workers, pickle {os.path.getsize(pickle_path) / 1e6:.1f} MB")
+        for name, script, path in [("joblib.load", PICKLE_WORKER, pickle_path),
+                                   ("ModelArtifact", ARTIFACT_WORKER, artifact_path)]:
+            wall, mean_load = run_workers(script, path, args.workers)
+            print(f"{name:<14} all ready in {wall:6.3f} s   mean import+load {mean_load:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Cost of adding one bar per ticker: full recompute vs. the rolling feature engine.
+
+Builds ``--tickers`` histories of ``--years`` daily bars, then appends one new
+bar per ticker ``--bars`` times. ``recompute`` re-runs ``engineer_features``
+over the whole history for every new bar, as the nightly assets do;
+``engine`` seeds a ``FeatureEngine`` once (``batch``), checkpoints it, loads
+it back and pushes only the new bars. Both report the engineered rows the
+new bars decided, which must be equal.
+
+Run from the project root:
+
+    python -m benchmarks.bench_rolling --tickers 50 --years 10 --bars 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from src.pipelines import features, schemas
+from src.pipelines.rolling import FeatureEngine
+
+
+def history(n_tickers: int, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    frames = []
+    for i in range(n_tickers):
+        df = synthetic.ohlcv(i, n_rows, seed=seed)
+        df['Ticker'] = synthetic.ticker_name(i)
+        frames.append(df)
+    return schemas.apply_schema(pd.concat(frames, ignore_index=True), schemas.RAW_STOCK_SCHEMA)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--bars", type=int, default=20, help="New bars appended per ticker")
+    args = parser.parse_args()
+
+    n_rows = args.years * synthetic.TRADING_DAYS_PER_YEAR
+    full = history(args.tickers, n_rows + args.bars)
+    dates = np.sort(full['Date'].unique())
+    cutoff = dates[n_rows - 1]
+    base = full[full['Date'] <= cutoff]
+    new_days = [full[full['Date'] == date] for date in dates[n_rows:]]
+    print(f"{args.tickers} tickers x {n_rows:,} rows of history, {args.bars} new bars per ticker")
+
+    start = time.perf_counter()
+    decided_recompute = 0
+    previous = len(features.engineer_features(base))
+    frame = base
+    for day in new_days:
+        frame = pd.concat([frame, day], ignore_index=True)
+        # Sorted back into ticker groups, as cleaned_stock_data is
+        engineered = features.engineer_features(frame.sort_values(['Ticker', 'Date'], kind='stable'))
+        decided_recompute += len(engineered) - previous
+        previous = len(engineered)
+    recompute = time.perf_counter() - start
+
+    engine = FeatureEngine()
+    engine.batch(base)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feature_state.json")
+        engine.save(path)
+        checkpoint_kb = os.path.getsize(path) / 1e3
+
+        start = time.perf_counter()
+        engine = FeatureEngine.load(path)
+        load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decided_engine = sum(len(engine.update(day)) for day in new_days)
+    incremental = time.perf_counter() - start
+
+    per_bar = 1e6 / (args.tickers * args.bars)
+    print(f"{'recompute':<12} {recompute:9.3f} s  {recompute * per_bar:10.1f} us/bar  {decided_recompute:,} rows decided")
+    print(
+        f"{'engine':<12} {incremental:9.3f} s  {incremental * per_bar:10.1f} us/bar  {decided_engine:,} rows decided  "
+        f"(checkpoint {checkpoint_kb:,.1f} KB, loaded in {load * 1e3:.1f} ms)"
+    )
+    print(f"speedup x{recompute / incremental:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
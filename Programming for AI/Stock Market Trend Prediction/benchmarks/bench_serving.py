@@ -0,0 +1,75 @@
+"""
+Rows/sec of the micro-batching prediction service against per-request scoring.
+
+Scores ``--rows`` single-row requests from ``--clients`` concurrent threads,
+first the notebook way (a one-row DataFrame and a ``predict_proba`` call per
+request) and then through ``PredictionService``, and prints the service's
+latency percentiles and batch-size histogram.
+
+Run from the project root:
+
+    python -m benchmarks.bench_serving --model models/random_forest_model.pkl --rows 20000 --clients 64
+"""
+
+import argparse
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.model.serving import FEATURE_COLUMNS, PredictionService
+
+
+def build_rows(n_rows: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    scale = np.array([50, 0.02, 5, 0.05, 2])
+    center = np.array([150, 0, 0, 0, 3])
+    return (rng.normal(size=(n_rows, len(FEATURE_COLUMNS))) * scale + center).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default="models/random_forest_model.pkl")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=1024)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    X = build_rows(args.rows)
+
+    model = joblib.load(args.model)
+    model.n_jobs = 1
+
+    def score_one(i):
+        return model.predict_proba(pd.DataFrame([X[i]], columns=FEATURE_COLUMNS))
+
+    # Per-request scoring is slow; timing a slice of the rows is enough
+    n_legacy = min(args.rows, 2_000)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as executor:
+        list(executor.map(score_one, range(n_legacy)))
+    legacy_rate = n_legacy / (time.perf_counter() - start)
+
+    service = PredictionService(model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    with service:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as executor:
+            list(executor.map(lambda i: service.predict_proba(X[i]), range(args.rows)))
+        service_rate = args.rows / (time.perf_counter() - start)
+        stats = service.stats.snapshot()
+
+    print(f"{args.rows} single-row requests from {args.clients} clients")
+    print(f"{'per-request predict_proba':<28} {legacy_rate:>10,.0f} rows/s")
+    print(f"{'PredictionService':<28} {service_rate:>10,.0f} rows/s  x{service_rate / legacy_rate:.1f}")
+    print(f"latency p50 {stats['latency_p50_ms']} ms, p99 {stats['latency_p99_ms']} ms, "
+          f"mean batch {stats['mean_batch_rows']} rows")
+    print(f"batch sizes: {stats['batch_size_histogram']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compares two stored benchmark results and flags regressions.
+
+``base`` and ``head`` are results files or git revisions (``main``, ``HEAD~3``,
+a hash) looked up under ``benchmarks/results/<machine>/``; by default the two
+most recent results of this machine are compared. A suite regresses when its
+median time grows by more than ``--threshold`` (10% by default); the exit
+status is 1 if any suite regressed, so the command can gate a CI step.
+
+Run from the project root:
+
+    python -m benchmarks.run                # on the base commit
+    python -m benchmarks.run                # on the head commit
+    python -m benchmarks.compare main HEAD
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from benchmarks.run import RESULTS_DIR
+
+
+def resolve(ref: str, machine: str) -> str:
+    """Results file of a path or git revision."""
+    if os.path.isfile(ref):
+        return ref
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short=12", ref], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ref
+
+    for name in [f"{commit}.json", f"{commit}-dirty.json"]:
+        path = os.path.join(RESULTS_DIR, machine, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No results for {ref} ({commit}) in {os.path.join(RESULTS_DIR, machine)}")
+
+
+def latest(machine: str, count: int) -> list:
+    """The ``count`` most recent results files of a machine, oldest first."""
+    paths = glob.glob(os.path.join(RESULTS_DIR, machine, "*.json"))
+    timestamps = {}
+    for path in paths:
+        with open(path) as f:
+            timestamps[path] = json.load(f)["timestamp"]
+    paths = sorted(paths, key=timestamps.get)
+    if len(paths) < count:
+        raise FileNotFoundError(f"Need {count} results in {os.path.join(RESULTS_DIR, machine)}, found {len(paths)}")
+    return paths[-count:]
+
+
+def compare(base: dict, head: dict, threshold: float) -> list:
+    """One row per suite present in both results: (name, base, head, ratio, regressed)."""
+    rows = []
+    for name, head_suite in head["suites"].items():
+        base_suite = base["suites"].get(name)
+        if not base_suite or "error" in base_suite or "error" in head_suite:
+            continue
+        ratio = head_suite["median"] / base_suite["median"] if base_suite["median"] > 0 else float("inf")
+        rows.append((name, base_suite["median"], head_suite["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base", nargs="?")
+    parser.add_argument("head", nargs="?")
+    parser.add_argument("--machine", default=platform.node())
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed median slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    try:
+        if args.base and args.head:
+            paths = [resolve(args.base, args.machine), resolve(args.head, args.machine)]
+        elif args.base:
+            paths = [resolve(args.base, args.machine), latest(args.machine, 1)[0]]
+        else:
+            paths = latest(args.machine, 2)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    base, head = [json.load(open(path)) for path in paths]
+    print(f"base {base['commit']} ({base['timestamp']})  vs  head {head['commit']} ({head['timestamp']})")
+    if base["params"] != head["params"]:
+        print(f"warning: parameters differ: {base['params']} vs {head['params']}")
+    if base.get("versions") != head.get("versions"):
+        print(f"warning: library versions differ: {base.get('versions')} vs {head.get('versions')}")
+
+    rows = compare(base, head, args.threshold)
+    for name, base_median, head_median, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ("faster" if ratio < 1 - args.threshold else "")
+        print(f"{name:<24} {base_median:9.4f} s -> {head_median:9.4f} s  x{ratio:5.2f}  {flag}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} suite(s) slower by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Runs the benchmark suites on synthetic data and stores the results per commit.
+
+Generates ``--tickers`` x ``--years`` of synthetic raw files in a temporary
+workspace, materializes the ETL once, then runs every suite of
+``benchmarks.suites`` in a fresh process: one warm-up run followed by
+``--repeat`` timed runs. Median, min and max seconds, rows/s and the process's
+peak RSS are written, with the machine, library versions and parameters, to
+
+    benchmarks/results/<machine>/<commit>.json
+
+(``<commit>-dirty`` when the tree has uncommitted changes). Runs of other
+suites at the same commit and parameters are merged into the same file.
+Compare two commits with ``python -m benchmarks.compare``.
+
+``postgres_training_data`` replaces the ``processed_data`` table, so it is
+skipped unless a disposable Postgres database is given with ``--pg-*`` or
+``BENCH_PG_*`` variables.
+
+Run from the project root:
+
+    python -m benchmarks.run --tickers 50 --years 10 --repeat 5
+    python -m benchmarks.run --suites raw_stock_csv_data,engineered_features --pg-host /tmp/pgdata --pg-dbname bench
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit() -> str:
+    """Short hash of HEAD, with ``-dirty`` when tracked files have changed."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if status.strip() else commit
+
+
+def machine_info() -> dict:
+    import dagster
+    import numpy
+    import pandas
+    import pyarrow
+    import sklearn
+
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "versions": {
+            "dagster": dagster.__version__,
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "pyarrow": pyarrow.__version__,
+            "scikit-learn": sklearn.__version__,
+        },
+    }
+
+
+def _run_suite(name: str, base_dir: str, postgres: dict, repeat: int, results):
+    from benchmarks.suites import SUITES, Workspace
+    from src.pipelines.schemas import peak_rss_mb
+
+    try:
+        suite = next(suite for suite in SUITES if suite.name == name)
+        workspace = Workspace(base_dir, postgres)
+
+        suite.run(workspace)
+        samples, rows = [], 0
+        for _ in range(repeat):
+            seconds, rows = suite.run(workspace)
+            samples.append(seconds)
+        results.put((samples, rows, peak_rss_mb(), None))
+    except Exception as e:
+        results.put((None, None, None, f"{type(e).__name__}: {e}"))
+
+
+def run_suite(name: str, base_dir: str, postgres: dict, repeat: int) -> dict:
+    """Run one suite in a fresh process so imports, caches and peak RSS are its own."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_run_suite, args=(name, base_dir, postgres, repeat, results))
+    process.start()
+    samples, rows, peak, error = results.get()
+    process.join()
+
+    if error is not None:
+        return {"error": error}
+
+    median = statistics.median(samples)
+    return {
+        "median": round(median, 6),
+        "min": round(min(samples), 6),
+        "max": round(max(samples), 6),
+        "samples": [round(s, 6) for s in samples],
+        "rows": rows,
+        "rows_per_second": round(rows / median) if median > 0 else None,
+        "peak_rss_mb": round(peak, 1),
+    }
+
+
+def results_path(machine: str, commit: str) -> str:
+    return os.path.join(RESULTS_DIR, machine, f"{commit}.json")
+
+
+def main():
+    from benchmarks.suites import SUITES, Workspace, postgres_from_env
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--suites", default="", help="Comma-separated suite names (default: all)")
+    parser.add_argument("--machine", default=platform.node(), help="Results directory name for this machine")
+    parser.add_argument("--output", default=None, help="Results file (default: results/<machine>/<commit>.json)")
+    for field in ["dbname", "user", "password", "host", "port"]:
+        parser.add_argument(f"--pg-{field}")
+    args = parser.parse_args()
+
+    postgres = {
+        field: getattr(args, f"pg_{field}")
+        for field in ["dbname", "user", "password", "host", "port"]
+        if getattr(args, f"pg_{field}") is not None
+    } or postgres_from_env()
+
+    selected = [name for name in args.suites.split(",") if name]
+    unknown = set(selected) - {suite.name for suite in SUITES}
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    suites = [suite for suite in SUITES if not selected or suite.name in selected]
+
+    commit = git_commit()
+    n_rows = args.years * synthetic.TRADING_DAYS_PER_YEAR
+    report = {
+        "commit": commit,
+        "machine": args.machine,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **machine_info(),
+        "params": {"tickers": args.tickers, "years": args.years, "seed": args.seed, "repeat": args.repeat},
+        "suites": {},
+    }
+
+    # Suites run separately for the same commit and parameters share one results file
+    path = args.output or results_path(args.machine, commit)
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        if previous.get("params") == report["params"]:
+            report["suites"] = previous["suites"]
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        workspace = Workspace(base_dir, postgres)
+        start = time.perf_counter()
+        data = workspace.prepare(args.tickers, n_rows, args.seed)
+        print(
+            f"{args.tickers} tickers x {n_rows:,} rows ({data['bytes'] / 1e6:,.1f} MB raw), "
+            f"set up in {time.perf_counter() - start:.1f}s; commit {commit}"
+        )
+
+        for suite in suites:
+            if suite.needs_postgres and not postgres:
+                print(f"{suite.name:<24} skipped (no --pg-* / BENCH_PG_* Postgres stand-in)")
+                continue
+
+            outcome = run_suite(suite.name, base_dir, postgres, args.repeat)
+            report["suites"][suite.name] = outcome
+            if "error" in outcome:
+                print(f"{suite.name:<24} failed: {outcome['error']}")
+                continue
+            print(
+                f"{suite.name:<24} {outcome['median']:9.4f} s  (min {outcome['min']:.4f}, max {outcome['max']:.4f})  "
+                f"{outcome['rows_per_second'] or 0:>12,} rows/s  peak RSS {outcome['peak_rss_mb']:7.1f} MB"
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+
+    if any("error" in report["suites"].get(suite.name, {}) for suite in suites):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark suites over the real assets, run by ``benchmarks.run``.
+
+A ``Workspace`` is a throwaway ``base_dir`` filled with synthetic raw files
+(``benchmarks.synthetic``) whose ETL has been materialized once, so every
+suite finds its upstream assets already on disk. Asset suites then
+materialize only their own asset and report the time from its first step's
+start to its last step's end: input loading, every op of a graph-backed asset
+and output writing are included, Dagster's run setup is not. The
+content-hash cache is disabled so every sample does the work.
+
+``postgres_training_data`` rewrites ``processed_data`` (``mode: replace``), so
+it only runs when a Postgres stand-in is given explicitly.
+"""
+
+import os
+import time
+
+import joblib
+import pandas as pd
+from dagster import DagsterInstance, materialize
+
+from benchmarks import synthetic
+from src.model.forest import CompiledForest
+from src.model.serving import FEATURE_COLUMNS
+from src.pipelines import all_assets
+from src.pipelines.cache import AssetCacheResource
+from src.pipelines.io_manager import ParquetIOManager
+from src.pipelines.profiling import ProfilingResource
+from src.pipelines.resources import DataStorageResource, MongoDBResource, PostgreSQLResource
+
+
+# Materialized once by Workspace.prepare; everything the suites read
+SETUP_ASSETS = [
+    "raw_stock_csv_data",
+    "raw_stock_json_data",
+    "combined_raw_data",
+    "cleaned_stock_data",
+    "engineered_features",
+    "training_dataset",
+    "trained_model",
+]
+
+
+class Workspace:
+    """Synthetic raw data plus the resources the suites materialize against."""
+
+    def __init__(self, base_dir: str, postgres: dict = None):
+        self.base_dir = base_dir
+        self.postgres = postgres
+        self.storage = DataStorageResource(base_dir=base_dir)
+
+    def resources(self) -> dict:
+        return {
+            "storage": self.storage,
+            "io_manager": ParquetIOManager(storage=self.storage),
+            "asset_cache": AssetCacheResource(storage=self.storage, enabled=False),
+            "profiling": ProfilingResource(),
+            # Only postgres_training_data connects, and only with a stand-in configured
+            "postgres": PostgreSQLResource(**(self.postgres or {})),
+            "mongodb": MongoDBResource(),
+        }
+
+    def materialize(self, selection: list, run_config: dict = None, instance: DagsterInstance = None):
+        run_config = {**(run_config or {}), "loggers": {"console": {"config": {"log_level": "ERROR"}}}}
+        return materialize(
+            all_assets,
+            selection=selection,
+            resources=self.resources(),
+            run_config=run_config,
+            instance=instance or DagsterInstance.ephemeral(),
+        )
+
+    def prepare(self, n_tickers: int, n_rows: int, seed: int) -> dict:
+        summary = synthetic.generate(self.storage.raw_dir, n_tickers, n_rows, seed=seed)
+        # The project tree ships these directories; the assets don't create them
+        for directory in [self.storage.processed_dir, self.storage.model_dir]:
+            os.makedirs(directory, exist_ok=True)
+        self.materialize(SETUP_ASSETS)
+        return summary
+
+    def training_features(self) -> pd.DataFrame:
+        path = self.storage.get_processed_path("training_data.parquet")
+        return pd.read_parquet(path, columns=FEATURE_COLUMNS)
+
+
+class AssetSuite:
+    """Materializes one asset and times its steps."""
+
+    def __init__(self, asset: str, config: dict = None, needs_postgres: bool = False):
+        self.name = asset
+        self.asset = asset
+        self.config = config
+        self.needs_postgres = needs_postgres
+
+    def run(self, workspace: Workspace) -> tuple:
+        run_config = {"ops": {self.asset: {"config": self.config}}} if self.config else None
+        instance = DagsterInstance.ephemeral()
+        result = workspace.materialize([self.asset], run_config, instance)
+
+        steps = [
+            entry for entry in instance.all_logs(result.run_id)
+            if entry.dagster_event and entry.dagster_event.event_type_value in ("STEP_START", "STEP_SUCCESS")
+        ]
+        seconds = max(e.timestamp for e in steps) - min(e.timestamp for e in steps)
+
+        metadata = {
+            key: value.value
+            for event in result.get_asset_materialization_events()
+            for key, value in event.materialization.metadata.items()
+        }
+        rows = metadata.get("profile_rows_out") or metadata.get("profile_rows_in") or 0
+        return seconds, rows
+
+
+class InferenceSuite:
+    """``predict_proba`` of the trained model over every training row."""
+
+    def __init__(self, name: str, compiled: bool):
+        self.name = name
+        self.compiled = compiled
+        self.needs_postgres = False
+
+    def run(self, workspace: Workspace) -> tuple:
+        model = joblib.load(workspace.storage.get_model_path("random_forest_model.pkl"))
+        if self.compiled:
+            model = CompiledForest.from_sklearn(model)
+        X = workspace.training_features()
+        if self.compiled:
+            X = X.to_numpy()
+
+        start = time.perf_counter()
+        model.predict_proba(X)
+        return time.perf_counter() - start, len(X)
+
+
+SUITES = [
+    AssetSuite("raw_stock_csv_data", config={"full_refresh": True}),
+    AssetSuite("raw_stock_json_data", config={"full_refresh": True}),
+    AssetSuite("engineered_features"),
+    AssetSuite("postgres_training_data", config={"mode": "replace"}, needs_postgres=True),
+    AssetSuite("trained_model"),
+    InferenceSuite("inference_sklearn", compiled=False),
+    InferenceSuite("inference_compiled", compiled=True),
+]
+
+
+def postgres_from_env() -> dict:
+    """Postgres stand-in connection arguments from ``BENCH_PG_*`` variables, if any are set."""
+    fields = ["dbname", "user", "password", "host", "port"]
+    values = {field: os.environ[f"BENCH_PG_{field.upper()}"] for field in fields if f"BENCH_PG_{field.upper()}" in os.environ}
+    return values or None
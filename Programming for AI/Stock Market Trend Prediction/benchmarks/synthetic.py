@@ -0,0 +1,147 @@
+"""
+Deterministic synthetic OHLCV files in the yfinance layouts of data/raw.
+
+Every ticker's series is drawn from its own generator seeded with
+``(seed, ticker index)``, so a ticker's data does not change when more
+tickers or another file format are requested. Files are written as:
+
+- CSV: ``Price,Close,High,Low,Open,Volume`` / ``Ticker,...`` / ``Date,...``
+  header lines followed by one row per bar
+- JSON: ``DataFrame.to_json`` of ``(field, ticker)`` columns, i.e. keys like
+  ``"('Close', 'AAPL')"`` mapping epoch-millisecond timestamps to values
+
+Used by the benchmark suites; also runnable on its own to fill a directory:
+
+    python -m benchmarks.synthetic data/raw --tickers 200 --years 10
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+# yfinance column order
+FIELDS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+
+def ticker_name(index: int) -> str:
+    return f"T{index:04d}"
+
+
+def ohlcv(index: int, n_rows: int, seed: int = 42, start: str = "2015-01-02", freq: str = "B") -> pd.DataFrame:
+    """Bars of a geometric random walk with a ``Date`` column, for ticker number ``index``."""
+    rng = np.random.default_rng([seed, index])
+    dates = pd.date_range(start, periods=n_rows, freq=freq)
+
+    close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n_rows)))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.003, n_rows))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, n_rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, n_rows)))
+
+    return pd.DataFrame({
+        'Date': dates,
+        'Close': close,
+        'High': high,
+        'Low': low,
+        'Open': open_,
+        'Volume': rng.integers(1_000_000, 50_000_000, n_rows),
+    })
+
+
+def write_csv(path: str, ticker: str, df: pd.DataFrame):
+    """Write one ticker in the three-header-line yfinance CSV layout."""
+    with open(path, "w", newline="") as f:
+        f.write("Price," + ",".join(FIELDS) + "\n")
+        f.write("Ticker," + ",".join([ticker] * len(FIELDS)) + "\n")
+        f.write("Date" + "," * len(FIELDS) + "\n")
+
+        body = df[['Date'] + FIELDS].copy()
+        daily = (body['Date'] == body['Date'].dt.normalize()).all()
+        body['Date'] = body['Date'].dt.strftime("%Y-%m-%d" if daily else "%Y-%m-%d %H:%M:%S")
+        body.to_csv(f, header=False, index=False)
+
+
+def json_frame(frames: dict) -> pd.DataFrame:
+    """``{ticker: ohlcv frame}`` as the ``(field, ticker)``-column frame yfinance dumps."""
+    columns = {}
+    for ticker, df in frames.items():
+        for field in FIELDS:
+            columns[(field, ticker)] = df[field].to_numpy()
+
+    index = next(iter(frames.values()))['Date']
+    wide = pd.DataFrame(columns, index=pd.DatetimeIndex(index))
+    wide.columns = pd.MultiIndex.from_tuples(wide.columns, names=['Price', 'Ticker'])
+    return wide
+
+
+def write_json(path: str, frames: dict):
+    """Write one or more tickers (sharing a date axis) as a yfinance ``to_json`` dump."""
+    json_frame(frames).to_json(path)
+
+
+def generate(
+    directory: str,
+    n_tickers: int,
+    n_rows: int,
+    seed: int = 42,
+    json_fraction: float = 0.25,
+    freq: str = "B",
+) -> dict:
+    """
+    Write ``stock_data_<ticker>.csv|json`` files for ``n_tickers`` tickers.
+
+    Every ``1 / json_fraction``-th ticker is written as JSON and the rest as
+    CSV (one JSON and three CSVs at the defaults, like the sample data).
+    Returns file, row and byte counts.
+    """
+    os.makedirs(directory, exist_ok=True)
+    json_every = round(1 / json_fraction) if json_fraction > 0 else 0
+    summary = {"csv_files": 0, "json_files": 0, "rows": 0, "bytes": 0}
+
+    for i in range(n_tickers):
+        ticker = ticker_name(i)
+        df = ohlcv(i, n_rows, seed=seed, freq=freq)
+
+        if json_every and i % json_every == 0:
+            path = os.path.join(directory, f"stock_data_{ticker}.json")
+            write_json(path, {ticker: df})
+            summary["json_files"] += 1
+        else:
+            path = os.path.join(directory, f"stock_data_{ticker}.csv")
+            write_csv(path, ticker, df)
+            summary["csv_files"] += 1
+
+        summary["rows"] += n_rows
+        summary["bytes"] += os.path.getsize(path)
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory")
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json-fraction", type=float, default=0.25)
+    args = parser.parse_args()
+
+    summary = generate(
+        args.directory,
+        args.tickers,
+        args.years * TRADING_DAYS_PER_YEAR,
+        seed=args.seed,
+        json_fraction=args.json_fraction,
+    )
+    print(
+        f"Wrote {summary['csv_files']} CSV and {summary['json_files']} JSON files "
+        f"({summary['rows']:,} rows, {summary['bytes'] / 1e6:,.1f} MB) to {args.directory}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import pandas as pd
 from sqlalchemy import create_engine
 import os
 import glob
+import io
 import re
 
 # PostgreSQL Connection Test
@@ -24,15 +25,37 @@ try:
     cursor = conn.cursor()
     print(f"[Postgres] Connected to {dbname} on {host}:{port}")
 
-    # --- 2. Load CSV Data ---
+    # --- 2. Load Processed Data ---
+    # The pipeline writes training_data.parquet (training_data.csv only with write_csv)
     try:
-        csv_file = '../../data/processed/'
+        processed_dir = '../../data/processed/'
 
-        files = glob.glob(os.path.join(csv_file, "*.csv"))
+        files = glob.glob(os.path.join(processed_dir, "training_data.parquet"))
+        if not files:
+            files = glob.glob(os.path.join(processed_dir, "*.csv"))
         print(f"Found {len(files)} files.")
 
-        for csv_file in files:
-            file_name = os.path.basename(csv_file)
+        # Table column -> training dataset column
+        columns = {
+            "close_price": "Close",
+            "high_price": "High",
+            "low_price": "Low",
+            "open_price": "Open",
+            "volume": "Volume",
+            "trade_date": "Date",
+            "ticker": "Ticker",
+            "sma_50": "SMA_50",
+            "trend": "Trend",
+            "target": "Target",
+            "price_change": "Price_Change",
+            "distance_from_sma": "Distance_from_SMA",
+            "momentum": "Momentum_5d",
+            "volatility": "Volatility",
+            "next_day_target": "Next_Day_Target",
+        }
+
+        for data_file in files:
+            file_name = os.path.basename(data_file)
             table_name = "training_data" 
             
             print(f"Processing '{file_name}' -> Table '{table_name}'")
@@ -61,9 +84,18 @@ try:
                 """)
 
                 # 2. Copy the data
-                with open(csv_file, 'r', encoding='utf-8') as f:
-                    sql = f"COPY {table_name} FROM STDIN WITH CSV"
-                    cursor.copy_expert(sql, f)
+                if data_file.endswith('.parquet'):
+                    df = pd.read_parquet(data_file, columns=list(columns.values()))
+                else:
+                    df = pd.read_csv(data_file, usecols=list(columns.values()))
+                df['Date'] = pd.to_datetime(df['Date']).dt.date
+
+                buffer = io.StringIO()
+                df[list(columns.values())].to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+
+                sql = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH CSV"
+                cursor.copy_expert(sql, buffer)
                 
                 conn.commit()
                 print(f"  Successfully created and populated {table_name}")
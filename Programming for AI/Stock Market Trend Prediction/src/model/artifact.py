@@ -0,0 +1,164 @@
+"""
+Versioned model artifacts for the trend RandomForest.
+
+Each training run writes ``models/artifacts/<version>/``:
+
+- ``manifest.json``: format version, feature columns, classes,
+  hyperparameters, a hash of the training data, metrics and the creation time
+- the ``CompiledForest`` node arrays as ``.npy`` files (see ``forest.py``)
+
+``models/artifacts/LATEST`` names the newest version. Opening an artifact
+only reads the manifest; the arrays are loaded on first use of ``.model``,
+memory-mapped by default, so worker processes on one machine share a single
+page-cached copy instead of each unpickling the forest. The time that load
+took is kept in ``load_seconds``.
+
+    artifact = ModelArtifact.open("models/artifacts")   # LATEST
+    probabilities = artifact.model.predict_proba(X)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+try:
+    from .forest import CompiledForest
+except ImportError:
+    # Imported as a plain module (e.g. from the notebooks next to it)
+    from forest import CompiledForest
+
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+# Versions being written; never listed as versions
+TMP_PREFIX = ".tmp-"
+
+
+def is_artifact(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE)) or os.path.isfile(os.path.join(path, LATEST_FILE))
+
+
+def resolve_version(path: str) -> str:
+    """The artifact directory for ``path``: itself, or the version named by its LATEST file."""
+    latest = os.path.join(path, LATEST_FILE)
+    if os.path.isfile(latest):
+        with open(latest, 'r') as f:
+            return os.path.join(path, f.read().strip())
+    return path
+
+
+def read_manifest(path: str) -> dict:
+    with open(os.path.join(resolve_version(path), MANIFEST_FILE), 'r') as f:
+        manifest = json.load(f)
+
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format {manifest.get('format_version')} in {path}")
+    return manifest
+
+
+def write_artifact(
+    root: str,
+    model,
+    feature_cols: list,
+    hyperparameters: dict,
+    data_hash: str,
+    metrics: dict,
+    keep_versions: int = 5,
+) -> str:
+    """
+    Write a fitted forest as a new version under ``root`` and point LATEST at it.
+
+    The version name is the creation time to the microsecond, the start of the
+    data hash and a random suffix, so two runs never share a directory. The
+    version is written into a temporary directory under ``root`` and renamed
+    into place once complete; an existing version is never overwritten. Only
+    the newest ``keep_versions`` versions are kept. Returns the version
+    directory.
+    """
+    now = datetime.now()
+    created_at = now.isoformat(timespec="microseconds")
+    version = f"{now.strftime('%Y%m%dT%H%M%S%f')}-{data_hash[:8]}-{uuid.uuid4().hex[:8]}"
+    directory = os.path.join(root, version)
+
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=root)
+    try:
+        # mkdtemp creates the directory private to this user
+        os.chmod(tmp_dir, 0o755)
+        compiled = CompiledForest.from_sklearn(model)
+        compiled.save(tmp_dir)
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "version": version,
+            "created_at": created_at,
+            "model_type": type(model).__name__,
+            "feature_cols": list(feature_cols),
+            "classes": compiled.classes_.tolist(),
+            "hyperparameters": hyperparameters,
+            "training_data_hash": data_hash,
+            "metrics": metrics,
+            "n_trees": compiled.n_trees,
+            "n_nodes": compiled.n_nodes,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # os.replace would also replace an existing empty directory
+        if os.path.exists(directory):
+            raise FileExistsError(f"Model artifact version {version} already exists in {root}")
+        os.replace(tmp_dir, directory)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Swapping LATEST atomically so readers never see a half-written version
+    tmp_path = os.path.join(root, f"{TMP_PREFIX}{LATEST_FILE}-{version}")
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, LATEST_FILE))
+
+    versions = sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(TMP_PREFIX) and os.path.isfile(os.path.join(root, name, MANIFEST_FILE))
+    )
+    for name in versions[:-keep_versions] if keep_versions > 0 else []:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    return directory
+
+
+class ModelArtifact:
+    """A model artifact directory; the forest arrays are loaded on first access."""
+
+    def __init__(self, path: str, mmap_mode: str = 'r'):
+        self.path = resolve_version(path)
+        self.mmap_mode = mmap_mode
+        self.manifest = read_manifest(self.path)
+        self.load_seconds = None
+        self._model = None
+
+    @classmethod
+    def open(cls, path: str, mmap_mode: str = 'r') -> "ModelArtifact":
+        return cls(path, mmap_mode)
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def feature_cols(self) -> list:
+        return self.manifest["feature_cols"]
+
+    @property
+    def model(self) -> CompiledForest:
+        if self._model is None:
+            start = time.perf_counter()
+            self._model = CompiledForest.load(self.path, mmap_mode=self.mmap_mode)
+            self.load_seconds = time.perf_counter() - start
+        return self._model
@@ -0,0 +1,237 @@
+"""
+Walk-forward backtesting for the trend RandomForest.
+
+Each ticker's rows are ordered by date and cut into an initial training span
+followed by ``n_folds`` equal test spans. Fold ``k`` tests on span ``k`` and
+trains on everything before it ("expanding") or on the same number of rows
+as the initial span ("rolling"). ``gap`` rows are dropped from the end of each
+training window: ``Next_Day_Target`` looks one day ahead, so the last training
+row would otherwise see the first test day's close.
+
+Two modes:
+
+- ``refit``: every fold fits a fresh forest. Folds are independent and run on
+  a process pool; the feature matrix and targets are put in shared memory
+  once and every worker maps them read-only instead of receiving a copy.
+- ``warm_start``: one forest is carried from fold to fold. Each fold adds
+  ``trees_per_fold`` trees fitted only on the rows that became available
+  since the previous fold, which is how a scheduled retrain would extend the
+  model without refitting the full history.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+
+
+WINDOWS = ("expanding", "rolling")
+MODES = ("refit", "warm_start")
+
+# Arrays published by shared_array_map, by name
+_shared = {}
+
+
+def walk_forward_folds(
+    tickers,
+    dates,
+    n_folds: int = 5,
+    window: str = "expanding",
+    min_train_fraction: float = 0.5,
+    gap: int = 1,
+) -> list:
+    """
+    Row positions of every fold as ``{"fold", "train", "test"}`` dicts.
+
+    Splits are made per ticker, so every ticker contributes to every fold
+    even when their histories start on different dates.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"window must be one of {WINDOWS}, got {window!r}")
+
+    dates = np.asarray(dates)
+    positions = pd.Series(np.arange(len(dates))).groupby(np.asarray(tickers), sort=True).indices
+
+    folds = [{"fold": k, "train": [], "test": []} for k in range(n_folds)]
+    for rows in positions.values():
+        rows = rows[np.argsort(dates[rows], kind='stable')]
+        n_initial = int(len(rows) * min_train_fraction)
+        bounds = np.linspace(n_initial, len(rows), n_folds + 1).astype(int)
+
+        for k, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            train_end = max(start - gap, 0)
+            train_start = 0 if window == "expanding" else max(train_end - n_initial, 0)
+            folds[k]["train"].append(rows[train_start:train_end])
+            folds[k]["test"].append(rows[start:end])
+
+    for fold in folds:
+        fold["train"] = np.sort(np.concatenate(fold["train"]))
+        fold["test"] = np.sort(np.concatenate(fold["test"]))
+
+    return [fold for fold in folds if len(fold["train"]) and len(fold["test"])]
+
+
+def score_predictions(y_true, y_pred) -> dict:
+    return {
+        'accuracy': float(accuracy_score(y_true, y_pred)),
+        'precision': float(precision_score(y_true, y_pred, zero_division=0)),
+        'recall': float(recall_score(y_true, y_pred, zero_division=0)),
+        'f1_score': float(f1_score(y_true, y_pred, zero_division=0)),
+    }
+
+
+def _evaluate(model, X, y, fold: dict, fit_seconds: float, train_rows: np.ndarray) -> dict:
+    start = time.perf_counter()
+    y_pred = model.predict(X[fold["test"]])
+    predict_seconds = time.perf_counter() - start
+
+    return {
+        "fold": fold["fold"],
+        "train_rows": len(fold["train"]),
+        "fitted_rows": len(train_rows),
+        "test_rows": len(fold["test"]),
+        "n_estimators": len(model.estimators_),
+        **score_predictions(y[fold["test"]], y_pred),
+        "fit_seconds": round(fit_seconds, 4),
+        "predict_seconds": round(predict_seconds, 4),
+    }
+
+
+def _to_shared(array: np.ndarray) -> tuple:
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_shared(specs: dict):
+    """Pool initializer: map the parent's shared arrays read-only."""
+    for name, (shm_name, shape, dtype) in specs.items():
+        # Pool workers share the parent's resource tracker, which unlinks the block once
+        shm = SharedMemory(name=shm_name)
+        array = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        _shared[name] = (shm, array)
+
+
+def shared_arrays(*names) -> tuple:
+    """The arrays published by ``shared_array_map``, from inside a mapped function."""
+    return tuple(_shared[name][1] for name in names)
+
+
+@contextmanager
+def shared_array_map(arrays: dict, max_workers: int):
+    """
+    Yield a ``map`` over a process pool whose workers can read ``arrays``
+    through ``shared_arrays`` without each receiving a copy. With
+    ``max_workers <= 1`` the built-in ``map`` runs everything in-process.
+    """
+    if max_workers <= 1:
+        _shared.update({name: (None, array) for name, array in arrays.items()})
+        try:
+            yield map
+        finally:
+            _shared.clear()
+        return
+
+    blocks = {name: _to_shared(array) for name, array in arrays.items()}
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_shared,
+            initargs=({name: spec for name, (_, spec) in blocks.items()},),
+        ) as executor:
+            yield executor.map
+    finally:
+        for shm, _ in blocks.values():
+            shm.close()
+            shm.unlink()
+
+
+def _refit_fold(fold: dict, hyperparameters: dict) -> dict:
+    X, y = shared_arrays("X", "y")
+
+    model = RandomForestClassifier(**hyperparameters, n_jobs=1)
+    start = time.perf_counter()
+    model.fit(X[fold["train"]], y[fold["train"]])
+    fit_seconds = time.perf_counter() - start
+
+    return _evaluate(model, X, y, fold, fit_seconds, fold["train"])
+
+
+def _run_refit(X, y, folds, hyperparameters, max_workers) -> list:
+    with shared_array_map({"X": X, "y": y}, max_workers) as pool_map:
+        return list(pool_map(_refit_fold, folds, [hyperparameters] * len(folds)))
+
+
+def _run_warm_start(X, y, folds, hyperparameters, trees_per_fold, n_jobs) -> list:
+    model = RandomForestClassifier(**hyperparameters, warm_start=True, n_jobs=n_jobs)
+    results = []
+    previous_train = np.array([], dtype=np.int64)
+
+    for fold in folds:
+        if not results:
+            new_rows = fold["train"]
+        else:
+            new_rows = np.setdiff1d(fold["train"], previous_train, assume_unique=True)
+            # Growing the forest needs both classes among the new rows
+            if len(np.unique(y[new_rows])) > 1:
+                model.n_estimators += trees_per_fold
+            else:
+                new_rows = new_rows[:0]
+
+        start = time.perf_counter()
+        if len(new_rows):
+            model.fit(X[new_rows], y[new_rows])
+        fit_seconds = time.perf_counter() - start
+
+        results.append(_evaluate(model, X, y, fold, fit_seconds, new_rows))
+        previous_train = fold["train"]
+
+    return results
+
+
+def run_backtest(
+    df: pd.DataFrame,
+    feature_cols: list,
+    target_col: str,
+    hyperparameters: dict,
+    n_folds: int = 5,
+    window: str = "expanding",
+    min_train_fraction: float = 0.5,
+    gap: int = 1,
+    mode: str = "refit",
+    trees_per_fold: int = 20,
+    max_workers: int = 4,
+) -> pd.DataFrame:
+    """
+    Walk-forward backtest of a RandomForestClassifier over ``df`` (which needs
+    ``Ticker`` and ``Date`` columns). Returns one row of metrics and timings
+    per fold, with the date range each fold trained and tested on.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+
+    X = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32))
+    y = np.ascontiguousarray(df[target_col].to_numpy(dtype=np.int8))
+    dates = df['Date'].to_numpy()
+    folds = walk_forward_folds(df['Ticker'].to_numpy(), dates, n_folds, window, min_train_fraction, gap)
+
+    if mode == "refit":
+        results = _run_refit(X, y, folds, hyperparameters, max_workers)
+    else:
+        results = _run_warm_start(X, y, folds, hyperparameters, trees_per_fold, max_workers)
+
+    for fold, result in zip(folds, results):
+        result.update({
+            "train_start": dates[fold["train"]].min(),
+            "train_end": dates[fold["train"]].max(),
+            "test_start": dates[fold["test"]].min(),
+            "test_end": dates[fold["test"]].max(),
+        })
+
+    return pd.DataFrame(results)
@@ -0,0 +1,202 @@
+"""
+Flattened, NumPy-only evaluator for a fitted RandomForestClassifier.
+
+``CompiledForest.from_sklearn`` packs every tree into shared node arrays:
+
+- ``feature`` / ``threshold``: the split of each node
+- ``child``: global index of the left child; the right child is ``child + 1``
+  (nodes are renumbered breadth-first so siblings are adjacent) and leaves
+  point at themselves
+- ``missing_right``: nodes that send a NaN feature value to the right
+- ``value``: per-node class probabilities (only read at leaves)
+- ``roots``: the index of each tree's root node
+
+Scoring walks all trees for a block of rows at once, one level per step:
+``node = child[node] + (x[feature[node]] > threshold[node])``. Leaves have a
+``+inf`` threshold, so after ``depth`` steps every path has stopped at its leaf.
+
+Thresholds are stored as the largest float32 not above sklearn's float64
+threshold. Inputs are float32 (sklearn casts them too), so
+``x <= threshold`` decides exactly as sklearn does. Tree probabilities are
+summed in tree order as in ``RandomForestClassifier.predict_proba``.
+
+Nothing here imports sklearn: saved arrays load with ``CompiledForest.load``
+(optionally memory-mapped) in workers that only have NumPy.
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+ARRAYS = ['feature', 'threshold', 'child', 'missing_right', 'value', 'roots']
+META_FILE = "forest.json"
+
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each float64 value."""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _breadth_first_order(children_left: np.ndarray, children_right: np.ndarray) -> np.ndarray:
+    """Node ids in an order where the two children of every split are adjacent."""
+    order = [0]
+    pending = deque([0])
+    while pending:
+        node = pending.popleft()
+        if children_left[node] != -1:
+            order.extend((children_left[node], children_right[node]))
+            pending.extend((children_left[node], children_right[node]))
+    return np.asarray(order, dtype=np.int64)
+
+
+class CompiledForest:
+
+    def __init__(self, arrays: dict, classes, feature_names=None, depth: int = None):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.child = arrays['child']
+        self.missing_right = arrays['missing_right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = None if feature_names is None else np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = int(self.feature.max()) + 1 if feature_names is None else len(feature_names)
+        self.depth = depth
+
+        # Per-class leaf values as contiguous columns for np.take
+        self._class_values = [np.ascontiguousarray(self.value[:, c]) for c in range(self.value.shape[1])]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Pack the fitted trees of a RandomForestClassifier."""
+        features, thresholds, children, missing, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            order = _breadth_first_order(tree.children_left, tree.children_right)
+            position = np.empty(tree.node_count, dtype=np.int64)
+            position[order] = np.arange(tree.node_count)
+
+            left = tree.children_left[order]
+            is_leaf = left == -1
+            own_index = np.arange(tree.node_count)
+
+            features.append(np.where(is_leaf, 0, tree.feature[order]).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, _float32_floor(tree.threshold[order])).astype(np.float32))
+            children.append((np.where(is_leaf, own_index, position[np.where(is_leaf, 0, left)]) + offset).astype(np.int32))
+
+            go_left = getattr(tree, 'missing_go_to_left', None)
+            if go_left is None:
+                missing.append(~is_leaf)
+            else:
+                missing.append(~np.asarray(go_left, dtype=bool)[order] & ~is_leaf)
+
+            # Single-output classifier: (n_nodes, 1, n_classes) -> class probabilities
+            counts = tree.value[order, 0, :]
+            values.append(counts / counts.sum(axis=1, keepdims=True))
+
+            roots.append(offset)
+            depth = max(depth, tree.max_depth)
+            offset += tree.node_count
+
+        arrays = {
+            'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds),
+            'child': np.concatenate(children),
+            'missing_right': np.concatenate(missing),
+            'value': np.concatenate(values),
+            'roots': np.asarray(roots, dtype=np.int32),
+        }
+        return cls(arrays, model.classes_, getattr(model, 'feature_names_in_', None), depth)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+        meta = {
+            "classes": self.classes_.tolist(),
+            "feature_names": None if self.feature_names_in_ is None else list(self.feature_names_in_),
+            "depth": self.depth,
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+        }
+        with open(os.path.join(directory, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = None) -> "CompiledForest":
+        """Load a saved forest; ``mmap_mode='r'`` shares the arrays between worker processes."""
+        with open(os.path.join(directory, META_FILE), 'r') as f:
+            meta = json.load(f)
+
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAYS
+        }
+        return cls(arrays, meta["classes"], meta["feature_names"], meta["depth"])
+
+    def _score_block(self, X: np.ndarray, out: np.ndarray):
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        has_missing = bool(np.isnan(flat_X).any())
+
+        # One lane per (tree, row) pair, tree-major
+        nodes = np.repeat(self.roots, n_rows)
+        row_offset = np.tile(np.arange(n_rows, dtype=np.int32) * n_features, self.n_trees)
+
+        for _ in range(self.depth):
+            x = np.take(flat_X, row_offset + np.take(self.feature, nodes))
+            step = x > np.take(self.threshold, nodes)
+            if has_missing:
+                step |= np.isnan(x) & np.take(self.missing_right, nodes)
+            nodes = np.take(self.child, nodes) + step
+
+        # Summing over trees in order, like sklearn's accumulation
+        for c, class_values in enumerate(self._class_values):
+            out[:, c] = np.take(class_values, nodes).reshape(self.n_trees, n_rows).sum(axis=0) / self.n_trees
+
+    def predict_proba(self, X, block_rows: int = 1024, n_jobs: int = 1) -> np.ndarray:
+        """
+        Mean of the per-tree leaf probabilities, scored ``block_rows`` rows at a time.
+
+        Blocks are independent, so ``n_jobs > 1`` scores them on a thread pool
+        (NumPy releases the GIL inside the gathers).
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected an array of shape (n, {self.n_features_in_}), got {X.shape}")
+
+        out = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        blocks = [slice(start, start + block_rows) for start in range(0, len(X), block_rows)]
+
+        if n_jobs > 1 and len(blocks) > 1:
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                list(executor.map(lambda block: self._score_block(X[block], out[block]), blocks))
+        else:
+            for block in blocks:
+                self._score_block(X[block], out[block])
+
+        return out
+
+    def predict(self, X, block_rows: int = 1024, n_jobs: int = 1) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X, block_rows, n_jobs), axis=1)]
@@ -0,0 +1,159 @@
+"""
+Incremental retraining of the trend RandomForest.
+
+Between full refits, ``trained_model`` keeps the previous forest and only
+looks at rows newer than the per-ticker watermarks in ``TrainingState``:
+
+- rows the model has not scored yet are predicted first (prequential
+  evaluation), and the running confusion counts are compared with the
+  accuracy of the last full fit;
+- once ``min_new_rows`` unseen rows have accumulated, ``grow_forest`` fits a
+  few extra trees on just those rows, replacing the oldest trees when the
+  forest would exceed its budget.
+
+A drop in prequential accuracy or a shift in the feature distributions
+(population stability index against the last full fit) triggers a full
+refit instead.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+STATE_FILE = "training_state.json"
+PSI_BINS = 10
+
+
+class TrainingState:
+    """
+    What the current model has been trained on and how it has scored since.
+
+    ``trained_watermarks`` / ``scored_watermarks`` hold the latest Date per
+    ticker that has been fitted on / evaluated. ``reference`` holds the metrics
+    and feature profile of the last full fit and ``prequential`` the confusion
+    counts on rows scored after it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = {}
+
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.data = json.load(f)
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.data)
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def reset(self, df: pd.DataFrame, X: np.ndarray, hyperparameters: dict, metrics: dict, rows_fitted: int):
+        """Start over after a full refit on every row of ``df``."""
+        watermarks = latest_dates(df)
+        self.data = {
+            'hyperparameters': hyperparameters,
+            'trained_watermarks': watermarks,
+            'scored_watermarks': watermarks,
+            'rows_seen': len(df),
+            'rows_fitted': rows_fitted,
+            'updates_since_refit': 0,
+            'reference': {'metrics': metrics, 'profile': feature_profile(X)},
+            'prequential': {'tp': 0, 'fp': 0, 'fn': 0, 'tn': 0},
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Writing to a temp file first so readers never see a partial state
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def latest_dates(df: pd.DataFrame) -> dict:
+    return {
+        str(ticker): date.isoformat()
+        for ticker, date in df.groupby('Ticker', observed=True)['Date'].max().items()
+    }
+
+
+def rows_after(df: pd.DataFrame, watermarks: dict) -> np.ndarray:
+    """Boolean mask of rows dated after their ticker's watermark (all rows of unknown tickers)."""
+    limits = pd.to_datetime(df['Ticker'].astype(str).map(watermarks))
+    return (limits.isna() | (df['Date'] > limits)).to_numpy()
+
+
+def feature_profile(X: np.ndarray, n_bins: int = PSI_BINS) -> dict:
+    """Decile edges of every feature and the share of rows in each bin."""
+    X = np.asarray(X, dtype=np.float64)
+    edges = np.nanquantile(X, np.linspace(0, 1, n_bins + 1)[1:-1], axis=0).T
+    shares = [_bin_shares(X[:, i], edges[i]) for i in range(X.shape[1])]
+    return {'edges': edges.tolist(), 'shares': [s.tolist() for s in shares]}
+
+
+def _bin_shares(values: np.ndarray, edges) -> np.ndarray:
+    counts = np.bincount(np.searchsorted(edges, values[~np.isnan(values)], side='right'), minlength=len(edges) + 1)
+    return counts / max(counts.sum(), 1)
+
+
+def population_stability(profile: dict, X: np.ndarray) -> list:
+    """Population stability index of each feature of ``X`` against a ``feature_profile``."""
+    X = np.asarray(X, dtype=np.float64)
+    psi = []
+    for i, (edges, expected) in enumerate(zip(profile['edges'], profile['shares'])):
+        # Empty bins would make the log term infinite
+        expected = np.clip(np.asarray(expected), 1e-4, None)
+        actual = np.clip(_bin_shares(X[:, i], edges), 1e-4, None)
+        psi.append(float(np.sum((actual - expected) * np.log(actual / expected))))
+    return psi
+
+
+def confusion_counts(y_true, y_pred) -> dict:
+    y_true = np.asarray(y_true).astype(bool)
+    y_pred = np.asarray(y_pred).astype(bool)
+    return {
+        'tp': int(np.sum(y_true & y_pred)),
+        'fp': int(np.sum(~y_true & y_pred)),
+        'fn': int(np.sum(y_true & ~y_pred)),
+        'tn': int(np.sum(~y_true & ~y_pred)),
+    }
+
+
+def metrics_from_counts(counts: dict) -> dict:
+    tp, fp, fn, tn = counts['tp'], counts['fp'], counts['fn'], counts['tn']
+    total = tp + fp + fn + tn
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        'accuracy': (tp + tn) / total if total else 0.0,
+        'precision': precision,
+        'recall': recall,
+        'f1_score': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+    }
+
+
+def grow_forest(model, X, y, n_trees: int, max_trees: int) -> tuple:
+    """
+    Fit ``n_trees`` extra trees of a fitted RandomForest on ``X``/``y`` only.
+
+    When the forest would grow past ``max_trees`` the oldest trees (the front
+    of ``estimators_``) are dropped first. Returns (trees added, trees replaced).
+    """
+    n_trees = min(n_trees, max_trees)
+    replaced = max(len(model.estimators_) + n_trees - max_trees, 0)
+    if replaced:
+        del model.estimators_[:replaced]
+
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees)
+    try:
+        model.fit(X, y)
+    finally:
+        model.set_params(warm_start=False)
+
+    return n_trees, replaced
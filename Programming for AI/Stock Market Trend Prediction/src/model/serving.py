@@ -0,0 +1,344 @@
+"""
+Long-lived prediction service for the trend RandomForest.
+
+The model is loaded once. Callers submit one or more feature rows and get a
+Future back; a background thread coalesces whatever is queued (up to
+``max_batch_size`` rows, waiting at most ``max_wait_ms`` for more) into one
+contiguous float32 array and a single ``predict_proba`` call, then hands each
+caller its slice. Request latency (submit to result) and batch sizes are
+tracked in ``stats``.
+
+In-process:
+
+    service = PredictionService.from_path("models/random_forest_model.pkl")
+    with service:
+        results = service.predict([example_bullish, example_bearish])
+
+Over HTTP (POST /predict, GET /stats, GET /health):
+
+    python -m src.model.serving --model models/random_forest_model.pkl --port 8080
+
+``--model`` may also point at a model artifact (models/artifacts, see artifact.py).
+"""
+
+import argparse
+import collections
+import json
+import os
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+import pandas as pd
+
+try:
+    from .artifact import ModelArtifact, is_artifact
+    from .forest import CompiledForest
+except ImportError:
+    # Imported as a plain module (e.g. from the notebooks next to it)
+    from artifact import ModelArtifact, is_artifact
+    from forest import CompiledForest
+
+FEATURE_COLUMNS = ['SMA_50', 'Price_Change', 'Distance_from_SMA', 'Momentum_5d', 'Volatility']
+
+_STOP = object()
+
+
+def to_feature_array(data) -> np.ndarray:
+    """
+    Convert a feature dict, a list of dicts, a DataFrame or a 2-D array-like
+    (columns in ``FEATURE_COLUMNS`` order) into a C-contiguous float32 array.
+    """
+    if isinstance(data, dict):
+        data = [data]
+
+    if isinstance(data, pd.DataFrame):
+        array = data[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    elif isinstance(data, list) and data and isinstance(data[0], dict):
+        array = np.array([[row[col] for col in FEATURE_COLUMNS] for row in data], dtype=np.float32)
+    else:
+        array = np.asarray(data, dtype=np.float32)
+        if array.ndim == 1:
+            array = array.reshape(1, -1)
+
+    if array.ndim != 2 or array.shape[1] != len(FEATURE_COLUMNS):
+        raise ValueError(f"Expected rows of {len(FEATURE_COLUMNS)} features {FEATURE_COLUMNS}, got shape {array.shape}")
+
+    return np.ascontiguousarray(array)
+
+
+def format_predictions(probabilities: np.ndarray, classes: np.ndarray) -> list:
+    """Results in the notebook's format, computed column-wise rather than per row."""
+    bullish = probabilities[:, list(classes).index(1)] * 100
+    bearish = probabilities[:, list(classes).index(0)] * 100
+    is_bullish = bullish > bearish
+    confidence = np.where(is_bullish, bullish, bearish)
+
+    return [
+        {
+            'prediction': "Bullish" if up else "Bearish",
+            'confidence': f"{conf:.2f}%",
+            'bearish_probability': f"{bear:.2f}%",
+            'bullish_probability': f"{bull:.2f}%",
+        }
+        for up, conf, bear, bull in zip(is_bullish.tolist(), confidence.tolist(), bearish.tolist(), bullish.tolist())
+    ]
+
+
+class LatencyStats:
+    """Rolling window of request latencies plus a power-of-two batch size histogram."""
+
+    def __init__(self, window: int = 10_000):
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._batch_sizes = collections.Counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+
+    def record_batch(self, rows: int, latencies: list):
+        # Bucket "8" holds batches of 5-8 rows, "16" of 9-16 rows, ...
+        bucket = 1 << max(rows - 1, 0).bit_length()
+        with self._lock:
+            self._latencies.extend(latencies)
+            self._batch_sizes[bucket] += 1
+            self.requests += len(latencies)
+            self.rows += rows
+            self.batches += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=float) * 1000
+            histogram = {str(size): count for size, count in sorted(self._batch_sizes.items())}
+            requests, rows, batches = self.requests, self.rows, self.batches
+
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            "requests": requests,
+            "rows": rows,
+            "batches": batches,
+            "mean_batch_rows": round(rows / batches, 2) if batches else 0.0,
+            "latency_p50_ms": round(float(p50), 3),
+            "latency_p99_ms": round(float(p99), 3),
+            "batch_size_histogram": histogram,
+        }
+
+
+class PredictionService:
+    """Micro-batching wrapper around a fitted classifier with ``predict_proba``."""
+
+    def __init__(self, model, max_batch_size: int = 1024, max_wait_ms: float = 2.0, n_jobs: int = 1):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = LatencyStats()
+
+        names = getattr(model, 'feature_names_in_', None)
+        if names is not None and list(names) != FEATURE_COLUMNS:
+            raise ValueError(f"Model was trained on {list(names)}, expected {FEATURE_COLUMNS}")
+
+        # Thread fan-out costs more than it saves on micro-batches
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = n_jobs
+
+        self.load_info = {}
+        self._queue = queue.Queue()
+        self._thread = None
+
+    @classmethod
+    def from_path(cls, model_path: str, **kwargs) -> "PredictionService":
+        """
+        Load a pickled model, a model artifact (``models/artifacts`` or one
+        version of it) or a ``CompiledForest`` directory. Directories are
+        memory-mapped and need no sklearn. The load time is kept in ``load_info``.
+        """
+        start = time.perf_counter()
+        info = {"path": model_path}
+
+        if os.path.isdir(model_path) and is_artifact(model_path):
+            artifact = ModelArtifact.open(model_path)
+            model = artifact.model
+            info["version"] = artifact.version
+        elif os.path.isdir(model_path):
+            model = CompiledForest.load(model_path, mmap_mode='r')
+        else:
+            model = joblib.load(model_path)
+
+        service = cls(model, **kwargs)
+        service.load_info = {**info, "load_seconds": round(time.perf_counter() - start, 4)}
+        return service
+
+    def start(self) -> "PredictionService":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prediction-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def submit(self, data) -> Future:
+        """Queue rows for scoring; the Future resolves to an (n, 2) probability array."""
+        if self._thread is None:
+            raise RuntimeError("PredictionService is not running; call start() first")
+
+        future = Future()
+        self._queue.put((to_feature_array(data), future, time.perf_counter()))
+        return future
+
+    def predict_proba(self, data, timeout: float = None) -> np.ndarray:
+        return self.submit(data).result(timeout)
+
+    def predict(self, data, timeout: float = None) -> list:
+        return format_predictions(self.predict_proba(data, timeout), self.model.classes_)
+
+    def _collect_batch(self, first) -> tuple:
+        batch = [first]
+        rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        stop = False
+
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+            rows += len(item[0])
+
+        return batch, stop
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            batch, stop = self._collect_batch(first)
+            # Futures cancelled while queued are dropped; the rest can no longer be cancelled
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            arrays = [array for array, _, _ in batch]
+            X = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+            try:
+                with warnings.catch_warnings():
+                    # Rows are passed as plain arrays in FEATURE_COLUMNS order (checked in __init__)
+                    warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+                    probabilities = self.model.predict_proba(X)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            offsets = np.cumsum([0] + [len(array) for array in arrays])
+            done = time.perf_counter()
+            for (array, future, submitted), start, end in zip(batch, offsets[:-1], offsets[1:]):
+                future.set_result(probabilities[start:end])
+
+            self.stats.record_batch(len(X), [done - submitted for _, _, submitted in batch])
+
+
+class _PredictionHandler(BaseHTTPRequestHandler):
+    service: PredictionService = None
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.service.stats.snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok", "model": self.service.load_info})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            # {"instances": [...]} or a bare dict / list of rows
+            instances = payload.get("instances", payload) if isinstance(payload, dict) else payload
+            predictions = self.service.predict(instances)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        self._send_json(200, {"predictions": predictions})
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate at thousands of requests per second
+        pass
+
+
+def make_server(service: PredictionService, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    handler = type("PredictionHandler", (_PredictionHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve random_forest_model.pkl over HTTP")
+    parser.add_argument("--model", default="models/random_forest_model.pkl", help="Pickled model or model artifact directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=1024)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    service = PredictionService.from_path(
+        args.model,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        n_jobs=args.n_jobs,
+    )
+
+    with service:
+        server = make_server(service, args.host, args.port)
+        print(f"Serving {args.model} on http://{args.host}:{args.port} (POST /predict, GET /stats), "
+              f"loaded in {service.load_info['load_seconds']} s")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
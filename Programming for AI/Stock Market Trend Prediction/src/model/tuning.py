@@ -0,0 +1,196 @@
+"""
+Hyperparameter search for the trend RandomForest.
+
+Candidates are scored on the walk-forward folds of ``backtest.py`` (a random
+split would leak future rows into training). One trial is one candidate
+fitted and scored on one fold; trials run on a process pool that reads the
+feature matrix from shared memory.
+
+Every finished trial is stored in a SQLite ``TrialCache`` keyed on the
+parameters, the training data hash and the fold layout, so a repeated search
+over the same data only fits the trials it has not seen.
+
+``strategy="grid"`` scores every candidate on every fold. ``"halving"``
+(successive halving) scores all candidates on the newest fold, keeps the best
+``1 / eta`` and gives the survivors ``eta`` times as many folds, until one
+candidate is left or all folds are used.
+"""
+
+import itertools
+import json
+import math
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+try:
+    from .backtest import score_predictions, shared_array_map, shared_arrays, walk_forward_folds
+except ImportError:
+    # Imported as a plain module (e.g. from the notebooks next to it)
+    from backtest import score_predictions, shared_array_map, shared_arrays, walk_forward_folds
+
+
+STRATEGIES = ("grid", "halving")
+
+
+def parameter_grid(space: dict) -> list:
+    """Every combination of a ``{name: [values]}`` search space, in a stable order."""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def params_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+class TrialCache:
+    """SQLite store of finished trials, keyed on (params, data hash, fold layout, fold)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS trials (
+                    params TEXT NOT NULL,
+                    data_hash TEXT NOT NULL,
+                    folds TEXT NOT NULL,
+                    fold INTEGER NOT NULL,
+                    scores TEXT NOT NULL,
+                    fit_seconds REAL NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (params, data_hash, folds, fold)
+                )
+                """
+            )
+
+    def get(self, data_hash: str, folds: str) -> dict:
+        """Cached trials for this data and fold layout as ``{(params, fold): result}``."""
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT params, fold, scores, fit_seconds FROM trials WHERE data_hash = ? AND folds = ?",
+                (data_hash, folds),
+            ).fetchall()
+        return {
+            (params, fold): {**json.loads(scores), "fit_seconds": fit_seconds}
+            for params, fold, scores, fit_seconds in rows
+        }
+
+    def put(self, data_hash: str, folds: str, results: list):
+        created_at = pd.Timestamp.now().isoformat()
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r["params"],
+                        data_hash,
+                        folds,
+                        r["fold"],
+                        json.dumps({k: r[k] for k in ("accuracy", "precision", "recall", "f1_score")}),
+                        r["fit_seconds"],
+                        created_at,
+                    )
+                    for r in results
+                ],
+            )
+
+
+def _run_trial(trial: tuple) -> dict:
+    params, fold, base_params = trial
+    X, y = shared_arrays("X", "y")
+
+    model = RandomForestClassifier(**base_params, **json.loads(params), n_jobs=1)
+    start = time.perf_counter()
+    model.fit(X[fold["train"]], y[fold["train"]])
+    fit_seconds = time.perf_counter() - start
+
+    return {
+        "params": params,
+        "fold": fold["fold"],
+        **score_predictions(y[fold["test"]], model.predict(X[fold["test"]])),
+        "fit_seconds": round(fit_seconds, 4),
+    }
+
+
+def run_search(
+    df: pd.DataFrame,
+    feature_cols: list,
+    target_col: str,
+    space: dict,
+    cache: TrialCache,
+    data_hash: str,
+    base_params: dict = None,
+    strategy: str = "halving",
+    metric: str = "accuracy",
+    n_folds: int = 3,
+    eta: int = 3,
+    max_workers: int = 4,
+) -> tuple:
+    """
+    Search ``space`` over walk-forward folds of ``df``.
+
+    Returns ``(leaderboard, stats)``: one row per candidate with its mean
+    scores over the folds it reached, best first (the first row is the
+    winner), and trial counts.
+    ``base_params`` are passed to every candidate (e.g. ``random_state``).
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"strategy must be one of {STRATEGIES}, got {strategy!r}")
+
+    base_params = base_params or {}
+    X = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32))
+    y = np.ascontiguousarray(df[target_col].to_numpy(dtype=np.int8))
+    folds = walk_forward_folds(df['Ticker'].to_numpy(), df['Date'].to_numpy(), n_folds=n_folds)
+
+    # Fold layout and fixed parameters are part of the cache key
+    layout = params_key({"n_folds": n_folds, "window": "expanding", "base_params": base_params})
+    results = cache.get(data_hash, layout)
+    stats = {"trials": 0, "cached": 0, "fitted": 0}
+
+    all_candidates = [params_key(params) for params in parameter_grid(space)]
+    candidates = all_candidates
+    n_used = len(folds) if strategy == "grid" else 1
+    # Newest folds each candidate was scored on in this search
+    reached = {}
+
+    with shared_array_map({"X": X, "y": y}, max_workers) as pool_map:
+        while True:
+            # Newest folds first: they are the closest to how the model is used
+            used = folds[-n_used:]
+            needed = [(params, fold) for params in candidates for fold in used]
+            missing = [(params, fold) for params, fold in needed if (params, fold["fold"]) not in results]
+
+            stats["trials"] += len(needed)
+            stats["cached"] += len(needed) - len(missing)
+            stats["fitted"] += len(missing)
+            reached.update({params: n_used for params in candidates})
+
+            fresh = list(pool_map(_run_trial, [(params, fold, base_params) for params, fold in missing]))
+            cache.put(data_hash, layout, fresh)
+            results.update({(r["params"], r["fold"]): r for r in fresh})
+
+            ranked = sorted(
+                candidates,
+                key=lambda params: -np.mean([results[(params, fold["fold"])][metric] for fold in used]),
+            )
+            if len(ranked) == 1 or n_used >= len(folds):
+                break
+            candidates = ranked[:max(1, math.ceil(len(ranked) / eta))]
+            n_used = min(len(folds), n_used * eta)
+
+    rows = []
+    for params in all_candidates:
+        trials = [results[(params, fold["fold"])] for fold in folds[-reached[params]:]]
+        rows.append({
+            **json.loads(params),
+            "folds": len(trials),
+            **{m: float(np.mean([t[m] for t in trials])) for m in ("accuracy", "precision", "recall", "f1_score")},
+            "fit_seconds": float(np.sum([t["fit_seconds"] for t in trials])),
+        })
+
+    leaderboard = pd.DataFrame(rows).sort_values(["folds", metric], ascending=False, ignore_index=True)
+    return leaderboard, stats
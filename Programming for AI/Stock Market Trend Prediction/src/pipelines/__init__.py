@@ -4,24 +4,32 @@ Dagster pipeline definitions for Project CA2 - ETL.
 This module defines the assets, jobs, schedules, and sensors for the ETL pipeline.
 """
 
-from dagster import Definitions, load_assets_from_modules
+from dagster import Definitions, load_asset_checks_from_modules, load_assets_from_modules
 
 from . import assets
-from .jobs import etl_job
+from .jobs import etl_job, backtest_job, tuning_job, chunked_job
 from .schedules import daily_etl_schedule
 from .resources import postgres_connection, mongodb_connection, data_storage
+from .io_manager import ParquetIOManager
+from .cache import AssetCacheResource
+from .profiling import ProfilingResource
 
 # Load all assets from the assets module
 all_assets = load_assets_from_modules([assets])
+all_asset_checks = load_asset_checks_from_modules([assets])
 
 # Define the Dagster project
 defs = Definitions(
     assets=all_assets,
-    jobs=[etl_job],
+    asset_checks=all_asset_checks,
+    jobs=[etl_job, backtest_job, tuning_job, chunked_job],
     schedules=[daily_etl_schedule],
     resources={
         "postgres": postgres_connection,
         "mongodb": mongodb_connection,
         "storage": data_storage,
+        "io_manager": ParquetIOManager(storage=data_storage),
+        "asset_cache": AssetCacheResource(storage=data_storage),
+        "profiling": ProfilingResource(),
     },
 )
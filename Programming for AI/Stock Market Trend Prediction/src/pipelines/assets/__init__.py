@@ -4,3 +4,6 @@ from .extraction import *
 from .transformation import *
 from .loading import *
 from .storage import *
+from .backtesting import *
+from .tuning import *
+from .streaming import *
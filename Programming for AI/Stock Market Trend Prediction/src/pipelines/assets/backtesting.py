@@ -0,0 +1,80 @@
+import pandas as pd
+from dagster import asset, AssetExecutionContext, AssetIn, Config
+from ..profiling import profiled
+from ..resources import DataStorageResource
+from ..schemas import peak_rss_mb
+from ...model.backtest import run_backtest
+from .loading import FEATURE_COLUMNS, TARGET_COLUMN, model_hyperparameters
+
+
+class BacktestConfig(Config):
+    # Test spans per ticker after the initial training span
+    n_folds: int = 5
+    # "expanding" trains on all history before each fold, "rolling" on a fixed-length window
+    window: str = "expanding"
+    # Share of each ticker's history used as the initial training span
+    min_train_fraction: float = 0.5
+    # Rows dropped between training and test spans (Next_Day_Target looks one day ahead)
+    gap: int = 1
+    # "refit" fits every fold from scratch in parallel, "warm_start" grows one forest fold by fold
+    mode: str = "refit"
+    # Trees added per fold in warm_start mode
+    trees_per_fold: int = 20
+    # Worker processes for refit mode (forest n_jobs in warm_start mode)
+    max_workers: int = 4
+
+
+@asset(
+    description="Walk-forward backtest of the RandomForest over per-ticker date folds",
+    group_name="backtesting",
+    # Only the model columns and the split keys are read from the Parquet store
+    ins={"training_dataset": AssetIn(metadata={"columns": FEATURE_COLUMNS + [TARGET_COLUMN, 'Date', 'Ticker']})},
+)
+@profiled
+def walk_forward_backtest(
+    context: AssetExecutionContext,
+    config: BacktestConfig,
+    storage: DataStorageResource,
+    training_dataset: pd.DataFrame
+):
+    context.log.info(f"Running {config.n_folds}-fold {config.window} walk-forward backtest ({config.mode})")
+    
+    start = pd.Timestamp.now()
+    folds = run_backtest(
+        training_dataset,
+        FEATURE_COLUMNS,
+        TARGET_COLUMN,
+        model_hyperparameters(storage),
+        n_folds=config.n_folds,
+        window=config.window,
+        min_train_fraction=config.min_train_fraction,
+        gap=config.gap,
+        mode=config.mode,
+        trees_per_fold=config.trees_per_fold,
+        max_workers=config.max_workers,
+    )
+    total_seconds = (pd.Timestamp.now() - start).total_seconds()
+    
+    # Saving per-fold metrics and timings
+    results_path = storage.get_model_path("backtest_folds.csv")
+    folds.to_csv(results_path, index=False)
+    
+    for fold in folds.itertuples():
+        context.log.info(
+            f"Fold {fold.fold}: test {fold.test_start:%Y-%m-%d}..{fold.test_end:%Y-%m-%d}, "
+            f"accuracy {fold.accuracy:.4f}, fit {fold.fit_seconds:.2f}s on {fold.fitted_rows} rows"
+        )
+    
+    context.add_output_metadata({
+        "results_path": results_path,
+        "folds": len(folds),
+        "mode": config.mode,
+        "mean_accuracy": round(float(folds['accuracy'].mean()), 4),
+        "min_accuracy": round(float(folds['accuracy'].min()), 4),
+        "mean_f1_score": round(float(folds['f1_score'].mean()), 4),
+        "fit_seconds_total": round(float(folds['fit_seconds'].sum()), 2),
+        "wall_seconds": round(total_seconds, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    })
+    
+    return folds
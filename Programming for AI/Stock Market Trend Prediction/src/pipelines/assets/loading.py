@@ -1,33 +1,75 @@
 import pandas as pd
+import numpy as np
 import json
-from dagster import asset, AssetExecutionContext, AssetCheckResult, asset_check
+import os
+import glob
+import time
+from typing import List
+from dagster import asset, AssetExecutionContext, AssetCheckResult, asset_check, AssetIn, Config
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import joblib
+from ..cache import content_cached
+from ..profiling import profiled, stage
 from ..resources import DataStorageResource
-from .transformation import training_dataset
+from ..hashing import frame_hash
+from ...model import artifact as artifact_module, forest, incremental
+from ...model.artifact import ModelArtifact, write_artifact
+from ...model.incremental import (
+    STATE_FILE,
+    TrainingState,
+    confusion_counts,
+    grow_forest,
+    latest_dates,
+    metrics_from_counts,
+    population_stability,
+    rows_after,
+)
 
 
-@asset(
-    description="Trained RandomForest model",
-    group_name="loading",
-    deps=[training_dataset],
-)
-def trained_model(
-    context: AssetExecutionContext,
-    storage: DataStorageResource,
-    training_dataset: pd.DataFrame
-):
-    context.log.info("Training RandomForest model")
-    
-    # Preparing features and target
-    feature_cols = ['SMA_50', 'Price_Change', 'Distance_from_SMA', 'Momentum_5d', 'Volatility']
-    target_col = 'Next_Day_Target'
-    
-    X = training_dataset[feature_cols].copy()
-    y = training_dataset[target_col].copy()
+FEATURE_COLUMNS = ['SMA_50', 'Price_Change', 'Distance_from_SMA', 'Momentum_5d', 'Volatility']
+TARGET_COLUMN = 'Next_Day_Target'
+HYPERPARAMETERS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'random_state': 42,
+}
+MODEL_CONFIG_FILE = "model_config.json"
+
+
+def model_hyperparameters(storage: DataStorageResource) -> dict:
+    """HYPERPARAMETERS, overridden by the winner hyperparameter_search wrote to models/model_config.json."""
+    config_path = storage.get_model_path(MODEL_CONFIG_FILE)
+    if not os.path.exists(config_path):
+        return dict(HYPERPARAMETERS)
     
+    with open(config_path, 'r') as f:
+        return {**HYPERPARAMETERS, **json.load(f)['hyperparameters']}
+
+
+class ModelTrainingConfig(Config):
+    # "full" refits on every row, "incremental" extends the previous forest with trees fitted on new rows
+    mode: str = "full"
+    # Trees fitted per incremental update
+    trees_per_update: int = 10
+    # Forest size budget; beyond it the oldest trees are replaced
+    max_trees: int = 150
+    # New rows needed before trees are added (fewer are only scored)
+    min_new_rows: int = 200
+    # Full refit when prequential accuracy falls this far below the last full fit's
+    max_accuracy_drop: float = 0.05
+    # Full refit when the population stability index of a drift feature exceeds this
+    max_feature_psi: float = 0.25
+    # Features checked for drift; SMA_50 and Volatility are price levels that drift with the price itself
+    drift_features: List[str] = ['Price_Change', 'Momentum_5d']
+    # Also write a versioned, mmap-loadable artifact under models/artifacts/
+    write_artifact: bool = True
+    # Number of artifact versions kept on disk
+    keep_versions: int = 5
+
+
+def _fit_full(context: AssetExecutionContext, X: pd.DataFrame, y: pd.Series, hyperparameters: dict):
     # Splitting data
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
@@ -36,17 +78,14 @@ def trained_model(
     context.log.info(f"Train set: {len(X_train)} samples, Test set: {len(X_test)} samples")
     
     # Training the model
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        random_state=42,
-        n_jobs=-1
-    )
+    model = RandomForestClassifier(**hyperparameters, n_jobs=-1)
     
-    model.fit(X_train, y_train)
+    with stage("fit"):
+        model.fit(X_train, y_train)
     
     # Evaluation
-    y_pred = model.predict(X_test)
+    with stage("evaluate"):
+        y_pred = model.predict(X_test)
     
     metrics = {
         'accuracy': float(accuracy_score(y_test, y_pred)),
@@ -57,6 +96,145 @@ def trained_model(
         'test_samples': len(X_test),
     }
     
+    return model, metrics, X_test
+
+
+def _drift_reason(config: ModelTrainingConfig, state: TrainingState, prequential: dict, scored_rows: int, psi: dict):
+    reference_accuracy = state.get('reference')['metrics']['accuracy']
+    
+    if scored_rows >= config.min_new_rows and reference_accuracy - prequential['accuracy'] > config.max_accuracy_drop:
+        return f"prequential accuracy {prequential['accuracy']:.4f} vs {reference_accuracy:.4f} at last full fit"
+    for feature in config.drift_features:
+        if feature in psi and psi[feature] > config.max_feature_psi:
+            return f"{feature} PSI {psi[feature]:.3f} > {config.max_feature_psi}"
+    return None
+
+
+@asset(
+    description="Trained RandomForest model",
+    group_name="loading",
+    # Only the model columns (plus Ticker/Date for incremental watermarks) are read from the Parquet store
+    ins={"training_dataset": AssetIn(metadata={"columns": FEATURE_COLUMNS + [TARGET_COLUMN, 'Date', 'Ticker']})},
+)
+@profiled
+@content_cached(
+    upstream=["training_dataset"],
+    # The hyperparameter search winner is an input too
+    files=lambda storage: glob.glob(storage.get_model_path(MODEL_CONFIG_FILE)),
+    outputs=lambda storage: [storage.get_model_path("random_forest_model.pkl")],
+    code=[artifact_module, forest, incremental],
+)
+def trained_model(
+    context: AssetExecutionContext,
+    config: ModelTrainingConfig,
+    storage: DataStorageResource,
+    training_dataset: pd.DataFrame
+):
+    context.log.info(f"Training RandomForest model ({config.mode})")
+    start = time.perf_counter()
+    
+    # Preparing features and target
+    feature_cols = FEATURE_COLUMNS
+    target_col = TARGET_COLUMN
+    
+    # Narrowed here rather than in the stored frame; the forest casts to float32 anyway
+    X = training_dataset[feature_cols].astype(np.float32)
+    y = training_dataset[target_col].copy()
+    
+    hyperparameters = model_hyperparameters(storage)
+    model_path = storage.get_model_path("random_forest_model.pkl")
+    state = TrainingState(storage.get_model_path(STATE_FILE))
+    
+    # Deciding whether the previous forest can be extended
+    refit_reason = None
+    if config.mode == "full":
+        refit_reason = "full mode"
+    elif not state.exists or not os.path.exists(model_path):
+        refit_reason = "no previous model"
+    elif state.get('hyperparameters') != hyperparameters:
+        refit_reason = "hyperparameters changed"
+    
+    training_info = {}
+    if refit_reason is None:
+        model = joblib.load(model_path)
+        
+        # Prequential evaluation: score rows before the model is allowed to learn from them
+        unscored = rows_after(training_dataset, state.get('scored_watermarks'))
+        if unscored.any():
+            counts = confusion_counts(y[unscored], model.predict(X[unscored]))
+            state.data['prequential'] = {k: state.get('prequential')[k] + v for k, v in counts.items()}
+            state.data['scored_watermarks'] = {**state.get('scored_watermarks'), **latest_dates(training_dataset[unscored])}
+        
+        scored_rows = sum(state.get('prequential').values())
+        prequential = metrics_from_counts(state.get('prequential'))
+        
+        pending = rows_after(training_dataset, state.get('trained_watermarks'))
+        n_pending = int(pending.sum())
+        psi = {}
+        if n_pending >= config.min_new_rows:
+            psi = dict(zip(feature_cols, population_stability(state.get('reference')['profile'], X[pending])))
+        
+        refit_reason = _drift_reason(config, state, prequential, scored_rows, psi)
+        training_info = {
+            "rows_scored": int(unscored.sum()),
+            "prequential_rows": scored_rows,
+            "prequential_accuracy": round(prequential['accuracy'], 4),
+            **{f"psi_{feature}": round(value, 4) for feature, value in psi.items()},
+        }
+    
+    if refit_reason is not None:
+        context.log.info(f"Full refit: {refit_reason}")
+        model, metrics, X_check = _fit_full(context, X, y, hyperparameters)
+        state.reset(training_dataset, X.to_numpy(), hyperparameters, metrics, metrics['train_samples'])
+        training_info.update({
+            "refit_reason": refit_reason,
+            "rows_fitted": metrics['train_samples'],
+            "trees_added": len(model.estimators_),
+            "trees_replaced": 0,
+        })
+    else:
+        trees_added = trees_replaced = 0
+        new_y = y[pending]
+        
+        # Growing trees needs both classes among the new rows
+        if n_pending >= config.min_new_rows and new_y.nunique() > 1:
+            with stage("grow_forest"):
+                trees_added, trees_replaced = grow_forest(
+                    model, X[pending], new_y, config.trees_per_update, config.max_trees
+                )
+            state.data['trained_watermarks'] = {**state.get('trained_watermarks'), **latest_dates(training_dataset[pending])}
+            state.data['rows_fitted'] += n_pending
+            state.data['updates_since_refit'] += 1
+            context.log.info(f"Added {trees_added} trees on {n_pending} new rows ({trees_replaced} oldest replaced)")
+        else:
+            context.log.info(f"{n_pending} new rows, below min_new_rows={config.min_new_rows}; forest unchanged")
+        
+        state.data['rows_seen'] = len(training_dataset)
+        
+        # Prequential metrics once enough new rows were scored, the last full fit's until then
+        reference = state.get('reference')['metrics']
+        if scored_rows >= config.min_new_rows:
+            metrics = {**prequential, 'train_samples': state.get('rows_fitted'), 'test_samples': scored_rows}
+        else:
+            metrics = {**reference, 'train_samples': state.get('rows_fitted')}
+        
+        X_check = X[pending] if n_pending else X.tail(1000)
+        training_info.update({
+            "rows_fitted": n_pending if trees_added else 0,
+            "trees_added": trees_added,
+            "trees_replaced": trees_replaced,
+            "updates_since_refit": state.get('updates_since_refit'),
+        })
+    
+    fit_seconds = time.perf_counter() - start
+    metadata = {
+        "mode": config.mode,
+        "rows_seen": len(training_dataset),
+        "n_estimators": len(model.estimators_),
+        "fit_seconds": round(fit_seconds, 3),
+        **{k: v for k, v in training_info.items() if v is not None},
+    }
+    
     # Feature importance
     feature_importance = pd.DataFrame({
         'feature': feature_cols,
@@ -66,11 +244,44 @@ def trained_model(
     context.log.info(f"Model Performance - Accuracy: {metrics['accuracy']:.4f}, Precision: {metrics['precision']:.4f}")
     context.log.info(f"Feature Importance:\n{feature_importance.to_string(index=False)}")
     
-    # Saving the model
-    model_path = storage.get_model_path("random_forest_model.pkl")
-    joblib.dump(model, model_path)
+    # Saving the model, then the state that describes it
+    with stage("model_save"):
+        joblib.dump(model, model_path)
+    state.save()
     context.log.info(f"Model saved to {model_path}")
     
+    if config.write_artifact:
+        with stage("artifact_write"):
+            artifact_path = write_artifact(
+                storage.get_model_path("artifacts"),
+                model,
+                feature_cols=feature_cols,
+                hyperparameters=hyperparameters,
+                data_hash=frame_hash(training_dataset, feature_cols + [target_col]),
+                metrics=metrics,
+                keep_versions=config.keep_versions,
+            )
+            artifact = ModelArtifact.open(artifact_path)
+        
+        # The artifact must score like the sklearn model it came from
+        with stage("artifact_check"):
+            max_diff = float(np.abs(artifact.model.predict_proba(X_check) - model.predict_proba(X_check)).max())
+        if max_diff > 1e-9:
+            raise ValueError(f"Model artifact disagrees with predict_proba (max abs diff {max_diff})")
+        
+        context.log.info(f"Model artifact {artifact.version} saved to {artifact_path}")
+        # Downstream assets read the version from here rather than whichever version LATEST names by then
+        metadata.update({
+            "artifact_version": artifact.version,
+            "artifact_path": artifact_path,
+            "training_data_hash": artifact.manifest["training_data_hash"],
+            "artifact_nodes": artifact.manifest["n_nodes"],
+            "artifact_load_seconds": round(artifact.load_seconds, 4),
+            "artifact_max_abs_diff": max_diff,
+        })
+    
+    context.add_output_metadata(metadata)
+    
     return metrics
 
 
@@ -79,6 +290,11 @@ def trained_model(
     group_name="loading",
     deps=[trained_model],
 )
+@profiled
+@content_cached(
+    upstream=["trained_model"],
+    outputs=lambda storage: [storage.get_model_path("model_metrics.json")],
+)
 def model_metrics(
     context: AssetExecutionContext,
     storage: DataStorageResource,
@@ -98,6 +314,7 @@ def model_metrics(
 
 # Asset Check: Validating model performance
 @asset_check(asset=trained_model)
+@profiled
 def check_model_performance(trained_model: dict):
     checks_passed = True
     description = []
@@ -1,100 +1,204 @@
 import pandas as pd
-import json
 import os
 import glob
-from dagster import asset, AssetExecutionContext
+import time
+from typing import Optional
+from dagster import asset, AssetExecutionContext, AssetIn, AssetKey, Config
+from .. import mongo_load, pg_load
+from ..cache import content_cached, raw_files
+from ..profiling import profiled, stage
 from ..resources import PostgreSQLResource, MongoDBResource, DataStorageResource
-from .transformation import training_dataset
-from .loading import trained_model, model_metrics
+from ..pg_load import (
+    PROCESSED_DATA_COLUMNS,
+    RAW_PRICE_SCHEMA,
+    create_staging_table,
+    ensure_processed_data_table,
+    merge_processed_data,
+    merge_staging,
+    replace_processed_data,
+    to_processed_rows,
+)
+from ..mongo_load import RAW_COLLECTION, ensure_raw_indexes, write_ohlcv
+from .extraction import combined_raw_data, raw_stock_csv_data
+from .loading import FEATURE_COLUMNS, trained_model, model_metrics, model_hyperparameters
+from ...model.artifact import is_artifact, read_manifest
+
+
+# The storage sinks; they don't depend on each other, so the multiprocess executor runs them side by side
+STORAGE_ASSETS = ["postgres_training_data", "postgres_raw_data", "mongodb_model_results", "mongodb_raw_data"]
+
+
+class PostgresWriteConfig(Config):
+    # "merge" upserts into the existing tables, "replace" drops and reloads them
+    mode: str = "merge"
+
+
+class PostgresLoadConfig(PostgresWriteConfig):
+    # "flat" or "partitioned" (yearly trade_date partitions, float8, BRIN); None keeps the table's current layout
+    layout: Optional[str] = None
+    # "copy" streams through COPY ... FROM STDIN, "execute_values" uses batched INSERTs
+    method: str = "copy"
+    # Rows rendered per COPY chunk
+    chunk_rows: int = 50_000
+
+
+class MongoWriteConfig(Config):
+    # Documents per unordered bulk_write batch
+    batch_size: int = 5_000
+
+
+def _sink_metadata(context: AssetExecutionContext, rows: int, started: float) -> dict:
+    """
+    Throughput of this sink, and the overlap of this run's storage sinks that
+    have finished so far (this one included), from their recorded intervals.
+    The last sink to finish reports the overlap of the whole stage.
+    """
+    finished = time.time()
+    seconds = finished - started
+    intervals = [(started, finished)]
+
+    for name in STORAGE_ASSETS:
+        key = AssetKey(name)
+        if key == context.asset_key:
+            continue
+        event = context.instance.get_latest_materialization_event(key)
+        if event is None or event.run_id != context.run.run_id:
+            continue
+        metadata = event.asset_materialization.metadata
+        if "sink_started_at" in metadata:
+            intervals.append((metadata["sink_started_at"].value, metadata["sink_finished_at"].value))
+
+    wall = max(end for _, end in intervals) - min(start for start, _ in intervals)
+    serial = sum(end - start for start, end in intervals)
+    return {
+        "sink_seconds": round(seconds, 3),
+        "sink_rows": rows,
+        "sink_rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "sink_started_at": started,
+        "sink_finished_at": finished,
+        "storage_sinks_finished": len(intervals),
+        "storage_wall_seconds": round(wall, 3),
+        "storage_serial_seconds": round(serial, 3),
+        # Sum of the sink times over the stage's wall time: 1.0 is serial, N is N sinks fully overlapped
+        "storage_overlap": round(serial / wall, 2) if wall > 0 else None,
+    }
+
+
+def _artifact_version(context: AssetExecutionContext) -> Optional[str]:
+    """
+    The model artifact written by the trained_model materialization whose
+    value is stored, from its metadata. A cache hit skips the body and
+    records no artifact, so hits are passed over to the run that trained.
+    """
+    cursor = None
+    while True:
+        result = context.instance.fetch_materializations(AssetKey("trained_model"), limit=20, cursor=cursor)
+        for record in result.records:
+            metadata = record.asset_materialization.metadata
+            if "cache" in metadata and metadata["cache"].value == "hit":
+                continue
+            return metadata["artifact_version"].value if "artifact_version" in metadata else None
+        if not result.has_more:
+            return None
+        cursor = result.cursor
 
 
 @asset(
     description="Store processed training data in PostgreSQL",
     group_name="storage",
-    deps=[training_dataset],
+    # Only the processed_data columns are read from the Parquet store
+    ins={"training_dataset": AssetIn(metadata={"columns": list(PROCESSED_DATA_COLUMNS.values())})},
 )
+@profiled
+@content_cached(upstream=["training_dataset"], code=[pg_load], side_effects=True)
 def postgres_training_data(
     context: AssetExecutionContext,
+    config: PostgresLoadConfig,
     postgres: PostgreSQLResource,
     training_dataset: pd.DataFrame
 ):
     context.log.info("Storing training data in PostgreSQL")
+    started = time.time()
     
-    conn = postgres.get_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Drop and create table
-        cursor.execute("""
-            DROP TABLE IF EXISTS processed_data;
-            CREATE TABLE processed_data (
-                id SERIAL PRIMARY KEY,
-                close_price NUMERIC(15, 6),
-                high_price NUMERIC(15, 6),
-                low_price NUMERIC(15, 6),
-                open_price NUMERIC(15, 6),
-                volume BIGINT,
-                trade_date DATE,
-                ticker VARCHAR(10),
-                sma_50 NUMERIC(15, 6),
-                trend VARCHAR(20),
-                target INTEGER,
-                price_change NUMERIC(15, 8),
-                distance_from_sma NUMERIC(15, 8),
-                momentum_5d NUMERIC(15, 8),
-                volatility NUMERIC(15, 8),
-                next_day_target INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            
-            CREATE INDEX idx_ticker ON processed_data(ticker);
-            CREATE INDEX idx_date ON processed_data(trade_date);
-            CREATE INDEX idx_ticker_date ON processed_data(ticker, trade_date);
-        """)
-        
-        # Insert data
-        for _, row in training_dataset.iterrows():
-            cursor.execute("""
-                INSERT INTO processed_data (
-                    close_price, high_price, low_price, open_price, volume,
-                    trade_date, ticker, sma_50, trend, target,
-                    price_change, distance_from_sma, momentum_5d, volatility, next_day_target
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                float(row.get('Close', 0)),
-                float(row.get('High', 0)),
-                float(row.get('Low', 0)),
-                float(row.get('Open', 0)),
-                int(row.get('Volume', 0)),
-                row.get('Date'),
-                row.get('Ticker'),
-                float(row.get('SMA_50', 0)),
-                row.get('Trend'),
-                int(row.get('Target', 0)),
-                float(row.get('Price_Change', 0)),
-                float(row.get('Distance_from_SMA', 0)),
-                float(row.get('Momentum_5d', 0)),
-                float(row.get('Volatility', 0)),
-                int(row.get('Next_Day_Target', 0)) if pd.notna(row.get('Next_Day_Target')) else None
-            ))
-        
-        conn.commit()
-        
-        # Get row count
-        cursor.execute("SELECT COUNT(*) FROM processed_data")
-        row_count = cursor.fetchone()[0]
+    with postgres.connection() as conn:
+        cursor = conn.cursor()
         
-        context.log.info(f"Successfully stored {row_count} rows in PostgreSQL")
-        
-        return {"rows_inserted": row_count, "table": "processed_data"}
-        
-    except Exception as e:
-        conn.rollback()
-        context.log.error(f"Error storing in PostgreSQL: {e}")
-        raise
-    finally:
-        cursor.close()
-        conn.close()
+        try:
+            with stage("to_rows"):
+                rows = to_processed_rows(training_dataset)
+            start = time.perf_counter()
+            
+            duplicates_deleted = 0
+            if config.mode == "replace":
+                # Drop and create table
+                layout = config.layout or "flat"
+                method, inserted, attached = replace_processed_data(
+                    cursor, rows, layout, method=config.method, chunk_rows=config.chunk_rows,
+                )
+                updated = 0
+                loaded = inserted
+            else:
+                # Keeping the table and its indexes, upserting through a staging table
+                layout, duplicates_deleted = ensure_processed_data_table(cursor, config.layout)
+                if duplicates_deleted:
+                    context.log.warning(
+                        f"Deleted {duplicates_deleted} older duplicate rows from processed_data "
+                        f"to make (ticker, trade_date) unique"
+                    )
+                
+                method, inserted, updated, attached = merge_processed_data(
+                    cursor, rows, layout, method=config.method, chunk_rows=config.chunk_rows,
+                )
+                # Every row goes through the staging table
+                loaded = len(rows)
+            
+            elapsed = time.perf_counter() - start
+            
+            if inserted or updated:
+                # Invalidating cached reads of processed_data (query.py)
+                pg_load.stamp_data_version(cursor, "processed_data", context.run.run_id)
+            
+            conn.commit()
+            
+            # Get row count
+            cursor.execute("SELECT COUNT(*) FROM processed_data")
+            row_count = cursor.fetchone()[0]
+            
+            rows_per_sec = loaded / elapsed if elapsed > 0 else float(loaded)
+            context.log.info(
+                f"Successfully stored {row_count} rows in PostgreSQL via {method} "
+                f"({config.mode}: {inserted} inserted, {updated} updated, {rows_per_sec:,.0f} rows/s)"
+            )
+            if attached:
+                context.log.info(f"Attached {len(attached)} new partitions: {', '.join(attached)}")
+            context.add_output_metadata({
+                "mode": config.mode,
+                "layout": layout,
+                "partitions_attached": len(attached),
+                "load_method": method,
+                "load_seconds": round(elapsed, 3),
+                "rows_per_sec": round(rows_per_sec, 1),
+                "rows_inserted": inserted,
+                "rows_updated": updated,
+                "duplicate_rows_deleted": duplicates_deleted,
+                "connection_pool": postgres.pool_stats(),
+                **_sink_metadata(context, loaded, started),
+            })
+            
+            return {
+                "rows_inserted": inserted,
+                "rows_updated": updated,
+                "row_count": row_count,
+                "table": "processed_data",
+                "layout": layout,
+            }
+            
+        except Exception as e:
+            conn.rollback()
+            context.log.error(f"Error storing in PostgreSQL: {e}")
+            raise
+        finally:
+            cursor.close()
 
 
 @asset(
@@ -102,38 +206,45 @@ def postgres_training_data(
     group_name="storage",
     deps=[trained_model, model_metrics],
 )
+@profiled
+@content_cached(upstream=["trained_model", "model_metrics"], side_effects=True)
 def mongodb_model_results(
     context: AssetExecutionContext,
     mongodb: MongoDBResource,
+    storage: DataStorageResource,
     trained_model: dict,
     model_metrics: dict
 ):
     context.log.info("Storing model results in MongoDB")
+    started = time.time()
     
     try:
         collection = mongodb.get_collection("model_results")
         
+        # Manifest of the artifact the stored trained_model wrote, if it wrote one
+        version = _artifact_version(context)
+        artifact_path = storage.get_model_path(os.path.join("artifacts", version)) if version else None
+        manifest = read_manifest(artifact_path) if artifact_path and is_artifact(artifact_path) else None
+        if version and manifest is None:
+            context.log.warning(f"Model artifact {version} is no longer on disk; storing results without its manifest")
+        
         result_doc = {
             "model_type": "RandomForestClassifier",
             "training_date": pd.Timestamp.now().isoformat(),
             "metrics": model_metrics,
-            "configuration": {
-                "n_estimators": 100,
-                "max_depth": 10,
-                "random_state": 42
-            },
-            "features_used": [
-                "SMA_50",
-                "Price_Change",
-                "Distance_from_SMA",
-                "Momentum_5d",
-                "Volatility"
-            ]
+            "configuration": manifest["hyperparameters"] if manifest else model_hyperparameters(storage),
+            "features_used": FEATURE_COLUMNS
         }
         
+        if manifest is not None:
+            result_doc["artifact_version"] = manifest["version"]
+            result_doc["artifact_manifest"] = manifest
+        
         result = collection.insert_one(result_doc)
         
         context.log.info(f"Stored model results in MongoDB with ID: {result.inserted_id}")
+        # One document per model run
+        context.add_output_metadata(_sink_metadata(context, 1, started))
         
         return {
             "document_id": str(result.inserted_id),
@@ -148,46 +259,56 @@ def mongodb_model_results(
 @asset(
     description="Store raw stock data in MongoDB for flexible querying",
     group_name="storage",
-    deps=["combined_raw_data"],
+    deps=[combined_raw_data],
 )
+@profiled
+@content_cached(upstream=["combined_raw_data"], code=[mongo_load], side_effects=True)
 def mongodb_raw_data(
     context: AssetExecutionContext,
+    config: MongoWriteConfig,
     mongodb: MongoDBResource,
     combined_raw_data: pd.DataFrame
 ):
     context.log.info("Storing raw data in MongoDB")
+    started = time.time()
     
     try:
-        collection = mongodb.get_collection("raw_stock_data_aapl")
+        ingested_at = pd.Timestamp.now().isoformat()
+        collection = mongodb.get_collection(RAW_COLLECTION)
         
-        collection.delete_many({})
+        # Creating indexes before the writes so every upsert lookup uses them
+        ensure_raw_indexes(collection)
         
-        documents = []
-        for _, row in combined_raw_data.iterrows():
-            doc = {
-                "ticker": row.get('Ticker'),
-                "date": row.get('Date').isoformat() if pd.notna(row.get('Date')) else None,
-                "ohlcv": {
-                    "open": float(row.get('Open', 0)) if pd.notna(row.get('Open')) else None,
-                    "high": float(row.get('High', 0)) if pd.notna(row.get('High')) else None,
-                    "low": float(row.get('Low', 0)) if pd.notna(row.get('Low')) else None,
-                    "close": float(row.get('Close', 0)) if pd.notna(row.get('Close')) else None,
-                    "volume": int(row.get('Volume', 0)) if pd.notna(row.get('Volume')) else None
-                },
-                "ingested_at": pd.Timestamp.now().isoformat()
-            }
-            documents.append(doc)
-
-        result = collection.insert_many(documents)
+        # Written in bounded unordered batches, one ticker at a time
+        totals = {"upserted": 0, "modified": 0, "matched": 0}
+        for ticker, ticker_df in combined_raw_data.groupby('Ticker', sort=False, observed=True):
+            counts = write_ohlcv(collection, ticker_df, ingested_at, batch_size=config.batch_size)
+            for key, value in counts.items():
+                totals[key] += value
+            
+            context.log.info(
+                f"{ticker}: {counts['upserted']} upserted, {counts['modified']} modified"
+            )
         
-        collection.create_index([("ticker", 1), ("date", -1)])
-        collection.create_index("date")
+        if totals["upserted"] or totals["modified"]:
+            # Invalidating cached reads of the raw collection (query.py)
+            mongo_load.stamp_data_version(
+                mongodb.get_collection(mongo_load.DATA_VERSIONS_COLLECTION), "raw_stock_data", context.run.run_id
+            )
         
-        context.log.info(f"Stored {len(result.inserted_ids)} documents in MongoDB")
+        context.log.info(f"Stored {len(combined_raw_data)} documents in MongoDB")
+        context.add_output_metadata({
+            "documents_upserted": totals["upserted"],
+            "documents_modified": totals["modified"],
+            "batch_size": config.batch_size,
+            "connection_pool": mongodb.pool_stats(),
+            **_sink_metadata(context, len(combined_raw_data), started),
+        })
         
         return {
-            "documents_inserted": len(result.inserted_ids),
-            "collection": "raw_stock_data_aapl"
+            "documents_inserted": totals["upserted"],
+            "documents_modified": totals["modified"],
+            "collection": RAW_COLLECTION
         }
         
     except Exception as e:
@@ -198,14 +319,19 @@ def mongodb_raw_data(
 @asset(
     description="Bulk load raw stock data CSVs into separate PostgreSQL tables",
     group_name="storage",
-    deps=["extract_stock_data"],  # Depends on the extraction asset
+    # Bulk loads the raw CSV files raw_stock_csv_data reads
+    deps=[raw_stock_csv_data],
 )
+@profiled
+@content_cached(files=raw_files("stock_data_*.csv"), code=[pg_load], side_effects=True)
 def postgres_raw_data(
     context: AssetExecutionContext,
+    config: PostgresWriteConfig,
     postgres: PostgreSQLResource,
     storage: DataStorageResource
 ):
     context.log.info("Starting bulk load of raw CSVs into PostgreSQL")
+    started = time.time()
     
     raw_dir = storage.raw_dir
     csv_files = glob.glob(os.path.join(raw_dir, "stock_data_*.csv"))
@@ -214,60 +340,70 @@ def postgres_raw_data(
         context.log.warning(f"No stock_data_*.csv files found in {raw_dir}")
         return {"tables_created": 0}
         
-    conn = postgres.get_connection()
-    cursor = conn.cursor()
-    
-    tables_created = []
-    
-    try:
-        for csv_file in csv_files:
-            filename = os.path.basename(csv_file)
-            table_name = os.path.splitext(filename)[0]
-            table_name = table_name.replace("-", "_").replace(" ", "_").lower()
-            
-            context.log.info(f"Processing {filename} -> Table {table_name}")
-            
-            cursor.execute(f"""
-                DROP TABLE IF EXISTS {table_name};
-                CREATE TABLE {table_name} (
-                    trade_date DATE PRIMARY KEY,
-                    close_price NUMERIC(15, 6),
-                    high_price NUMERIC(15, 6),
-                    low_price NUMERIC(15, 6),
-                    open_price NUMERIC(15, 6),
-                    volume BIGINT
-                );
-            """)
-            
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                # Skipping first 3 lines
-                for _ in range(3):
-                    next(f)
+    with postgres.connection() as conn:
+        cursor = conn.cursor()
+        
+        tables_created = []
+        
+        try:
+            for csv_file in csv_files:
+                filename = os.path.basename(csv_file)
+                table_name = os.path.splitext(filename)[0]
+                table_name = table_name.replace("-", "_").replace(" ", "_").lower()
                 
-                # Copy remaining data
-                # Using columns list to match CSV order: Date, Close, High, Low, Open, Volume
-                cursor.copy_expert(
-                    f"COPY {table_name} (trade_date, close_price, high_price, low_price, open_price, volume) FROM STDIN WITH CSV",
-                    f
-                )
+                context.log.info(f"Processing {filename} -> Table {table_name}")
+                
+                columns = ["trade_date", "close_price", "high_price", "low_price", "open_price", "volume"]
+                
+                if config.mode == "replace":
+                    cursor.execute(f"""
+                        DROP TABLE IF EXISTS {table_name};
+                        CREATE TABLE {table_name} ({RAW_PRICE_SCHEMA});
+                    """)
+                    target = table_name
+                else:
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({RAW_PRICE_SCHEMA});")
+                    target = create_staging_table(cursor, table_name, columns)
+                
+                with open(csv_file, 'r', encoding='utf-8') as f:
+                    # Skipping first 3 lines
+                    for _ in range(3):
+                        next(f)
+                    
+                    # Copy remaining data
+                    # Using columns list to match CSV order: Date, Close, High, Low, Open, Volume
+                    cursor.copy_expert(
+                        f"COPY {target} ({', '.join(columns)}) FROM STDIN WITH CSV",
+                        f
+                    )
+                
+                if config.mode != "replace":
+                    inserted, updated = merge_staging(cursor, table_name, target, columns, ["trade_date"])
+                    cursor.execute(f"DROP TABLE {target}")
+                    context.log.info(f"Merged {filename}: {inserted} inserted, {updated} updated")
+                
+                # Verify count
+                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                count = cursor.fetchone()[0]
+                tables_created.append({"table": table_name, "rows": count})
+                context.log.info(f"Loaded {count} rows into {table_name}")
+                
+            conn.commit()
             
-            # Verify count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = cursor.fetchone()[0]
-            tables_created.append({"table": table_name, "rows": count})
-            context.log.info(f"Loaded {count} rows into {table_name}")
+            context.add_output_metadata({
+                "mode": config.mode,
+                "connection_pool": postgres.pool_stats(),
+                **_sink_metadata(context, sum(table["rows"] for table in tables_created), started),
+            })
             
-        conn.commit()
-        
-        return {
-            "tables_created": len(tables_created),
-            "details": tables_created
-        }
-        
-    except Exception as e:
-        conn.rollback()
-        context.log.error(f"Error loading Postgres raw data: {e}")
-        raise
-    finally:
-        cursor.close()
-        conn.close()
+            return {
+                "tables_created": len(tables_created),
+                "details": tables_created
+            }
+            
+        except Exception as e:
+            conn.rollback()
+            context.log.error(f"Error loading Postgres raw data: {e}")
+            raise
+        finally:
+            cursor.close()
@@ -0,0 +1,206 @@
+import os
+import time
+from contextlib import ExitStack
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dagster import asset, AssetExecutionContext, Config
+from .. import chunked, features, mongo_load, pg_load, readers, schemas
+from ..cache import content_cached, raw_files
+from ..profiling import profiled, stage
+from ..resources import PostgreSQLResource, MongoDBResource, DataStorageResource
+from ..chunked import RollingFeatureState, clean_chunk, read_chunks
+from ..io_manager import to_storage_types
+from ..mongo_load import RAW_COLLECTION, ensure_raw_indexes, write_ohlcv
+from ..pg_load import ensure_processed_data_table, merge_processed_data, to_processed_rows
+from ..schemas import ENGINEERED_FEATURES_SCHEMA, apply_schema, peak_rss_mb
+
+
+class ChunkedPipelineConfig(Config):
+    # Most rows of one ticker held in memory per chunk
+    chunk_rows: int = 50_000
+    # Restricting the run to these tickers (all tickers when empty)
+    tickers: List[str] = []
+    # Upserting engineered rows into processed_data
+    write_postgres: bool = True
+    # Upserting raw rows into the raw_stock_data MongoDB collection
+    write_mongo: bool = True
+    # Writing data/processed/training_data.parquet one row group per chunk
+    write_parquet: bool = True
+    # processed_data layout for a new table, "flat" or "partitioned" (None keeps the existing one)
+    layout: Optional[str] = None
+    # "copy" streams through COPY ... FROM STDIN, "execute_values" uses batched INSERTs
+    method: str = "copy"
+    # Committing processed_data every this many chunks; a failure rolls back only the chunks since the last commit
+    commit_every: int = 1
+    # Documents per unordered bulk_write batch
+    batch_size: int = 5_000
+    # Parquet compression codec
+    compression: str = "zstd"
+
+
+class _ParquetChunkWriter:
+    """Appends frames to a Parquet file as row groups; the file is moved into place on close."""
+
+    def __init__(self, path: str, compression: str):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.compression = compression
+        self.writer = None
+
+    def write(self, df: pd.DataFrame):
+        table = pa.Table.from_pandas(to_storage_types(df), preserve_index=False)
+        if self.writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.writer = pq.ParquetWriter(self.tmp_path, table.schema, compression=self.compression)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        # Leaving the previous file in place
+        if self.writer is not None:
+            self.writer.close()
+            os.remove(self.tmp_path)
+
+
+@asset(
+    description="Streams the raw files through cleaning, feature engineering and the database writers in bounded chunks",
+    group_name="streaming",
+)
+@profiled
+@content_cached(
+    files=raw_files("stock_data_*"),
+    code=[chunked, features, readers, schemas, pg_load, mongo_load],
+    side_effects=True,
+)
+def chunked_etl(
+    context: AssetExecutionContext,
+    config: ChunkedPipelineConfig,
+    postgres: PostgreSQLResource,
+    mongodb: MongoDBResource,
+    storage: DataStorageResource
+):
+    context.log.info(f"Streaming {storage.raw_dir} in chunks of up to {config.chunk_rows} rows")
+
+    start = time.perf_counter()
+    state = RollingFeatureState()
+    stats = {"chunks": 0, "raw_rows": 0, "engineered_rows": 0, "largest_chunk": 0, "commits": 0}
+    totals = {"inserted": 0, "updated": 0, "upserted": 0, "modified": 0}
+    ingested_at = pd.Timestamp.now().isoformat()
+
+    parquet = _ParquetChunkWriter(storage.get_processed_path("training_data.parquet"), config.compression)
+    # Merged rows not committed yet, and the chunks they came from
+    pending = {"chunks": 0, "changed": 0}
+
+    with ExitStack() as stack:
+        # Only borrowing a connection when there is something to write
+        conn = cursor = None
+        if config.write_postgres:
+            conn = stack.enter_context(postgres.connection())
+            cursor = conn.cursor()
+            stack.callback(cursor.close)
+
+        def commit_postgres():
+            # The stamp commits with the rows, so cached reads (query.py) never outlive a commit
+            if pending["changed"]:
+                pg_load.stamp_data_version(cursor, "processed_data", context.run.run_id)
+            conn.commit()
+            stats["commits"] += 1
+            pending.update(chunks=0, changed=0)
+
+        try:
+            if config.write_postgres:
+                layout, duplicates_deleted = ensure_processed_data_table(cursor, config.layout)
+                if duplicates_deleted:
+                    context.log.warning(
+                        f"Deleted {duplicates_deleted} older duplicate rows from processed_data "
+                        f"to make (ticker, trade_date) unique"
+                    )
+                conn.commit()
+            if config.write_mongo:
+                collection = mongodb.get_collection(RAW_COLLECTION)
+                ensure_raw_indexes(collection)
+
+            for raw in read_chunks(storage.raw_dir, config.chunk_rows, config.tickers):
+                stats["chunks"] += 1
+                stats["raw_rows"] += len(raw)
+                stats["largest_chunk"] = max(stats["largest_chunk"], len(raw))
+
+                # Raw rows go to MongoDB as extracted, like mongodb_raw_data
+                if config.write_mongo:
+                    counts = write_ohlcv(collection, raw, ingested_at, batch_size=config.batch_size)
+                    totals["upserted"] += counts["upserted"]
+                    totals["modified"] += counts["modified"]
+
+                with stage("clean"):
+                    cleaned = clean_chunk(raw)
+                if not len(cleaned):
+                    continue
+
+                with stage("engineer"):
+                    engineered = apply_schema(state.push(cleaned), ENGINEERED_FEATURES_SCHEMA)
+                if not len(engineered):
+                    continue
+                stats["engineered_rows"] += len(engineered)
+
+                if config.write_postgres:
+                    _, inserted, updated, _ = merge_processed_data(
+                        cursor, to_processed_rows(engineered), layout,
+                        method=config.method, chunk_rows=config.chunk_rows,
+                    )
+                    totals["inserted"] += inserted
+                    totals["updated"] += updated
+                    pending["chunks"] += 1
+                    pending["changed"] += inserted + updated
+                    if pending["chunks"] >= config.commit_every:
+                        commit_postgres()
+
+                if config.write_parquet:
+                    with stage("parquet_write"):
+                        parquet.write(engineered)
+
+            if not stats["chunks"]:
+                raise ValueError(f"No stock_data_* files found in {storage.raw_dir}")
+
+            if config.write_postgres and pending["chunks"]:
+                commit_postgres()
+            # Invalidating cached reads (query.py) of whatever changed
+            if totals["upserted"] or totals["modified"]:
+                mongo_load.stamp_data_version(
+                    mongodb.get_collection(mongo_load.DATA_VERSIONS_COLLECTION), "raw_stock_data", context.run.run_id
+                )
+
+            parquet.close()
+
+        except Exception as e:
+            if conn is not None:
+                # Earlier commits stay; merging is idempotent, so a rerun picks up from them
+                conn.rollback()
+            parquet.abort()
+            context.log.error(f"Error in chunked ETL after {stats['commits']} Postgres commits: {e}")
+            raise
+
+    elapsed = time.perf_counter() - start
+    context.log.info(
+        f"Streamed {stats['raw_rows']} raw rows in {stats['chunks']} chunks into "
+        f"{stats['engineered_rows']} engineered rows in {elapsed:.1f}s"
+    )
+
+    summary = {
+        **stats,
+        "tickers": len(state.rows_seen),
+        "rows_inserted": totals["inserted"],
+        "rows_updated": totals["updated"],
+        "documents_upserted": totals["upserted"],
+        "documents_modified": totals["modified"],
+        "seconds": round(elapsed, 3),
+    }
+    context.add_output_metadata({**summary, "chunk_rows": config.chunk_rows, "peak_rss_mb": round(peak_rss_mb(), 1)})
+
+    return summary
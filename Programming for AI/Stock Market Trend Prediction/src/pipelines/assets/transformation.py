@@ -1,7 +1,21 @@
+import os
+import re
+import shutil
+
 import pandas as pd
 import numpy as np
-from dagster import asset, AssetExecutionContext, AssetCheckResult, asset_check
+from dagster import (
+    asset, graph_asset, op, AssetExecutionContext, AssetCheckResult, asset_check, Config,
+    DynamicOut, DynamicOutput, OpExecutionContext,
+)
+from .. import features, rolling, schemas
+from ..cache import AssetCacheResource, content_cached
+from ..profiling import profiled
 from ..resources import DataStorageResource
+from ..features import engineer_features
+from ..io_manager import to_storage_types
+from ..rolling import FeatureEngine
+from ..schemas import ENGINEERED_FEATURES_SCHEMA, RAW_STOCK_SCHEMA, apply_schema, is_sorted_by, memory_metadata
 from .extraction import combined_raw_data
 
 
@@ -10,13 +24,15 @@ from .extraction import combined_raw_data
     group_name="transformation",
     deps=[combined_raw_data],
 )
+@profiled
+@content_cached(upstream=["combined_raw_data"], code=[schemas])
 def cleaned_stock_data(
     context: AssetExecutionContext,
     combined_raw_data: pd.DataFrame
 ):
     context.log.info("Cleaning stock data")
     
-    df = combined_raw_data.copy()
+    df = combined_raw_data
     
     # Ensuring required columns exist
     required = ['Date', 'Close', 'Ticker']
@@ -31,74 +47,165 @@ def cleaned_stock_data(
     if dropped > 0:
         context.log.warning(f"Dropped {dropped} rows with null Date/Close values")
     
-    # Sorting by ticker and date
-    df = df.sort_values(['Ticker', 'Date']).reset_index(drop=True)
+    # combined_raw_data is already sorted by ticker and date; only re-sorting if it is not
+    if not is_sorted_by(df, 'Ticker', 'Date'):
+        df = df.sort_values(['Ticker', 'Date'])
+    df = df.reset_index(drop=True)
+    
+    df = apply_schema(df, RAW_STOCK_SCHEMA)
     
     context.log.info(f"Cleaned data: {len(df)} rows from {len(df['Ticker'].unique())} tickers")
+    context.add_output_metadata(memory_metadata(df))
     
     return df
 
 
-@asset(
+class TickerFanOutConfig(Config):
+    # Dynamic steps the tickers are split into, balanced by rows (one step per ticker when 0)
+    steps: int = 8
+
+
+def _mapping_key(number: int, tickers: list) -> str:
+    # Mapping keys allow only letters, digits and underscores
+    name = re.sub(r'[^A-Za-z0-9_]', '_', str(tickers[0])) if len(tickers) == 1 else "batch"
+    return f"{name}_{number:04d}"
+
+
+def ticker_batches(df: pd.DataFrame, steps: int) -> list:
+    """Split a frame grouped by ticker into contiguous ticker ranges of roughly equal rows."""
+    counts = df['Ticker'].value_counts(sort=False)
+    counts = counts[counts > 0].reindex(pd.unique(df['Ticker']))
+
+    if steps <= 0 or steps >= len(counts):
+        bounds = np.arange(len(counts) + 1)
+    else:
+        # A ticker starts a new batch once the rows before it pass the next multiple of total / steps
+        cumulative = counts.to_numpy().cumsum()
+        starts = np.searchsorted(cumulative, np.arange(1, steps) * cumulative[-1] / steps, side='right')
+        bounds = np.unique(np.concatenate([[0], starts, [len(counts)]]))
+
+    row_bounds = np.concatenate([[0], counts.to_numpy().cumsum()])
+    tickers = counts.index.tolist()
+    return [
+        (tickers[bounds[i]:bounds[i + 1]], df.iloc[row_bounds[bounds[i]]:row_bounds[bounds[i + 1]]])
+        for i in range(len(bounds) - 1)
+    ]
+
+
+@op(out=DynamicOut(pd.DataFrame), description="Splits the cleaned data into per-ticker (or ticker batch) outputs")
+def split_by_ticker(
+    context: OpExecutionContext,
+    config: TickerFanOutConfig,
+    asset_cache: AssetCacheResource,
+    cleaned_stock_data: pd.DataFrame
+):
+    # On a cache hit nothing is fanned out and combine_ticker_features returns the stored value
+    asset_key = engineered_features.key
+    key = _combine_batches.cache_key(context, asset_cache, {}, op_config={})
+    if asset_cache.stored(asset_key.to_python_identifier(), asset_key.path, key):
+        context.log.info(f"engineered_features is cached ({key[:12]}); skipping the ticker steps")
+        return
+
+    # Batches must be contiguous ticker ranges so they can be concatenated back in order
+    df = cleaned_stock_data
+    if not is_sorted_by(df, 'Ticker', 'Date'):
+        df = df.sort_values(['Ticker', 'Date']).reset_index(drop=True)
+
+    batches = ticker_batches(df, config.steps)
+    context.log.info(f"Fanning {len(df)} rows of {df['Ticker'].nunique()} tickers out to {len(batches)} steps")
+
+    for number, (tickers, batch) in enumerate(batches):
+        yield DynamicOutput(
+            batch.reset_index(drop=True),
+            mapping_key=_mapping_key(number, tickers),
+            metadata={"tickers": len(tickers), "rows": len(batch)},
+        )
+
+
+@op(description="Engineers the features of one ticker batch")
+@profiled
+def engineer_ticker_features(context: OpExecutionContext, batch: pd.DataFrame) -> pd.DataFrame:
+    return apply_schema(engineer_features(batch), ENGINEERED_FEATURES_SCHEMA)
+
+
+@content_cached(upstream=["cleaned_stock_data"], code=[features, schemas])
+def _combine_batches(context: OpExecutionContext, batches: list) -> pd.DataFrame:
+    if not batches:
+        raise ValueError("No ticker batches to combine; cleaned_stock_data is empty")
+
+    # Steps finish in any order; tickers go back into the sorted order of cleaned_stock_data
+    ordered = sorted((b for b in batches if len(b)), key=lambda b: b['Ticker'].iloc[0])
+    return apply_schema(pd.concat(ordered or batches[:1], ignore_index=True), ENGINEERED_FEATURES_SCHEMA)
+
+
+@op(description="Concatenates the engineered ticker batches in ticker order")
+@profiled
+def combine_ticker_features(
+    context: OpExecutionContext,
+    storage: DataStorageResource,
+    asset_cache: AssetCacheResource,
+    batches: list
+) -> pd.DataFrame:
+    full_df = _combine_batches(context, batches=batches, asset_cache=asset_cache)
+
+    # The per-step intermediates of this run are not needed once combined
+    shutil.rmtree(storage.get_intermediate_path(context.run_id), ignore_errors=True)
+
+    context.log.info(
+        f"Total engineered features: {len(full_df)} rows from {full_df['Ticker'].nunique()} tickers "
+        f"in {len(batches)} steps"
+    )
+    context.add_output_metadata({**memory_metadata(full_df), "fan_out_steps": len(batches)})
+
+    return full_df
+
+
+@graph_asset(
     description="Engineered features including SMA, momentum, and volatility",
     group_name="transformation",
+)
+def engineered_features(cleaned_stock_data: pd.DataFrame):
+    return combine_ticker_features(split_by_ticker(cleaned_stock_data).map(engineer_ticker_features).collect())
+
+
+@asset(
+    description="Checkpoint of the per-ticker rolling feature state, for O(1) incremental updates",
+    group_name="transformation",
     deps=[cleaned_stock_data],
 )
-def engineered_features(
+@profiled
+@content_cached(
+    upstream=["cleaned_stock_data"],
+    code=[features, rolling],
+    outputs=lambda storage: [storage.get_processed_path("feature_state.json")],
+)
+def feature_state(
     context: AssetExecutionContext,
+    storage: DataStorageResource,
     cleaned_stock_data: pd.DataFrame
 ):
-    context.log.info("Engineering features")
+    engine = FeatureEngine()
+    engine.seed(cleaned_stock_data)
     
-    features_list = []
+    path = storage.get_processed_path("feature_state.json")
+    engine.save(path)
     
-    for ticker in cleaned_stock_data['Ticker'].unique():
-        ticker_df = cleaned_stock_data[cleaned_stock_data['Ticker'] == ticker].copy()
-        ticker_df = ticker_df.sort_values('Date')
-        
-        # Ensuring Close is numeric
-        ticker_df['Close'] = pd.to_numeric(ticker_df['Close'], errors='coerce')
-        ticker_df = ticker_df.dropna(subset=['Close'])
-        
-        # SMA 50
-        ticker_df['SMA_50'] = ticker_df['Close'].rolling(window=50).mean()
-        
-        # Trend classification
-        def classify_trend(row):
-            if pd.isna(row['SMA_50']):
-                return "Neutral"
-            return "Bullish" if row['Close'] > row['SMA_50'] else "Bearish"
-        
-        ticker_df['Trend'] = ticker_df.apply(classify_trend, axis=1)
-        
-        # Filtering Neutral for training
-        ticker_df = ticker_df[ticker_df['Trend'] != 'Neutral'].copy()
-        ticker_df['Target'] = (ticker_df['Trend'] == 'Bullish').astype(int)
-        
-        # Price Change
-        ticker_df['Price_Change'] = ticker_df['Close'].pct_change()
-        
-        # Distance from SMA
-        ticker_df['Distance_from_SMA'] = ((ticker_df['Close'] - ticker_df['SMA_50']) / ticker_df['SMA_50']) * 100
-        
-        # Momentum 5d
-        ticker_df['Momentum_5d'] = ticker_df['Close'].pct_change(periods=5)
-        
-        # Volatility (5d std)
-        ticker_df['Volatility'] = ticker_df['Close'].rolling(window=5).std()
-        
-        # Next Day Target
-        ticker_df['Next_Day_Target'] = ticker_df['Target'].shift(-1)
-        
-        features_list.append(ticker_df)
-        context.log.info(f"Engineered features for {ticker}: {len(ticker_df)} rows")
+    last_dates = {ticker: str(state.last_date.date()) for ticker, state in engine.tickers.items()}
+    context.log.info(f"Saved rolling feature state of {len(engine.tickers)} tickers to {path}")
+    context.add_output_metadata({
+        "tickers": len(engine.tickers),
+        "checkpoint_bytes": os.path.getsize(path),
+        "latest_date": max(last_dates.values(), default=""),
+    })
     
-    full_df = pd.concat(features_list, ignore_index=True)
-    full_df = full_df.dropna()  # Drop NaN from rolling/shift
-    
-    context.log.info(f"Total engineered features: {len(full_df)} rows")
-    
-    return full_df
+    return {"path": path, "last_dates": last_dates}
+
+
+class TrainingDatasetConfig(Config):
+    # Parquet compression codec for training_data.parquet
+    compression: str = "zstd"
+    # Also write the legacy training_data.csv export
+    write_csv: bool = False
 
 
 @asset(
@@ -106,25 +213,36 @@ def engineered_features(
     group_name="transformation",
     deps=[engineered_features],
 )
+@profiled
+@content_cached(
+    upstream=["engineered_features"],
+    outputs=lambda storage: [storage.get_processed_path("training_data.parquet")],
+)
 def training_dataset(
     context: AssetExecutionContext,
+    config: TrainingDatasetConfig,
     storage: DataStorageResource,
     engineered_features: pd.DataFrame
 ):
 
     context.log.info("Preparing training dataset")
     
-    # Save to processed folder
-    output_path = storage.get_processed_path("training_data.csv")
-    engineered_features.to_csv(output_path, index=False)
+    # Save to processed folder as typed, compressed Parquet
+    output_path = storage.get_processed_path("training_data.parquet")
+    to_storage_types(engineered_features).to_parquet(output_path, index=False, compression=config.compression)
+    
+    if config.write_csv:
+        engineered_features.to_csv(storage.get_processed_path("training_data.csv"), index=False)
     
     context.log.info(f"Saved training dataset: {output_path} ({len(engineered_features)} rows)")
+    context.add_output_metadata(memory_metadata(engineered_features))
     
     return engineered_features
 
 
 # Asset Check: Validate engineered features
 @asset_check(asset=engineered_features)
+@profiled
 def check_feature_quality(engineered_features: pd.DataFrame):
     
     checks_passed = True
@@ -0,0 +1,102 @@
+import pandas as pd
+import json
+import os
+from typing import List
+from dagster import asset, AssetExecutionContext, AssetIn, Config
+from ..profiling import profiled
+from ..resources import DataStorageResource
+from ..hashing import frame_hash
+from ...model.tuning import TrialCache, run_search
+from .loading import FEATURE_COLUMNS, TARGET_COLUMN, HYPERPARAMETERS, MODEL_CONFIG_FILE
+
+
+class HyperparameterSearchConfig(Config):
+    # "halving" (successive halving over walk-forward folds) or "grid"
+    strategy: str = "halving"
+    # Search space; depths stay bounded because scoring walks every tree to its deepest leaf
+    n_estimators: List[int] = [50, 100, 200]
+    max_depth: List[int] = [6, 8, 10, 12]
+    min_samples_leaf: List[int] = [1, 5, 20]
+    # Metric the candidates are ranked on
+    metric: str = "accuracy"
+    # Walk-forward folds per ticker, and the halving factor
+    n_folds: int = 3
+    eta: int = 3
+    # Trials fitted concurrently
+    max_workers: int = 4
+    # Writing the winner to models/model_config.json for trained_model
+    write_config: bool = True
+
+
+@asset(
+    description="Hyperparameter search for the RandomForest over walk-forward folds",
+    group_name="tuning",
+    # Only the model columns and the split keys are read from the Parquet store
+    ins={"training_dataset": AssetIn(metadata={"columns": FEATURE_COLUMNS + [TARGET_COLUMN, 'Date', 'Ticker']})},
+)
+@profiled
+def hyperparameter_search(
+    context: AssetExecutionContext,
+    config: HyperparameterSearchConfig,
+    storage: DataStorageResource,
+    training_dataset: pd.DataFrame
+):
+    space = {
+        'n_estimators': config.n_estimators,
+        'max_depth': config.max_depth,
+        'min_samples_leaf': config.min_samples_leaf,
+    }
+    context.log.info(f"Running {config.strategy} search over {space}")
+    
+    start = pd.Timestamp.now()
+    data_hash = frame_hash(training_dataset, FEATURE_COLUMNS + [TARGET_COLUMN, 'Date', 'Ticker'])
+    os.makedirs(storage.cache_dir, exist_ok=True)
+    cache = TrialCache(storage.get_cache_path("tuning_trials.sqlite"))
+    
+    leaderboard, stats = run_search(
+        training_dataset,
+        FEATURE_COLUMNS,
+        TARGET_COLUMN,
+        space,
+        cache,
+        data_hash,
+        base_params={'random_state': HYPERPARAMETERS['random_state']},
+        strategy=config.strategy,
+        metric=config.metric,
+        n_folds=config.n_folds,
+        eta=config.eta,
+        max_workers=config.max_workers,
+    )
+    total_seconds = (pd.Timestamp.now() - start).total_seconds()
+    
+    best = leaderboard.iloc[0]
+    best_params = {name: int(best[name]) for name in space}
+    context.log.info(f"Best {config.metric} {best[config.metric]:.4f} with {best_params}")
+    context.log.info(f"Trials: {stats['trials']} ({stats['cached']} cached, {stats['fitted']} fitted)")
+    
+    if config.write_config:
+        config_path = storage.get_model_path(MODEL_CONFIG_FILE)
+        with open(config_path, 'w') as f:
+            json.dump({
+                "hyperparameters": best_params,
+                "metric": config.metric,
+                "score": float(best[config.metric]),
+                "folds": int(best['folds']),
+                "strategy": config.strategy,
+                "training_data_hash": data_hash,
+                "searched_at": start.isoformat(),
+            }, f, indent=2)
+        context.log.info(f"Model config saved to {config_path}")
+    
+    context.add_output_metadata({
+        "best_params": best_params,
+        f"best_{config.metric}": round(float(best[config.metric]), 4),
+        "candidates": len(leaderboard),
+        "trials": stats['trials'],
+        "trials_cached": stats['cached'],
+        "trials_fitted": stats['fitted'],
+        "cache_hit_rate": round(stats['cached'] / max(stats['trials'], 1), 3),
+        "wall_seconds": round(total_seconds, 2),
+    })
+    
+    return leaderboard
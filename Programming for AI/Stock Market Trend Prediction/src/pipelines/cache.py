@@ -0,0 +1,291 @@
+"""
+Content-hash cache for asset materializations.
+
+An asset wrapped with ``@content_cached`` gets a cache key made of:
+
+- the asset's own source code and that of any helper modules it names
+- its run config
+- the config of the resources it uses (hosts, database names, ...)
+- content hashes (SHA1) of the input files it names (extraction). A file is
+  only re-read when its fingerprint (size, mtime, ctime, inode) differs from
+  the one its hash was recorded with; the ctime changes on every write and
+  cannot be set back, so an in-place edit that keeps the size and mtime
+  (``cp -p``, ``rsync -t``, an archive restore) is still hashed again
+- the cache keys recorded by its upstream assets, or a content hash of the
+  upstream value when that asset is not cached
+
+The cache keeps no copy of the outputs. It records, per asset, the key of the
+last materialization and which ``ParquetIOManager`` output (under
+``data/intermediate/``) was there before it; once the IO manager has replaced
+that output, the stored value belongs to the key. On a hit, the asset body is
+skipped and that value is returned, so work such as parsing and training is
+not repeated. Keys and per-run hit counts live in a SQLite index under
+``data/cache/assets/``, so they are shared by the step processes of a run.
+Each materialization reports ``cache`` (hit/miss/bypass) and the run's hit
+rate so far, which is also set as the run tag ``asset_cache/hit_rate``.
+
+Assets declared with ``side_effects=True`` (database writers) always run
+unless ``AssetCacheResource.cache_side_effects`` is set: a hit would skip the
+write even if the database has been changed or emptied since.
+"""
+
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+
+import pandas as pd
+from dagster import ConfigurableResource, ResourceDependency
+
+from .hashing import frame_hash
+from .io_manager import MANIFEST_FILE, read_stored_value
+from .resources import DataStorageResource
+
+
+CACHE_PARAM = "asset_cache"
+INDEX_FILE = "index.sqlite"
+
+
+def file_fingerprint(path: str) -> str:
+    """Size, mtime, ctime and inode of ``path``: any write to the file changes it."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ctime_ns}:{stat.st_ino}"
+
+
+def file_checksum(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_identity(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def value_hash(value) -> str:
+    """Content hash of an upstream value that has no recorded cache key."""
+    if isinstance(value, pd.DataFrame):
+        dtypes = ",".join(f"{col}:{dtype}" for col, dtype in value.dtypes.items())
+        return hashlib.sha1((dtypes + frame_hash(value)).encode('utf-8')).hexdigest()
+    return hashlib.sha1(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def _resource_config(resource) -> dict:
+    try:
+        return resource.model_dump(mode="json", exclude={"storage"})
+    except Exception:
+        return {"type": type(resource).__name__}
+
+
+class AssetCacheResource(ConfigurableResource):
+    """Index of the keys behind the stored outputs of ``@content_cached`` assets."""
+
+    storage: ResourceDependency[DataStorageResource]
+    # False recomputes every asset, but still records fresh keys
+    enabled: bool = True
+    # Also skip assets declared with side_effects=True (database writers) on a hit
+    cache_side_effects: bool = False
+
+    @property
+    def root(self) -> str:
+        return self.storage.get_cache_path("assets")
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.root, INDEX_FILE), timeout=30)
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS outputs (
+                asset TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                replaces TEXT,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                checksum TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS lookups (
+                run_id TEXT NOT NULL,
+                asset TEXT NOT NULL,
+                hit INTEGER NOT NULL,
+                PRIMARY KEY (run_id, asset)
+            );
+            """
+        )
+        return conn
+
+    def _output_path(self, asset_path: list) -> str:
+        # Where ParquetIOManager stores the asset's output
+        return self.storage.get_intermediate_path(os.path.join(*asset_path))
+
+    def file_checksum(self, path: str) -> str:
+        """Content hash of ``path``, re-read only when its fingerprint changed since it was last hashed."""
+        path = os.path.abspath(path)
+        fingerprint = file_fingerprint(path)
+        with self._connect() as conn:
+            row = conn.execute("SELECT fingerprint, checksum FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == fingerprint:
+            return row[1]
+
+        checksum = file_checksum(path)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (path, fingerprint, checksum))
+        return checksum
+
+    def latest_key(self, asset: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT key FROM outputs WHERE asset = ?", (asset,)).fetchone()
+        return row[0] if row else None
+
+    def stored(self, asset: str, asset_path: list, key: str) -> bool:
+        """Whether the IO manager holds the output for ``key``."""
+        if not self.enabled:
+            return False
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT key, replaces FROM outputs WHERE asset = ?", (asset,)).fetchone()
+        if row is None or row[0] != key:
+            return False
+
+        # The output still there when the key was recorded is not the key's
+        identity = _file_identity(os.path.join(self._output_path(asset_path), MANIFEST_FILE))
+        return identity is not None and identity != row[1]
+
+    def lookup(self, asset: str, asset_path: list, key: str):
+        """The stored output for ``key``, or None on a miss."""
+        if not self.stored(asset, asset_path, key):
+            return None
+        # Not memory-mapped: the IO manager replaces these files when it stores the value again
+        return read_stored_value(self._output_path(asset_path), memory_map=False)
+
+    def record(self, asset: str, asset_path: list, key: str):
+        """Record ``key`` as the key of the output about to be stored for ``asset``."""
+        replaces = _file_identity(os.path.join(self._output_path(asset_path), MANIFEST_FILE))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)",
+                (asset, key, replaces, pd.Timestamp.now().isoformat()),
+            )
+        # Copies kept by earlier versions of the cache
+        shutil.rmtree(os.path.join(self.root, asset), ignore_errors=True)
+
+    def record_lookup(self, run_id: str, asset: str, hit: bool) -> dict:
+        """Record a hit or miss and return the run's totals so far."""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?)", (run_id, asset, int(hit)))
+            lookups, hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hit), 0) FROM lookups WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        return {"lookups": lookups, "hits": hits, "hit_rate": round(hits / lookups, 3)}
+
+
+def content_cached(upstream=(), files=None, outputs=None, code=(), side_effects=False):
+    """
+    Skip an asset when its inputs, config and code are unchanged.
+
+    ``upstream`` names the assets it reads (inputs and deps), ``files`` and
+    ``outputs`` are callables taking the ``DataStorageResource`` and returning
+    the input files to hash and the files the asset writes (a hit needs
+    them to still exist), and ``code`` lists helper modules whose source is
+    part of the key. ``side_effects=True`` marks assets whose work is outside
+    the pipeline (database writes); they only hit with ``cache_side_effects``.
+    An ``asset_cache`` resource parameter is added to the asset's signature,
+    and ``wrapper.cache_key(context, cache, kwargs)`` computes the key for
+    another op of the same graph asset.
+    """
+    def decorator(fn):
+        source = inspect.getsource(fn) + "".join(inspect.getsource(module) for module in code)
+        code_version = hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+        signature = inspect.signature(fn)
+        parameters = list(signature.parameters.values())
+        parameters.append(
+            inspect.Parameter(CACHE_PARAM, inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=AssetCacheResource)
+        )
+
+        def cache_key(context, cache: AssetCacheResource, kwargs: dict, op_config: dict = None) -> str:
+            # op_config stands in for the config of the op computing the key
+            if op_config is None:
+                op_config = context.op_execution_context.op_config or {}
+            parts = {
+                "code": code_version,
+                "config": op_config,
+                "resources": {
+                    name: _resource_config(value)
+                    for name, value in kwargs.items()
+                    if isinstance(value, ConfigurableResource)
+                },
+                "upstream": {
+                    name: cache.latest_key(name) or (value_hash(kwargs[name]) if name in kwargs else None)
+                    for name in upstream
+                },
+            }
+            if files is not None:
+                parts["files"] = {
+                    os.path.basename(path): cache.file_checksum(path)
+                    for path in sorted(files(cache.storage))
+                }
+            return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        @functools.wraps(fn)
+        def wrapper(context, *args, **kwargs):
+            cache = kwargs.pop(CACHE_PARAM)
+            asset = context.asset_key.to_python_identifier()
+            asset_path = context.asset_key.path
+            key = cache_key(context, cache, kwargs)
+
+            if side_effects and not cache.cache_side_effects:
+                value = fn(context, *args, **kwargs)
+                cache.record(asset, asset_path, key)
+                context.add_output_metadata({"cache": "bypass", "cache_key": key[:12]})
+                return value
+
+            written = outputs(cache.storage) if outputs is not None else []
+            value = cache.lookup(asset, asset_path, key) if all(os.path.exists(path) for path in written) else None
+            hit = value is not None
+
+            if hit:
+                context.log.info(f"Cache hit for {asset} ({key[:12]}); skipping recomputation")
+            else:
+                value = fn(context, *args, **kwargs)
+                cache.record(asset, asset_path, key)
+
+            totals = cache.record_lookup(context.run.run_id, asset, hit)
+            context.add_output_metadata({
+                "cache": "hit" if hit else "miss",
+                "cache_key": key[:12],
+                "run_cache_hit_rate": totals["hit_rate"],
+                "run_cache_hits": totals["hits"],
+                "run_cache_lookups": totals["lookups"],
+            })
+            try:
+                context.instance.add_run_tags(context.run.run_id, {"asset_cache/hit_rate": str(totals["hit_rate"])})
+            except Exception:
+                pass
+
+            return value
+
+        wrapper.cache_key = cache_key
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        wrapper.__annotations__ = {**fn.__annotations__, CACHE_PARAM: AssetCacheResource}
+        return wrapper
+
+    return decorator
+
+
+def raw_files(pattern: str):
+    """``files=`` helper: the raw-directory files matching ``pattern``."""
+    return lambda storage: glob.glob(os.path.join(storage.raw_dir, pattern))
@@ -0,0 +1,145 @@
+"""
+Chunked execution of the ETL for datasets larger than memory.
+
+The regular assets pass whole DataFrames from stage to stage. Here every stage
+is a generator over bounded chunks instead:
+
+    read_chunks -> clean_chunks -> engineer_chunks -> writers
+
+``read_chunks`` yields at most ``chunk_rows`` rows of one ticker at a time, in
+date order. CSV files are parsed incrementally; a JSON dump is column-oriented,
+so each JSON file is decoded whole and then sliced, which bounds memory by the
+largest JSON file rather than by the dataset.
+
+Rolling features look back across chunk boundaries. ``RollingFeatureState``
+keeps the last ``CONTEXT_ROWS`` cleaned rows of every ticker and prepends
+them to the ticker's next chunk, so SMA_50, momentum and volatility see the
+same history as in a single pass. ``Next_Day_Target`` looks one row ahead,
+so the last row of a chunk is held back until the next chunk (or the end of
+the stream) decides it. The engineered rows match ``engineer_features`` on
+the whole dataset in values and dtypes; only the index differs.
+"""
+
+import glob
+import os
+
+import pandas as pd
+
+from .features import MOMENTUM_PERIODS, SMA_WINDOW, VOLATILITY_WINDOW, engineer_features
+from .readers import CSV_DTYPES, iter_stock_csv, read_stock_json
+from .schemas import ENGINEERED_FEATURES_SCHEMA, RAW_STOCK_SCHEMA, apply_schema
+
+
+# Rows of history a new row needs: 49 closes for its SMA_50, then 5 rows with an SMA
+# for its shifts and volatility, plus the row held back for Next_Day_Target
+CONTEXT_ROWS = SMA_WINDOW - 1 + max(MOMENTUM_PERIODS, VOLATILITY_WINDOW - 1) + 1
+
+# Column order of combined_raw_data (the yfinance CSV layout), whichever file a chunk came from
+RAW_COLUMNS = ['Date', *CSV_DTYPES, 'Ticker']
+
+# Position of a row within its ticker, carried through engineer_features
+SEQUENCE_COLUMN = "__seq__"
+
+
+def _ticker_from_file(file_path: str):
+    name, _ = os.path.splitext(os.path.basename(file_path))
+    return name.replace('stock_data_', '', 1) if name.startswith('stock_data_') else None
+
+
+def _in_raw_order(df: pd.DataFrame) -> pd.DataFrame:
+    ordered = [col for col in RAW_COLUMNS if col in df.columns]
+    return df[ordered + [col for col in df.columns if col not in ordered]]
+
+
+def read_chunks(raw_dir: str, chunk_rows: int = 50_000, tickers: list = None):
+    """
+    Yield raw frames of at most ``chunk_rows`` rows, one ticker per frame.
+
+    ``stock_data_*.csv`` and ``stock_data_*.json`` files are read in name
+    order, so the output is grouped by ticker as in ``combined_raw_data``.
+    """
+    paths = sorted(
+        glob.glob(os.path.join(raw_dir, "stock_data_*.csv"))
+        + glob.glob(os.path.join(raw_dir, "stock_data_*.json"))
+    )
+
+    for path in paths:
+        ticker = _ticker_from_file(path)
+
+        if path.endswith('.csv'):
+            if tickers and ticker not in tickers:
+                continue
+            for df in iter_stock_csv(path, chunk_rows):
+                df['Ticker'] = ticker
+                yield _in_raw_order(df)
+            continue
+
+        # Multi-ticker dumps are filtered by row rather than by file name
+        data = read_stock_json(path, default_ticker=ticker)
+        for name, df in data.groupby('Ticker', sort=False):
+            if tickers and name not in tickers:
+                continue
+            df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+            for start in range(0, len(df), chunk_rows):
+                yield _in_raw_order(df.iloc[start:start + chunk_rows].reset_index(drop=True))
+        del data
+
+
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """The ``cleaned_stock_data`` rules for one chunk."""
+    df = df.dropna(subset=['Date', 'Close']).reset_index(drop=True)
+    return apply_schema(df, RAW_STOCK_SCHEMA)
+
+
+def clean_chunks(chunks):
+    for df in chunks:
+        df = clean_chunk(df)
+        if len(df):
+            yield df
+
+
+class RollingFeatureState:
+    """
+    Per-ticker carry-over between chunks.
+
+    ``tails`` holds the last ``CONTEXT_ROWS`` cleaned rows of each ticker and
+    ``rows_seen`` how many rows of it have been pushed so far.
+    """
+
+    def __init__(self):
+        self.tails = {}
+        self.rows_seen = {}
+
+    def push(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Engineered rows of one ticker's chunk that can be decided so far."""
+        ticker = df['Ticker'].iloc[0]
+        seen = self.rows_seen.get(ticker, 0)
+        tail = self.tails.get(ticker)
+
+        df = df.assign(**{SEQUENCE_COLUMN: range(seen, seen + len(df))})
+        self.rows_seen[ticker] = seen + len(df)
+
+        if tail is not None:
+            if df['Date'].iloc[0] < tail['Date'].iloc[-1]:
+                raise ValueError(
+                    f"Chunked mode needs every ticker's rows in date order; {ticker} went back "
+                    f"from {tail['Date'].iloc[-1]} to {df['Date'].iloc[0]}"
+                )
+            # Categories differ between chunks; Ticker is re-cast below
+            df = pd.concat([tail, df], ignore_index=True)
+
+        self.tails[ticker] = df.iloc[-CONTEXT_ROWS:].reset_index(drop=True)
+
+        engineered = engineer_features(apply_schema(df, RAW_STOCK_SCHEMA))
+        # Rows before the one held back last time were decided by earlier chunks
+        engineered = engineered[engineered[SEQUENCE_COLUMN] >= seen - 1]
+        return engineered.drop(columns=SEQUENCE_COLUMN).reset_index(drop=True)
+
+
+def engineer_chunks(chunks, state: RollingFeatureState = None):
+    """Yield the engineered rows of every cleaned chunk (empty chunks are skipped)."""
+    state = state or RollingFeatureState()
+    for df in chunks:
+        engineered = state.push(df)
+        if len(engineered):
+            yield apply_schema(engineered, ENGINEERED_FEATURES_SCHEMA)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+SMA_WINDOW = 50
+MOMENTUM_PERIODS = 5
+VOLATILITY_WINDOW = 5
+
+
+def _appearance_order(col: pd.Series) -> pd.Series:
+    if col.name == 'Ticker':
+        return pd.Series(pd.factorize(col)[0], index=col.index)
+    return col
+
+
+def _is_grouped_by_appearance(df: pd.DataFrame) -> bool:
+    codes = pd.factorize(df['Ticker'])[0]
+    same_ticker = np.diff(codes) == 0
+    dates_ascending = np.diff(df['Date'].to_numpy()) >= np.timedelta64(0)
+    return bool(np.all((np.diff(codes) > 0) | (same_ticker & dates_ascending)))
+
+
+def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the model features for every ticker in one pass.
+
+    The frame is sorted by (Ticker, Date) once and every per-ticker window
+    or shift is a grouped operation over contiguous groups, so the cost is
+    linear in rows regardless of the number of tickers. Output (values,
+    dtypes, row order and index) matches the original per-ticker loop.
+    """
+    # Tickers keep their order of first appearance, as in the per-ticker loop.
+    # cleaned_stock_data arrives in that order already, so the sort is usually skipped
+    if _is_grouped_by_appearance(df):
+        df = df.copy(deep=False)
+    else:
+        df = df.sort_values(['Ticker', 'Date'], key=_appearance_order, kind='stable')
+
+    # Ensuring Close is numeric
+    df['Close'] = pd.to_numeric(df['Close'], errors='coerce')
+    df = df.dropna(subset=['Close'])
+
+    # SMA 50 (groups are contiguous, so grouped results line up positionally)
+    df['SMA_50'] = (
+        df.groupby('Ticker', sort=False)['Close']
+        .rolling(window=SMA_WINDOW).mean()
+        .to_numpy()
+    )
+
+    # Trend classification
+    df['Trend'] = np.where(
+        df['SMA_50'].isna(),
+        "Neutral",
+        np.where(df['Close'] > df['SMA_50'], "Bullish", "Bearish"),
+    )
+
+    # Filtering Neutral for training
+    df = df[df['Trend'] != 'Neutral'].reset_index(drop=True)
+    df['Target'] = (df['Trend'] == 'Bullish').astype(int)
+
+    close_groups = df.groupby('Ticker', sort=False)['Close']
+
+    # Price Change
+    df['Price_Change'] = df['Close'] / close_groups.shift(1) - 1
+
+    # Distance from SMA
+    df['Distance_from_SMA'] = ((df['Close'] - df['SMA_50']) / df['SMA_50']) * 100
+
+    # Momentum 5d
+    df['Momentum_5d'] = df['Close'] / close_groups.shift(MOMENTUM_PERIODS) - 1
+
+    # Volatility (5d std)
+    df['Volatility'] = close_groups.rolling(window=VOLATILITY_WINDOW).std().to_numpy()
+
+    # Next Day Target
+    df['Next_Day_Target'] = df.groupby('Ticker', sort=False)['Target'].shift(-1)
+
+    return df.dropna()  # Drop NaN from rolling/shift
@@ -0,0 +1,19 @@
+import hashlib
+
+import pandas as pd
+
+
+def frame_hash(df: pd.DataFrame, columns: list = None) -> str:
+    """
+    Hex digest of the values and column names of ``df`` (or of ``columns``).
+
+    Rows are hashed with ``pd.util.hash_pandas_object``. The index is left
+    out, so renumbering rows does not change the hash; dtypes do.
+    """
+    if columns is not None:
+        df = df[columns]
+
+    digest = hashlib.sha1()
+    digest.update(",".join(map(str, df.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,224 @@
+"""
+Parquet IO manager for the pipeline's intermediate assets.
+
+DataFrame outputs are written under ``DataStorageResource.intermediate_dir``
+as one compressed Parquet file per ticker plus a ``_manifest.json`` holding
+the column dtypes, the partition files and how to rebuild the index and row
+order. Low-cardinality labels are stored as dictionary-encoded categories and
+0/1 targets as int8; the original dtypes are restored on load, so downstream
+assets see exactly the frame that was returned.
+
+Inputs can be pruned through ``AssetIn`` metadata: ``columns`` reads only
+those columns and ``tickers`` only those partition files. Files are read with
+``memory_map=True``. Any other output (metrics dicts, models) is pickled.
+"""
+
+import json
+import os
+import pickle
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dagster import ConfigurableIOManager, InputContext, OutputContext, ResourceDependency
+
+from .resources import DataStorageResource
+
+
+MANIFEST_FILE = "_manifest.json"
+PICKLE_FILE = "value.pkl"
+
+CATEGORY_COLUMNS = ['Ticker', 'Trend']
+INT8_COLUMNS = ['Target', 'Next_Day_Target']
+
+# Helper columns written next to the data when the index or row order cannot be implied
+INDEX_COLUMN = "__index__"
+ROW_COLUMN = "__row__"
+
+
+def to_storage_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Narrow label and target columns to category/int8 where that is lossless."""
+    df = df.copy()
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    for col in INT8_COLUMNS:
+        if col in df.columns and df[col].notna().all():
+            values = df[col].to_numpy()
+            if np.array_equal(values, values.astype(np.int8)):
+                df[col] = values.astype(np.int8)
+
+    return df
+
+
+def _partition_file(number: int, ticker) -> str:
+    return f"part-{number:05d}-" + re.sub(r'[^A-Za-z0-9_.-]', '_', str(ticker)) + ".parquet"
+
+
+def _is_default_index(index: pd.Index) -> bool:
+    return isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+
+
+def write_partitioned_frame(df: pd.DataFrame, path: str, partition_column: str = "Ticker", compression: str = "zstd") -> dict:
+    """
+    Write ``df`` to the directory ``path`` with one Parquet file per value of
+    ``partition_column`` and return the manifest.
+
+    The directory is written next to ``path`` and swapped in at the end, so a
+    failed write leaves the previous materialization readable.
+    """
+    manifest = {
+        "kind": "dataframe",
+        "columns": list(df.columns),
+        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "index": "range",
+        "index_name": df.index.name,
+        "rows": len(df),
+        "partitions": [],
+    }
+
+    data = to_storage_types(df)
+    if not _is_default_index(df.index):
+        manifest["index"] = "stored"
+        manifest["index_dtype"] = str(df.index.dtype)
+        data[INDEX_COLUMN] = df.index.to_numpy()
+
+    if partition_column in df.columns:
+        codes, tickers = pd.factorize(df[partition_column], use_na_sentinel=False)
+        # Groups are written in order of first appearance; interleaved rows keep their position
+        contiguous = bool(np.all(np.diff(codes) >= 0))
+        if not contiguous:
+            data[ROW_COLUMN] = np.arange(len(df), dtype=np.int64)
+        manifest["row_order"] = "contiguous" if contiguous else "stored"
+        groups = [(ticker, np.flatnonzero(codes == i)) for i, ticker in enumerate(tickers)]
+    else:
+        manifest["row_order"] = "contiguous"
+        groups = [("all", np.arange(len(df)))]
+
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    for number, (ticker, positions) in enumerate(groups):
+        filename = _partition_file(number, ticker)
+        table = pa.Table.from_pandas(data.iloc[positions], preserve_index=False)
+        pq.write_table(table, os.path.join(tmp_path, filename), compression=compression)
+        manifest["partitions"].append({"ticker": str(ticker), "file": filename, "rows": len(positions)})
+
+    with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_partitioned_frame(path: str, columns: list = None, tickers: list = None, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Read a frame written by ``write_partitioned_frame``.
+
+    ``columns`` and ``tickers`` prune the columns and partition files read;
+    the original dtypes, index and row order are restored.
+    """
+    with open(os.path.join(path, MANIFEST_FILE), 'r') as f:
+        manifest = json.load(f)
+
+    columns = list(manifest["columns"]) if columns is None else list(columns)
+    read_columns = list(columns)
+    if manifest["index"] == "stored":
+        read_columns.append(INDEX_COLUMN)
+    if manifest["row_order"] == "stored":
+        read_columns.append(ROW_COLUMN)
+
+    wanted = None if tickers is None else {str(t) for t in tickers}
+    partitions = [p for p in manifest["partitions"] if wanted is None or p["ticker"] in wanted]
+
+    tables = [
+        pq.read_table(os.path.join(path, p["file"]), columns=read_columns, memory_map=memory_map)
+        for p in partitions
+    ]
+    if tables:
+        df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    else:
+        df = pd.DataFrame({col: pd.Series(dtype=manifest["dtypes"][col]) for col in read_columns if col in manifest["dtypes"]})
+
+    if ROW_COLUMN in df.columns:
+        df = df.sort_values(ROW_COLUMN, kind='stable').drop(columns=ROW_COLUMN)
+
+    if INDEX_COLUMN in df.columns:
+        index = pd.Index(df[INDEX_COLUMN].to_numpy(), dtype=manifest["index_dtype"], name=manifest["index_name"])
+        df = df.drop(columns=INDEX_COLUMN)
+        df.index = index
+    elif tickers is None:
+        df.index = pd.RangeIndex(len(df), name=manifest["index_name"])
+    else:
+        df = df.reset_index(drop=True)
+
+    for col in columns:
+        if str(df[col].dtype) != manifest["dtypes"][col]:
+            df[col] = df[col].astype(manifest["dtypes"][col])
+
+    return df
+
+
+def read_stored_value(path: str, columns: list = None, tickers: list = None, memory_map: bool = True):
+    """Read an output stored by ``ParquetIOManager``, whichever kind it is."""
+    with open(os.path.join(path, MANIFEST_FILE), 'r') as f:
+        kind = json.load(f)["kind"]
+
+    if kind == "pickle":
+        with open(os.path.join(path, PICKLE_FILE), 'rb') as f:
+            return pickle.load(f)
+
+    return read_partitioned_frame(path, columns=columns, tickers=tickers, memory_map=memory_map)
+
+
+class ParquetIOManager(ConfigurableIOManager):
+    """Stores DataFrame outputs as ticker-partitioned Parquet, everything else as pickles."""
+
+    storage: ResourceDependency[DataStorageResource]
+    compression: str = "zstd"
+    partition_column: str = "Ticker"
+
+    def _get_path(self, context) -> str:
+        if context.has_asset_key:
+            parts = context.asset_key.path
+        else:
+            output = context if isinstance(context, OutputContext) else context.upstream_output
+            parts = output.get_identifier()
+        return self.storage.get_intermediate_path(os.path.join(*parts))
+
+    def handle_output(self, context: OutputContext, obj):
+        path = self._get_path(context)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if isinstance(obj, pd.DataFrame) and obj.columns.nlevels == 1 and obj.index.nlevels == 1:
+            manifest = write_partitioned_frame(obj, path, self.partition_column, self.compression)
+            size = sum(os.path.getsize(os.path.join(path, p["file"])) for p in manifest["partitions"])
+            context.add_output_metadata({
+                "path": path,
+                "rows": manifest["rows"],
+                "partitions": len(manifest["partitions"]),
+                "parquet_bytes": size,
+            })
+            return
+
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        with open(os.path.join(tmp_path, PICKLE_FILE), 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+            json.dump({"kind": "pickle"}, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        context.add_output_metadata({"path": path})
+
+    def load_input(self, context: InputContext):
+        metadata = context.definition_metadata or {}
+        return read_stored_value(self._get_path(context), columns=metadata.get("columns"), tickers=metadata.get("tickers"))
@@ -1,11 +1,14 @@
-from dagster import AssetSelection, define_asset_job
+from dagster import AssetSelection, define_asset_job, multiprocess_executor
 
 
-# Full ETL job: Execute all assets
+# Full ETL job: Execute all assets except the on-demand backtest and search and the chunked mode.
+# Every step (including each ticker batch of engineered_features) runs in its own process;
+# run config execution.config.max_concurrent caps how many run at once (0 = one per CPU)
 etl_job = define_asset_job(
     name="etl_full_pipeline",
     description="Run the complete ETL pipeline: extract, transform, and load",
-    selection=AssetSelection.all(),
+    selection=AssetSelection.all() - AssetSelection.groups("backtesting", "tuning", "streaming"),
+    executor_def=multiprocess_executor,
 )
 
 
@@ -31,3 +34,27 @@ model_training_job = define_asset_job(
     description="Run only the model training assets",
     selection=AssetSelection.groups("loading"),
 )
+
+
+# Walk-forward backtest job
+backtest_job = define_asset_job(
+    name="walk_forward_backtest",
+    description="Run the walk-forward backtest over the training dataset",
+    selection=AssetSelection.groups("backtesting"),
+)
+
+
+# Hyperparameter search job
+tuning_job = define_asset_job(
+    name="hyperparameter_search",
+    description="Search RandomForest hyperparameters and write models/model_config.json",
+    selection=AssetSelection.groups("tuning"),
+)
+
+
+# Chunked ETL job for datasets larger than memory
+chunked_job = define_asset_job(
+    name="etl_chunked",
+    description="Stream the raw files through cleaning, features and the database writers in bounded chunks",
+    selection=AssetSelection.groups("streaming"),
+)
@@ -0,0 +1,53 @@
+import json
+import os
+
+
+class ExtractionManifest:
+    """
+    Per-file record of what the last successful extraction consumed.
+
+    Entries are keyed by file name and hold the file ``size``, ``mtime`` and
+    ``ctime`` (which every write changes, even one that restores the mtime as
+    ``cp -p`` or ``rsync -t`` do), the byte ``offset`` parsing stopped at, the CSV ``columns``, a digest of
+    the bytes before the offset and the ``watermark`` (latest Date loaded).
+    The manifest is only written after a run succeeds, so a failed run
+    leaves the previous watermarks in place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+    def get(self, filename: str):
+        return self.entries.get(filename)
+
+    def is_unchanged(self, filename: str, stat: os.stat_result) -> bool:
+        entry = self.entries.get(filename)
+        return (
+            entry is not None
+            and entry['size'] == stat.st_size
+            and entry['mtime'] == stat.st_mtime
+            # Entries written before ctime was recorded are re-read once
+            and entry.get('ctime') == stat.st_ctime_ns
+        )
+
+    def update(self, filename: str, stat: os.stat_result, **fields):
+        self.entries[filename] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'ctime': stat.st_ctime_ns,
+            **fields,
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Writing to a temp file first so readers never see a partial manifest
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,121 @@
+"""
+Batched MongoDB writes for raw OHLCV data.
+
+All tickers share the ``raw_stock_data`` collection, keyed by a unique
+(ticker, date) index. Documents are built from column arrays one batch at a
+time and sent as unordered ``bulk_write`` batches of ``UpdateOne`` upserts on
+that key, so reruns overwrite instead of duplicating and memory is bounded by
+the batch size. Only the bar is ``$set``; ``ingested_at`` is written when a
+document is first inserted, so rewriting an unchanged bar modifies nothing.
+"""
+
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+
+from .profiling import stage
+
+
+RAW_COLLECTION = "raw_stock_data"
+RAW_KEY = [("ticker", 1), ("date", -1)]
+
+# Per-source version stamps read by the query layer (query.py)
+DATA_VERSIONS_COLLECTION = "data_versions"
+
+
+def _nullable_floats(values: pd.Series) -> list:
+    array = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+    missing = np.isnan(array)
+    result = array.astype(object)
+    result[missing] = None
+    return result.tolist()
+
+
+def _nullable_ints(values: pd.Series) -> list:
+    array = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+    missing = np.isnan(array)
+    result = np.where(missing, 0, array).astype(np.int64).astype(object)
+    result[missing] = None
+    return result.tolist()
+
+
+def _column(batch: pd.DataFrame, name: str) -> pd.Series:
+    if name in batch.columns:
+        return batch[name]
+    return pd.Series(np.nan, index=batch.index)
+
+
+def ohlcv_documents(batch: pd.DataFrame, ingested_at: str) -> list:
+    """Build raw-data documents for one batch of rows from its column arrays."""
+    dates = [ts.isoformat() if pd.notna(ts) else None for ts in batch['Date']]
+
+    columns = zip(
+        batch['Ticker'].tolist(),
+        dates,
+        _nullable_floats(_column(batch, 'Open')),
+        _nullable_floats(_column(batch, 'High')),
+        _nullable_floats(_column(batch, 'Low')),
+        _nullable_floats(_column(batch, 'Close')),
+        _nullable_ints(_column(batch, 'Volume')),
+    )
+
+    return [
+        {
+            "ticker": ticker,
+            "date": date,
+            "ohlcv": {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+            "ingested_at": ingested_at,
+        }
+        for ticker, date, open_, high, low, close, volume in columns
+    ]
+
+
+def ensure_raw_indexes(collection):
+    """Create the unique (ticker, date) key and the date index, replacing an older non-unique key."""
+    for name, index in collection.index_information().items():
+        if index["key"] == RAW_KEY and not index.get("unique"):
+            collection.drop_index(name)
+
+    collection.create_index(RAW_KEY, unique=True)
+    collection.create_index("date")
+
+
+def stamp_data_version(collection, name: str, version: str):
+    """Record in ``collection`` (DATA_VERSIONS_COLLECTION) that ``name`` changed."""
+    collection.replace_one(
+        {"_id": name},
+        {"_id": name, "version": version, "updated_at": pd.Timestamp.now().isoformat()},
+        upsert=True,
+    )
+
+
+def write_ohlcv(collection, df: pd.DataFrame, ingested_at: str, batch_size: int = 5_000) -> dict:
+    """
+    Upsert the rows of ``df`` into ``collection`` in unordered batches.
+
+    Returns upserted/modified/matched counts summed over all batches;
+    documents whose bar did not change are matched but not modified.
+    """
+    counts = {"upserted": 0, "modified": 0, "matched": 0}
+    # Two upserts of one key in an unordered batch would race on the unique index
+    df = df.drop_duplicates(subset=['Ticker', 'Date'], keep='last')
+
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        with stage("mongo_build_documents"):
+            requests = [
+                UpdateOne(
+                    {"ticker": doc["ticker"], "date": doc["date"]},
+                    {"$set": {"ohlcv": doc["ohlcv"]}, "$setOnInsert": {"ingested_at": doc["ingested_at"]}},
+                    upsert=True,
+                )
+                for doc in ohlcv_documents(batch, ingested_at)
+            ]
+
+        with stage("mongo_bulk_write"):
+            result = collection.bulk_write(requests, ordered=False)
+        counts["upserted"] += result.upserted_count
+        counts["modified"] += result.modified_count
+        counts["matched"] += result.matched_count
+
+    return counts
@@ -0,0 +1,477 @@
+"""
+Bulk loading of DataFrames into PostgreSQL.
+
+Frames are streamed through ``COPY ... FROM STDIN WITH CSV`` one bounded
+chunk at a time, with ``execute_values`` batches as a fallback for servers
+or proxies that reject COPY. In merge mode the data lands in a temporary
+staging table first and is upserted into the live table, so the table and
+its indexes stay in place for readers.
+
+``processed_data`` comes in two layouts. ``flat`` is the original single
+table with a SERIAL id, NUMERIC columns and B-tree indexes. ``partitioned``
+range-partitions it by year of ``trade_date``, stores the features as float8,
+and indexes it with a BRIN index on ``trade_date`` plus the unique
+``(ticker, trade_date)`` key. Years without a partition are loaded into a
+standalone table and attached, so loads never rewrite existing partitions.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from psycopg2.extras import execute_values
+
+from .profiling import stage
+
+
+PROCESSED_DATA_SCHEMA = """
+    id SERIAL PRIMARY KEY,
+    close_price NUMERIC(15, 6),
+    high_price NUMERIC(15, 6),
+    low_price NUMERIC(15, 6),
+    open_price NUMERIC(15, 6),
+    volume BIGINT,
+    trade_date DATE,
+    ticker VARCHAR(10),
+    sma_50 NUMERIC(15, 6),
+    trend VARCHAR(20),
+    target INTEGER,
+    price_change NUMERIC(15, 8),
+    distance_from_sma NUMERIC(15, 8),
+    momentum_5d NUMERIC(15, 8),
+    volatility NUMERIC(15, 8),
+    next_day_target INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+PARTITIONED_PROCESSED_DATA_SCHEMA = """
+    close_price DOUBLE PRECISION,
+    high_price DOUBLE PRECISION,
+    low_price DOUBLE PRECISION,
+    open_price DOUBLE PRECISION,
+    volume BIGINT,
+    trade_date DATE NOT NULL,
+    ticker VARCHAR(10) NOT NULL,
+    sma_50 DOUBLE PRECISION,
+    trend VARCHAR(20),
+    target INTEGER,
+    price_change DOUBLE PRECISION,
+    distance_from_sma DOUBLE PRECISION,
+    momentum_5d DOUBLE PRECISION,
+    volatility DOUBLE PRECISION,
+    next_day_target INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+PROCESSED_DATA_LAYOUTS = ("flat", "partitioned")
+
+DATA_VERSIONS_SCHEMA = """
+    name VARCHAR(63) PRIMARY KEY,
+    version VARCHAR(64) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+RAW_PRICE_SCHEMA = """
+    trade_date DATE PRIMARY KEY,
+    close_price NUMERIC(15, 6),
+    high_price NUMERIC(15, 6),
+    low_price NUMERIC(15, 6),
+    open_price NUMERIC(15, 6),
+    volume BIGINT
+"""
+
+# processed_data column -> training dataset column
+PROCESSED_DATA_COLUMNS = {
+    'close_price': 'Close',
+    'high_price': 'High',
+    'low_price': 'Low',
+    'open_price': 'Open',
+    'volume': 'Volume',
+    'trade_date': 'Date',
+    'ticker': 'Ticker',
+    'sma_50': 'SMA_50',
+    'trend': 'Trend',
+    'target': 'Target',
+    'price_change': 'Price_Change',
+    'distance_from_sma': 'Distance_from_SMA',
+    'momentum_5d': 'Momentum_5d',
+    'volatility': 'Volatility',
+    'next_day_target': 'Next_Day_Target',
+}
+
+INTEGER_COLUMNS = {'volume', 'target', 'next_day_target'}
+
+
+PROCESSED_DATA_KEY = ['ticker', 'trade_date']
+
+
+def to_processed_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Shape the training dataset into processed_data column order and types."""
+    rows = {}
+    for column, source in PROCESSED_DATA_COLUMNS.items():
+        values = df[source] if source in df.columns else pd.Series(0, index=df.index)
+
+        if column == 'trade_date':
+            values = pd.to_datetime(values).dt.date
+        elif column in INTEGER_COLUMNS:
+            # Truncating like int() did, keeping missing values as NULL
+            values = np.trunc(pd.to_numeric(values, errors='coerce')).astype('Int64')
+        elif column not in ('ticker', 'trend'):
+            values = pd.to_numeric(values, errors='coerce').astype(float)
+
+        rows[column] = values
+
+    return pd.DataFrame(rows)
+
+
+class FrameCSVStream:
+    """
+    File-like view of a DataFrame as CSV text, rendered ``chunk_rows`` at a time.
+
+    ``copy_expert`` pulls from ``read()``, so only one chunk of text is held
+    in memory however large the frame is.
+    """
+
+    def __init__(self, df: pd.DataFrame, chunk_rows: int = 50_000):
+        self.df = df
+        self.chunk_rows = chunk_rows
+        self._position = 0
+        self._chunk = io.StringIO()
+
+    def _render_next_chunk(self) -> bool:
+        if self._position >= len(self.df):
+            return False
+
+        chunk = self.df.iloc[self._position:self._position + self.chunk_rows]
+        self._position += self.chunk_rows
+
+        self._chunk = io.StringIO()
+        chunk.to_csv(self._chunk, header=False, index=False, na_rep='')
+        self._chunk.seek(0)
+        return True
+
+    def read(self, size: int = -1) -> str:
+        data = self._chunk.read(size)
+        while not data and self._render_next_chunk():
+            data = self._chunk.read(size)
+        return data
+
+
+def copy_frame(cursor, table: str, df: pd.DataFrame, chunk_rows: int = 50_000):
+    """Stream ``df`` (columns named after the table's) into ``table`` with COPY."""
+    columns = ", ".join(df.columns)
+    cursor.copy_expert(
+        f"COPY {table} ({columns}) FROM STDIN WITH CSV",
+        FrameCSVStream(df, chunk_rows),
+    )
+
+
+def insert_frame(cursor, table: str, df: pd.DataFrame, page_size: int = 5_000):
+    """Insert ``df`` with multi-row ``execute_values`` statements."""
+    columns = ", ".join(df.columns)
+    # Converting pandas NA/NaN to None so psycopg2 sends NULL
+    records = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    execute_values(
+        cursor,
+        f"INSERT INTO {table} ({columns}) VALUES %s",
+        records,
+        page_size=page_size,
+    )
+
+
+def load_frame(cursor, table: str, df: pd.DataFrame, method: str = "copy", chunk_rows: int = 50_000) -> str:
+    """
+    Load ``df`` into ``table`` and return the method that was used.
+
+    ``method="copy"`` falls back to ``execute_values`` if the server refuses
+    COPY; a savepoint keeps the surrounding transaction usable.
+    """
+    if method == "copy":
+        cursor.execute("SAVEPOINT bulk_load")
+        try:
+            copy_frame(cursor, table, df, chunk_rows)
+            cursor.execute("RELEASE SAVEPOINT bulk_load")
+            return "copy"
+        except (psycopg2.NotSupportedError, psycopg2.ProgrammingError):
+            cursor.execute("ROLLBACK TO SAVEPOINT bulk_load")
+
+    insert_frame(cursor, table, df)
+    return "execute_values"
+
+
+def drop_duplicate_keys(rows: pd.DataFrame, key_columns: list = PROCESSED_DATA_KEY) -> pd.DataFrame:
+    """Keep the last row of every key, as a row-by-row upsert would."""
+    return rows.drop_duplicates(subset=key_columns, keep='last')
+
+
+def ensure_unique_index(cursor, index: str, table: str, columns: list, order_column: str = "id") -> int:
+    """
+    Create ``index`` as UNIQUE, rebuilding it once if an older non-unique version exists.
+
+    Tables loaded before the index was unique may hold duplicate keys; all
+    but the row with the highest ``order_column`` (the SERIAL id, so the
+    last inserted) of each key are deleted before it is built. Returns the
+    number of rows deleted.
+    """
+    cursor.execute(
+        """
+        SELECT ix.indisunique
+        FROM pg_class c
+        JOIN pg_index ix ON ix.indexrelid = c.oid
+        WHERE c.relname = %s AND ix.indrelid = %s::regclass
+        """,
+        (index, table),
+    )
+    row = cursor.fetchone()
+    if row is not None and row[0]:
+        return 0
+    if row is not None:
+        cursor.execute(f"DROP INDEX {index}")
+
+    matches = " AND ".join(f"older.{col} = newer.{col}" for col in columns)
+    cursor.execute(f"""
+        DELETE FROM {table} older USING {table} newer
+        WHERE {matches} AND older.{order_column} < newer.{order_column}
+    """)
+    deleted = cursor.rowcount
+    cursor.execute(f"CREATE UNIQUE INDEX {index} ON {table} ({', '.join(columns)})")
+    return deleted
+
+
+def processed_data_layout(cursor):
+    """Layout of the existing processed_data table, or None if there is none."""
+    cursor.execute("""
+        SELECT relkind FROM pg_class
+        WHERE relname = 'processed_data' AND relkind IN ('r', 'p') AND pg_table_is_visible(oid)
+    """)
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return "partitioned" if row[0] == 'p' else "flat"
+
+
+def create_processed_data_table(cursor, layout: str = "flat"):
+    """Drop processed_data and create it empty, with its indexes, in ``layout``."""
+    if layout not in PROCESSED_DATA_LAYOUTS:
+        raise ValueError(f"Unknown processed_data layout {layout!r}, expected one of {PROCESSED_DATA_LAYOUTS}")
+
+    if layout == "partitioned":
+        # Partitions are attached per year as data arrives; the parent's indexes cascade to them
+        cursor.execute(f"""
+            DROP TABLE IF EXISTS processed_data;
+            CREATE TABLE processed_data ({PARTITIONED_PROCESSED_DATA_SCHEMA}) PARTITION BY RANGE (trade_date);
+            
+            CREATE UNIQUE INDEX idx_ticker_date ON processed_data(ticker, trade_date);
+            CREATE INDEX idx_date_brin ON processed_data USING brin (trade_date) WITH (autosummarize = on);
+        """)
+    else:
+        cursor.execute(f"""
+            DROP TABLE IF EXISTS processed_data;
+            CREATE TABLE processed_data ({PROCESSED_DATA_SCHEMA});
+            
+            CREATE INDEX idx_ticker ON processed_data(ticker);
+            CREATE INDEX idx_date ON processed_data(trade_date);
+            CREATE UNIQUE INDEX idx_ticker_date ON processed_data(ticker, trade_date);
+        """)
+
+
+def ensure_processed_data_table(cursor, layout: str = None) -> tuple:
+    """
+    Create processed_data and its indexes if they do not exist yet (merge mode).
+
+    ``layout=None`` keeps whatever layout the table already has (``flat`` for
+    a new table). Asking for a different layout than the existing table's
+    raises, since switching needs a full reload. Returns the layout in use
+    and the number of duplicate rows deleted from an older flat table to
+    make ``(ticker, trade_date)`` unique (see ``ensure_unique_index``).
+    """
+    deleted = 0
+    existing = processed_data_layout(cursor)
+    layout = layout or existing or "flat"
+    if layout not in PROCESSED_DATA_LAYOUTS:
+        raise ValueError(f"Unknown processed_data layout {layout!r}, expected one of {PROCESSED_DATA_LAYOUTS}")
+
+    if existing is None and layout == "partitioned":
+        create_processed_data_table(cursor, layout)
+    elif existing not in (None, layout):
+        raise ValueError(
+            f"processed_data uses the {existing} layout; run once with mode: replace to switch to {layout}"
+        )
+    elif layout == "flat":
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS processed_data ({PROCESSED_DATA_SCHEMA});
+            
+            CREATE INDEX IF NOT EXISTS idx_ticker ON processed_data(ticker);
+            CREATE INDEX IF NOT EXISTS idx_date ON processed_data(trade_date);
+        """)
+        deleted = ensure_unique_index(cursor, "idx_ticker_date", "processed_data", PROCESSED_DATA_KEY)
+
+    return layout, deleted
+
+
+def stamp_data_version(cursor, name: str, version: str):
+    """
+    Record in data_versions that ``name`` changed; readers (query.py) cache
+    results per version. Runs in the writer's transaction, so the stamp
+    commits together with the data.
+    """
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS data_versions ({DATA_VERSIONS_SCHEMA});
+        
+        INSERT INTO data_versions (name, version) VALUES (%s, %s)
+        ON CONFLICT (name) DO UPDATE SET version = EXCLUDED.version, updated_at = CURRENT_TIMESTAMP;
+    """, (name, version))
+
+
+def partition_name(year: int) -> str:
+    return f"processed_data_y{year}"
+
+
+def processed_data_partitions(cursor) -> set:
+    """Names of the partitions attached to processed_data."""
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'processed_data'::regclass
+    """)
+    return {name for (name,) in cursor.fetchall()}
+
+
+def attach_partition(cursor, year: int, rows: pd.DataFrame, method: str = "copy", chunk_rows: int = 50_000) -> str:
+    """
+    Load one year of rows into a new table and attach it to processed_data.
+
+    The rows are written in date order so the BRIN index stays selective.
+    A CHECK constraint matching the partition bounds lets ATTACH skip its
+    validation scan, and the partition's indexes are built once, after the
+    load. The last row of a repeated key wins, as in merge mode, since the
+    unique index is built after the load. Returns the load method used.
+    """
+    name = partition_name(year)
+    start, end = f"{year}-01-01", f"{year + 1}-01-01"
+
+    cursor.execute(f"""
+        CREATE TABLE {name} (LIKE processed_data INCLUDING DEFAULTS);
+        ALTER TABLE {name} ADD CONSTRAINT {name}_bounds
+            CHECK (trade_date >= DATE '{start}' AND trade_date < DATE '{end}');
+    """)
+    rows = drop_duplicate_keys(rows)
+    with stage("pg_load_partition"):
+        method = load_frame(cursor, name, rows.sort_values(['trade_date', 'ticker']), method=method, chunk_rows=chunk_rows)
+    with stage("pg_attach_partition"):
+        cursor.execute(f"""
+            ALTER TABLE processed_data ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}');
+            ALTER TABLE {name} DROP CONSTRAINT {name}_bounds;
+        """)
+    return method
+
+
+def create_staging_table(cursor, table: str, columns: list) -> str:
+    """Create an empty temp table with the types of ``columns`` in ``table``."""
+    staging = f"{table}_staging"
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {staging} AS SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+    )
+    return staging
+
+
+def merge_staging(cursor, table: str, staging: str, columns: list, key_columns: list):
+    """
+    Upsert ``staging`` into ``table`` on ``key_columns``.
+
+    Rows whose values are unchanged are left alone, and a key staged more
+    than once is merged from its last staged row. Returns ``(inserted,
+    updated)`` row counts.
+    """
+    value_columns = [col for col in columns if col not in key_columns]
+    column_list = ", ".join(columns)
+    existing = ", ".join(f"{table}.{col}" for col in value_columns)
+    incoming = ", ".join(f"EXCLUDED.{col}" for col in value_columns)
+    assignments = ", ".join(f"{col} = EXCLUDED.{col}" for col in value_columns)
+    key_list = ", ".join(key_columns)
+
+    # A key staged twice would make ON CONFLICT touch a row twice; the last one staged wins
+    cursor.execute(f"""
+        WITH merged AS (
+            INSERT INTO {table} ({column_list})
+            SELECT DISTINCT ON ({key_list}) {column_list} FROM {staging}
+            ORDER BY {key_list}, ctid DESC
+            ON CONFLICT ({key_list}) DO UPDATE SET {assignments}
+            WHERE ({existing}) IS DISTINCT FROM ({incoming})
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT
+            COUNT(*) FILTER (WHERE inserted),
+            COUNT(*) FILTER (WHERE NOT inserted)
+        FROM merged
+    """)
+    inserted, updated = cursor.fetchone()
+    return inserted, updated
+
+
+def merge_frame(cursor, table: str, df: pd.DataFrame, key_columns: list, method: str = "copy", chunk_rows: int = 50_000):
+    """
+    Load ``df`` into a staging table and upsert it into ``table``.
+
+    Returns ``(method, inserted, updated)``.
+    """
+    staging = create_staging_table(cursor, table, list(df.columns))
+    with stage("pg_load_staging"):
+        method = load_frame(cursor, staging, df, method=method, chunk_rows=chunk_rows)
+    with stage("pg_merge"):
+        inserted, updated = merge_staging(cursor, table, staging, list(df.columns), key_columns)
+    cursor.execute(f"DROP TABLE {staging}")
+    return method, inserted, updated
+
+
+def merge_processed_data(cursor, rows: pd.DataFrame, layout: str, method: str = "copy", chunk_rows: int = 50_000):
+    """
+    Upsert ``to_processed_rows`` output into processed_data.
+
+    In the partitioned layout, rows of years that have no partition yet are
+    attached as new partitions and only the rest go through the staging
+    upsert. Returns ``(method, inserted, updated, attached partitions)``.
+    """
+    inserted, updated, attached = 0, 0, []
+
+    if layout == "partitioned":
+        years = pd.to_datetime(rows['trade_date']).dt.year
+        existing = processed_data_partitions(cursor)
+        new = ~years.map(partition_name).isin(existing)
+
+        for year, part in rows[new].groupby(years[new]):
+            # Counted without the repeated keys attach_partition drops
+            part = drop_duplicate_keys(part)
+            method = attach_partition(cursor, int(year), part, method=method, chunk_rows=chunk_rows)
+            attached.append(partition_name(int(year)))
+            inserted += len(part)
+        rows = rows[~new]
+
+    if len(rows):
+        method, merged, updated = merge_frame(cursor, "processed_data", rows, PROCESSED_DATA_KEY, method=method, chunk_rows=chunk_rows)
+        inserted += merged
+
+    return method, inserted, updated, attached
+
+
+def replace_processed_data(cursor, rows: pd.DataFrame, layout: str = "flat", method: str = "copy", chunk_rows: int = 50_000):
+    """
+    Drop processed_data, recreate it in ``layout`` and load ``rows`` (the
+    last row of a repeated key wins, as in merge mode).
+
+    Returns ``(method, rows written, attached partitions)``.
+    """
+    create_processed_data_table(cursor, layout)
+    rows = drop_duplicate_keys(rows)
+    if layout != "partitioned":
+        return load_frame(cursor, "processed_data", rows, method=method, chunk_rows=chunk_rows), len(rows), []
+
+    attached = []
+    years = pd.to_datetime(rows['trade_date']).dt.year
+    for year, part in rows.groupby(years):
+        method = attach_partition(cursor, int(year), part, method=method, chunk_rows=chunk_rows)
+        attached.append(partition_name(int(year)))
+    return method, len(rows), attached
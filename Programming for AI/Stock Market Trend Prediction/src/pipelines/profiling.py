@@ -0,0 +1,316 @@
+"""
+Profiling of asset and asset check executions.
+
+``@profiled`` goes directly under ``@asset`` / ``@asset_check`` (or ``@op``
+inside a graph-backed asset) and records, for every execution:
+
+- wall time and CPU time (user + system, including child processes the step
+  waited for, e.g. process pools) and their ratio
+- peak resident memory of the step process
+- rows in (DataFrame inputs) and rows out (a DataFrame output)
+- bytes read and written by the process, files and sockets alike (Linux
+  ``/proc/self/io`` or psutil)
+- sub-timings of ``stage("name")`` blocks run inside the asset, including in
+  the helpers it calls and in its worker threads
+
+CPU time and I/O bytes are per process. An execution profiled on a worker
+thread measures its own thread's CPU time instead and reports no I/O bytes,
+which cannot be told apart from the other threads' (``profile_cpu_scope``).
+
+The numbers are attached as ``profile_*`` metadata on the materialization (or
+the check result). ``ProfilingResource`` can also write them to a Prometheus
+textfile-collector directory and export a span per execution, with a child
+span per stage, through OpenTelemetry.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import pandas as pd
+from dagster import AssetCheckResult, ConfigurableResource
+
+from .schemas import peak_rss_mb
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+PROFILING_PARAM = "profiling"
+METRIC_PREFIX = "pipeline_asset"
+
+# Stage spans kept per execution; sub-timings are still summed past this
+MAX_STAGE_SPANS = 1_000
+
+# Executions being profiled in this process (innermost last), and per thread for
+# executions that run side by side on a thread pool
+_active = []
+_local = threading.local()
+_lock = threading.Lock()
+
+# TracerProvider set up for an ``otlp_endpoint``, by endpoint
+_providers = {}
+
+
+class Profile:
+    """Stage timings collected while one asset or check runs."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.spans = []
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        with _lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + (end_ns - start_ns) / 1e9
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+            if len(self.spans) < MAX_STAGE_SPANS:
+                self.spans.append((name, start_ns, end_ns))
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as a sub-stage of the asset being profiled; a no-op outside one."""
+    # The thread's own execution, else the latest one (a worker thread started by an asset)
+    stack = getattr(_local, "stack", None)
+    profile = stack[-1] if stack else (_active[-1] if _active else None)
+    if profile is None:
+        yield
+        return
+
+    start_ns = time.time_ns()
+    try:
+        yield
+    finally:
+        profile.record(name, start_ns, time.time_ns())
+
+
+def _io_counters():
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+            # read_chars/write_chars (Linux) include cached and socket I/O like /proc/self/io
+            return (
+                getattr(counters, 'read_chars', counters.read_bytes),
+                getattr(counters, 'write_chars', counters.write_bytes),
+            )
+        except (AttributeError, psutil.Error):
+            # macOS has no per-process I/O counters
+            return None
+
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _snapshot() -> dict:
+    if threading.current_thread() is not threading.main_thread():
+        # Other threads of the process may be working at the same time
+        return {"wall": time.perf_counter(), "cpu": time.thread_time(), "io": None, "time_ns": time.time_ns(), "scope": "thread"}
+
+    times = os.times()
+    return {
+        "wall": time.perf_counter(),
+        "cpu": times.user + times.system + times.children_user + times.children_system,
+        "io": _io_counters(),
+        "time_ns": time.time_ns(),
+        "scope": "process",
+    }
+
+
+def _rows(value) -> int:
+    return len(value) if isinstance(value, pd.DataFrame) else 0
+
+
+class ProfilingResource(ConfigurableResource):
+    """Where ``@profiled`` sends its measurements besides the Dagster metadata."""
+
+    # Directory of node_exporter's textfile collector; one <asset>.prom file per asset
+    prometheus_dir: Optional[str] = None
+    # Export a span per execution through the globally configured OpenTelemetry tracer
+    opentelemetry: bool = False
+    # OTLP/HTTP endpoint (e.g. http://localhost:4318/v1/traces); sets up the OpenTelemetry SDK when given
+    otlp_endpoint: Optional[str] = None
+
+    def _tracer(self):
+        if trace is None:
+            return None
+        if not self.otlp_endpoint:
+            return trace.get_tracer(__name__)
+
+        provider = _providers.get(self.otlp_endpoint)
+        if provider is None:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            provider = TracerProvider(resource=Resource.create({"service.name": "stock-etl"}))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=self.otlp_endpoint)))
+            _providers[self.otlp_endpoint] = provider
+        return provider.get_tracer(__name__)
+
+    def export(self, kind: str, profile: Profile, metrics: dict, start_ns: int, end_ns: int, error: str = None):
+        if self.prometheus_dir:
+            write_prometheus_textfile(self.prometheus_dir, kind, profile, metrics, error)
+
+        if self.opentelemetry or self.otlp_endpoint:
+            tracer = self._tracer()
+            if tracer is None:
+                return
+
+            span = tracer.start_span(f"{kind} {profile.name}", start_time=start_ns)
+            span.set_attributes({f"profile.{k}": v for k, v in metrics.items() if v is not None})
+            if error is not None:
+                span.set_status(trace.Status(trace.StatusCode.ERROR, error))
+
+            parent = trace.set_span_in_context(span)
+            for name, stage_start, stage_end in profile.spans:
+                tracer.start_span(name, context=parent, start_time=stage_start).end(end_time=stage_end)
+            span.end(end_time=end_ns)
+
+            # Step processes exit right after the asset, before a batch would be sent
+            provider = _providers.get(self.otlp_endpoint)
+            if provider is not None:
+                provider.force_flush()
+
+
+def write_prometheus_textfile(directory: str, kind: str, profile: Profile, metrics: dict, error: str = None):
+    """Write the latest execution of an asset as ``<asset>.prom`` in the Prometheus text format."""
+    # Assets and checks share one label set; node_exporter rejects inconsistent ones
+    labels = f'name="{profile.name}",kind="{kind}"'
+    lines = []
+
+    for key, value in metrics.items():
+        if value is None:
+            continue
+        metric = f"{METRIC_PREFIX}_{key}"
+        lines += [f"# TYPE {metric} gauge", f"{metric}{{{labels}}} {value}"]
+
+    metric = f"{METRIC_PREFIX}_stage_seconds"
+    lines.append(f"# TYPE {metric} gauge")
+    for name, seconds in profile.stage_seconds.items():
+        lines.append(f'{metric}{{{labels},stage="{name}"}} {seconds:.6f}')
+
+    metric = f"{METRIC_PREFIX}_success"
+    lines += [f"# TYPE {metric} gauge", f"{metric}{{{labels}}} {0 if error else 1}"]
+
+    metric = f"{METRIC_PREFIX}_last_run_timestamp_seconds"
+    lines += [f"# TYPE {metric} gauge", f"{metric}{{{labels}}} {time.time():.3f}"]
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{profile.name}.prom")
+
+    # The collector may read at any time, so the file is swapped in whole
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _measurements(before: dict, after: dict, rows_in: int, rows_out) -> dict:
+    wall = after["wall"] - before["wall"]
+    cpu = after["cpu"] - before["cpu"]
+    io_before, io_after = before["io"], after["io"]
+
+    return {
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4),
+        # Above 1 means the asset kept more than one core busy
+        "cpu_utilization": round(cpu / wall, 3) if wall > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "bytes_read": io_after[0] - io_before[0] if io_before and io_after else None,
+        "bytes_written": io_after[1] - io_before[1] if io_before and io_after else None,
+    }
+
+
+def profiled(fn):
+    """
+    Profile an asset or asset check (see the module docstring).
+
+    Adds a ``profiling`` resource parameter to the signature. On assets it
+    must be the decorator closest to ``@asset`` so cache lookups are
+    measured too.
+    """
+    signature = inspect.signature(fn)
+    parameters = list(signature.parameters.values())
+    parameters.append(
+        inspect.Parameter(PROFILING_PARAM, inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=ProfilingResource)
+    )
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiling = kwargs.pop(PROFILING_PARAM)
+
+        # Assets take the context first; asset checks here take only the asset value
+        context = args[0] if args and hasattr(args[0], "add_output_metadata") else None
+        if context is None:
+            kind, name = "check", fn.__name__
+        elif context.op_execution_context.op_handle.parent is not None:
+            # Ops of a graph-backed asset are profiled one by one
+            kind, name = "op", f"{context.asset_key.to_python_identifier()}.{context.op_def.name}"
+        else:
+            kind, name = "asset", context.asset_key.to_python_identifier()
+
+        rows_in = sum(_rows(value) for value in [*args, *kwargs.values()])
+        profile = Profile(name)
+
+        stack = _local.__dict__.setdefault("stack", [])
+        with _lock:
+            _active.append(profile)
+        stack.append(profile)
+        before = _snapshot()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            after = _snapshot()
+            profiling.export(kind, profile, _measurements(before, after, rows_in, None), before["time_ns"], after["time_ns"], str(e))
+            raise
+        finally:
+            stack.remove(profile)
+            with _lock:
+                _active.remove(profile)
+        after = _snapshot()
+
+        metrics = _measurements(before, after, rows_in, len(result) if isinstance(result, pd.DataFrame) else None)
+        profiling.export(kind, profile, metrics, before["time_ns"], after["time_ns"])
+
+        metadata = {f"profile_{key}": value for key, value in metrics.items() if value is not None}
+        metadata["profile_cpu_scope"] = before["scope"]
+        if profile.stage_seconds:
+            metadata["profile_stage_seconds"] = {k: round(v, 4) for k, v in profile.stage_seconds.items()}
+            metadata["profile_stage_calls"] = profile.stage_calls
+
+        if isinstance(result, AssetCheckResult):
+            return AssetCheckResult(
+                passed=result.passed,
+                asset_key=result.asset_key,
+                check_name=result.check_name,
+                metadata={**result.metadata, **metadata},
+                severity=result.severity,
+                description=result.description,
+            )
+
+        context.add_output_metadata(metadata)
+        return result
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    wrapper.__annotations__ = {**fn.__annotations__, PROFILING_PARAM: ProfilingResource}
+    return wrapper
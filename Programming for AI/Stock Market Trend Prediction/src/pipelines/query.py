@@ -0,0 +1,353 @@
+"""
+Read-side queries over the stored stock data.
+
+    query = StockDataQuery(postgres_connection, mongodb_connection)
+    features = query.get_features(["AAPL", "MSFT"], "2020-01-01", "2021-12-31")  # pyarrow.Table
+    bars = query.get_ohlcv("AAPL", start="2024-01-01", format="numpy")           # {column: ndarray}
+
+Feature rows come from processed_data through a server-side (named) cursor
+and OHLCV bars from the ``raw_stock_data`` MongoDB collection (one
+(ticker, date) index range per ticker); both are fetched ``fetch_rows`` at a time and turned into Arrow
+record batches, so rows never pile up as Python tuples or documents.
+``iter_features`` / ``iter_ohlcv`` hand those batches out as they arrive.
+
+``get_features`` / ``get_ohlcv`` keep their results in a bounded LRU cache
+keyed on the query and the data version of its source. The storage assets
+stamp a new version (their run id) into ``data_versions`` whenever they change
+processed_data or the raw collections, so a cached window is served until a
+materialization changes the data, whichever process it ran in. Checking the
+version is a single primary-key lookup; a source that has never been stamped
+is not cached.
+"""
+
+import collections
+import itertools
+import threading
+import uuid
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import pyarrow as pa
+
+from .mongo_load import DATA_VERSIONS_COLLECTION, RAW_COLLECTION
+from .pg_load import INTEGER_COLUMNS, PROCESSED_DATA_COLUMNS
+from .resources import MongoDBResource, PostgreSQLResource
+
+
+FEATURES_SOURCE = "processed_data"
+OHLCV_SOURCE = RAW_COLLECTION
+
+# Training dataset column -> processed_data column
+_FEATURE_SOURCES = {name: column for column, name in PROCESSED_DATA_COLUMNS.items()}
+
+OHLCV_SCHEMA = pa.schema([
+    ('Date', pa.timestamp('us')),
+    ('Ticker', pa.string()),
+    ('Open', pa.float64()),
+    ('High', pa.float64()),
+    ('Low', pa.float64()),
+    ('Close', pa.float64()),
+    ('Volume', pa.int64()),
+])
+
+
+def _feature_type(column: str) -> pa.DataType:
+    if column == 'trade_date':
+        return pa.date32()
+    if column in ('ticker', 'trend'):
+        return pa.string()
+    if column in INTEGER_COLUMNS:
+        return pa.int64()
+    return pa.float64()
+
+
+def _select_expression(column: str) -> str:
+    # NUMERIC columns of the flat layout would arrive as Decimal
+    return f"{column}::float8 AS {column}" if _feature_type(column) == pa.float64() else column
+
+
+def _tickers(tickers) -> Optional[tuple]:
+    if tickers is None:
+        return None
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    return tuple(sorted(set(tickers)))
+
+
+def _timestamp(value) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value)
+
+
+def _blocks(rows, size: int) -> Iterator[list]:
+    while True:
+        block = list(itertools.islice(rows, size))
+        if not block:
+            return
+        yield block
+
+
+def _as_format(table: pa.Table, format: str):
+    if format == "arrow":
+        return table
+    if format == "numpy":
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    raise ValueError(f"Unknown format {format!r}, expected 'arrow' or 'numpy'")
+
+
+class _LRUCache:
+    """Thread-safe LRU of Arrow tables, bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            table = self._entries.get(key)
+            if table is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return table
+
+    def put(self, key, table: pa.Table):
+        with self._lock:
+            if key in self._entries or table.nbytes > self.max_bytes:
+                return
+            self._entries[key] = table
+            self._bytes += table.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def discard(self, source: str, keep_version: str):
+        """Drop the entries of ``source`` cached under any other version."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == source and key[-1] != keep_version]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class StockDataQuery:
+    """
+    Cached reads of processed_data (PostgreSQL) and the raw OHLCV collections
+    (MongoDB) as Arrow tables or NumPy column blocks.
+    """
+
+    def __init__(
+        self,
+        postgres: PostgreSQLResource = None,
+        mongodb: MongoDBResource = None,
+        fetch_rows: int = 10_000,
+        cache_entries: int = 128,
+        cache_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.postgres = postgres
+        self.mongodb = mongodb
+        self.fetch_rows = fetch_rows
+        self.cache = _LRUCache(cache_entries, cache_bytes)
+        self._versions = {}
+
+    # Data versions
+
+    def data_version(self, source: str) -> Optional[str]:
+        """Current version stamp of ``FEATURES_SOURCE`` or ``OHLCV_SOURCE``, None if never stamped."""
+        if source == FEATURES_SOURCE:
+            with self.postgres.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("SELECT version FROM data_versions WHERE name = %s", (source,))
+                    row = cursor.fetchone()
+                except psycopg2.errors.UndefinedTable:
+                    row = None
+                finally:
+                    cursor.close()
+                    conn.rollback()
+            return row[0] if row else None
+
+        if source == OHLCV_SOURCE:
+            doc = self.mongodb.get_collection(DATA_VERSIONS_COLLECTION).find_one({"_id": source})
+            return doc["version"] if doc else None
+
+        raise ValueError(f"Unknown source {source!r}")
+
+    def _cached(self, source: str, key: tuple, load) -> pa.Table:
+        version = self.data_version(source)
+        if version is None:
+            return load()
+
+        if self._versions.get(source) != version:
+            self._versions[source] = version
+            self.cache.discard(source, version)
+
+        key = (source, *key, version)
+        table = self.cache.get(key)
+        if table is None:
+            table = load()
+            self.cache.put(key, table)
+        return table
+
+    def cache_info(self) -> dict:
+        return {**self.cache.info(), "versions": dict(self._versions)}
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    # Features (PostgreSQL)
+
+    def _feature_columns(self, columns: Optional[List[str]]) -> list:
+        if columns is None:
+            columns = list(_FEATURE_SOURCES)
+        names = ['Date', 'Ticker'] + [name for name in columns if name not in ('Date', 'Ticker')]
+        unknown = [name for name in names if name not in _FEATURE_SOURCES]
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {unknown}")
+        return names
+
+    def iter_features(self, tickers=None, start=None, end=None, columns: List[str] = None) -> Iterator[pa.RecordBatch]:
+        """
+        Stream processed_data rows (``start``/``end`` dates inclusive) as
+        record batches of up to ``fetch_rows`` rows, ordered by ticker and date.
+        A pooled connection is held until the iterator is exhausted or closed.
+        """
+        names = self._feature_columns(columns)
+        sources = [_FEATURE_SOURCES[name] for name in names]
+        schema = pa.schema([(name, _feature_type(column)) for name, column in zip(names, sources)])
+
+        conditions, params = [], []
+        tickers = _tickers(tickers)
+        if tickers is not None:
+            conditions.append("ticker = ANY(%s)")
+            params.append(list(tickers))
+        if start is not None:
+            conditions.append("trade_date >= %s")
+            params.append(pd.Timestamp(start).date())
+        if end is not None:
+            conditions.append("trade_date <= %s")
+            params.append(pd.Timestamp(end).date())
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.postgres.connection() as conn:
+            # A named cursor keeps the result set on the server; fetchmany pulls one block at a time
+            cursor = conn.cursor(name=f"features_{uuid.uuid4().hex}")
+            try:
+                cursor.itersize = self.fetch_rows
+                cursor.execute(
+                    f"SELECT {', '.join(map(_select_expression, sources))} FROM processed_data {where} "
+                    f"ORDER BY ticker, trade_date",
+                    params,
+                )
+                while True:
+                    rows = cursor.fetchmany(self.fetch_rows)
+                    if not rows:
+                        break
+                    yield pa.RecordBatch.from_arrays(
+                        [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                        schema=schema,
+                    )
+            finally:
+                cursor.close()
+                conn.rollback()
+
+    def get_features(self, tickers=None, start=None, end=None, columns: List[str] = None, format: str = "arrow"):
+        """
+        processed_data rows of ``tickers`` (all when None) between ``start``
+        and ``end`` (inclusive, open-ended when None), named like the training
+        dataset. ``columns`` narrows the feature columns; Date and Ticker are
+        always included. Returns a ``pyarrow.Table`` or, with
+        ``format="numpy"``, a dict of column arrays.
+        """
+        names = self._feature_columns(columns)
+        key = ("features", _tickers(tickers), str(_timestamp(start)), str(_timestamp(end)), tuple(names))
+
+        def load():
+            schema = pa.schema([(name, _feature_type(_FEATURE_SOURCES[name])) for name in names])
+            return pa.Table.from_batches(list(self.iter_features(tickers, start, end, names)), schema=schema)
+
+        return _as_format(self._cached(FEATURES_SOURCE, key, load), format)
+
+    # OHLCV (MongoDB)
+
+    def ohlcv_tickers(self) -> list:
+        """Tickers with bars in the raw_stock_data collection."""
+        return sorted(self.mongodb.get_collection(RAW_COLLECTION).distinct("ticker"))
+
+    def iter_ohlcv(self, tickers=None, start=None, end=None) -> Iterator[pa.RecordBatch]:
+        """
+        Stream raw bars (``start``/``end`` inclusive; a date ``end`` covers the
+        whole day) as record batches of up to ``fetch_rows`` rows, ordered by
+        ticker and date.
+        """
+        tickers = self.ohlcv_tickers() if tickers is None else _tickers(tickers)
+
+        dates = {}
+        if start is not None:
+            dates["$gte"] = pd.Timestamp(start).isoformat()
+        if end is not None:
+            end = pd.Timestamp(end)
+            if end == end.normalize():
+                dates["$lt"] = (end + pd.Timedelta(days=1)).isoformat()
+            else:
+                dates["$lte"] = end.isoformat()
+
+        collection = self.mongodb.get_collection(RAW_COLLECTION)
+        for ticker in tickers:
+            query = {"ticker": ticker}
+            if dates:
+                query["date"] = dates
+
+            cursor = collection.find(
+                query, {"_id": 0, "date": 1, "ohlcv": 1}, batch_size=self.fetch_rows
+            ).sort("date", 1)
+
+            for docs in _blocks(iter(cursor), self.fetch_rows):
+                bars = [doc["ohlcv"] for doc in docs]
+                volume = [bar.get("volume") for bar in bars]
+                yield pa.RecordBatch.from_arrays(
+                    [
+                        pa.array(np.array([doc["date"] for doc in docs], dtype='datetime64[us]')),
+                        pa.array([ticker] * len(docs), type=pa.string()),
+                        *[pa.array([bar.get(field) for bar in bars], type=pa.float64()) for field in ("open", "high", "low", "close")],
+                        pa.array(volume, type=pa.int64()),
+                    ],
+                    schema=OHLCV_SCHEMA,
+                )
+
+    def get_ohlcv(self, tickers=None, start=None, end=None, format: str = "arrow"):
+        """
+        Raw OHLCV bars of ``tickers`` (all stored tickers when None) between
+        ``start`` and ``end``, as a ``pyarrow.Table`` or, with
+        ``format="numpy"``, a dict of column arrays.
+        """
+        key = ("ohlcv", _tickers(tickers), str(_timestamp(start)), str(_timestamp(end)))
+
+        def load():
+            return pa.Table.from_batches(list(self.iter_ohlcv(tickers, start, end)), schema=OHLCV_SCHEMA)
+
+        return _as_format(self._cached(OHLCV_SOURCE, key, load), format)
@@ -0,0 +1,286 @@
+"""
+Parsers for the raw yfinance files in data/raw.
+
+CSV files carry a three-line header (Price/Ticker/Date) followed by one row
+per trading day; they are parsed with explicit column types by pyarrow's CSV
+reader when pyarrow is installed. JSON files are ``DataFrame.to_json`` dumps
+keyed by ``"('Close', 'AAPL')"`` style tuple strings and epoch-millisecond
+timestamps; they are decoded with ``orjson`` when it is installed.
+"""
+
+import hashlib
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from .profiling import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    pa_csv = None
+    CSV_ENGINE = "c"
+
+
+NUMERIC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+CSV_HEADER_LINES = 3
+
+# Dtypes of the yfinance price columns; the first column holds the date
+CSV_DTYPES = {
+    'Close': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Open': 'float64',
+    'Volume': 'int64',
+}
+
+
+def _finalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Converting Date to datetime
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    df = df.dropna(subset=['Date'])
+
+    # Ensuring numeric columns
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    return df
+
+
+def _csv_column_types(column_names: list) -> dict:
+    column_types = {
+        col: pa.from_numpy_dtype(np.dtype(CSV_DTYPES[col]))
+        for col in column_names
+        if col in CSV_DTYPES
+    }
+    column_types[column_names[0]] = pa.timestamp('us')
+    return column_types
+
+
+def _parse_csv_bytes(data: bytes, column_names: list) -> pd.DataFrame:
+    if pa_csv is not None:
+        try:
+            table = pa_csv.read_csv(
+                io.BytesIO(data),
+                read_options=pa_csv.ReadOptions(column_names=column_names),
+                convert_options=pa_csv.ConvertOptions(column_types=_csv_column_types(column_names)),
+            )
+            return table.to_pandas()
+        except pa.ArrowInvalid:
+            # Unparseable dates or stray text in a price column
+            pass
+
+    # Inferring dtypes and coercing afterwards; round_trip matches pyarrow's float parsing
+    return pd.read_csv(io.BytesIO(data), header=None, names=column_names, float_precision='round_trip')
+
+
+def read_stock_csv(file_path: str, offset: int = 0, column_names: list = None):
+    """
+    Parse a yfinance CSV starting at byte ``offset``.
+
+    With ``offset=0`` the header is read from the file. Any other offset must
+    point at the start of a data line and ``column_names`` must be the header
+    captured when that offset was recorded.
+
+    Returns ``(df, column_names, next_offset)`` where ``next_offset`` is the
+    position just after the last complete line, so the next call only parses
+    what was appended since. Only complete lines are parsed: a last line
+    still being written is left for the next call, so ``df`` and
+    ``next_offset`` always cover the same bytes.
+    """
+    with open(file_path, 'rb') as f:
+        if offset == 0:
+            column_names = f.readline().decode('utf-8').strip().split(',')
+            for _ in range(CSV_HEADER_LINES - 1):
+                f.readline()
+        else:
+            f.seek(offset)
+
+        start = f.tell()
+        data = f.read()
+
+    # An unterminated last line may be half-written; it is parsed once it is complete
+    data = data[:data.rfind(b'\n') + 1]
+    next_offset = start + len(data)
+
+    if data.strip():
+        with stage("csv_parse"):
+            df = _parse_csv_bytes(data, column_names)
+    else:
+        df = pd.DataFrame(columns=column_names)
+
+    # Renaming 'Price' column to 'Date'
+    if 'Price' in df.columns:
+        df.rename(columns={'Price': 'Date'}, inplace=True)
+
+    return _finalize_frame(df), column_names, next_offset
+
+
+def _iter_arrow_csv(file_path: str, column_names: list, chunk_rows: int):
+    # Re-slicing pyarrow's byte-sized record batches into chunk_rows tables
+    reader = pa_csv.open_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(column_names=column_names, skip_rows=CSV_HEADER_LINES),
+        convert_options=pa_csv.ConvertOptions(column_types=_csv_column_types(column_names)),
+    )
+    pending, pending_rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_rows).to_pandas()
+            rest = table.slice(chunk_rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def _iter_pandas_csv(file_path: str, column_names: list, chunk_rows: int, skip_rows: int = 0):
+    reader = pd.read_csv(
+        file_path,
+        skiprows=CSV_HEADER_LINES,
+        header=None,
+        names=column_names,
+        float_precision='round_trip',
+        chunksize=chunk_rows,
+    )
+    with reader:
+        for df in reader:
+            if skip_rows >= len(df):
+                skip_rows -= len(df)
+                continue
+            yield df.iloc[skip_rows:]
+            skip_rows = 0
+
+
+def iter_stock_csv(file_path: str, chunk_rows: int = 50_000):
+    """
+    Parse a yfinance CSV ``chunk_rows`` lines at a time.
+
+    Yields frames shaped like ``read_stock_csv`` output; only one chunk of
+    the file is parsed and held in memory at once.
+    """
+    with open(file_path, 'rb') as f:
+        column_names = f.readline().decode('utf-8').strip().split(',')
+
+    # Rows already yielded when pyarrow gives up part-way through the file
+    rows = 0
+    if pa_csv is not None:
+        try:
+            for df in _iter_arrow_csv(file_path, column_names, chunk_rows):
+                rows += len(df)
+                yield _finalize_frame(df.rename(columns={'Price': 'Date'}))
+            return
+        except pa.ArrowInvalid:
+            # Unparseable dates or stray text: inferring dtypes for the rest of the file
+            pass
+
+    for df in _iter_pandas_csv(file_path, column_names, chunk_rows, skip_rows=rows):
+        # Renaming 'Price' column to 'Date'
+        yield _finalize_frame(df.rename(columns={'Price': 'Date'}))
+
+
+def _load_json_payload(file_path: str) -> dict:
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _parse_column_key(key: str, default_ticker: str):
+    # "('Close', 'AAPL')" -> ('Close', 'AAPL'); a bare "Close" keeps the file's ticker
+    parts = key.split("'")
+    if len(parts) >= 4:
+        return parts[1], parts[3]
+    return key, default_ticker
+
+
+def _column_array(values) -> np.ndarray:
+    array = np.array(values)
+    if array.dtype == object:
+        # Nulls in the payload come through as None
+        array = pd.to_numeric(array, errors='coerce')
+    return array
+
+
+def decode_stock_json(data: dict, default_ticker: str = None) -> pd.DataFrame:
+    """
+    Decode a column-oriented yfinance payload into one row per (ticker, timestamp).
+
+    Each column is built as a NumPy array straight from the payload instead of
+    going through a dict per row. Payloads from multi-ticker downloads
+    (``"('Close', 'AAPL')"``, ``"('Close', 'MSFT')"``, ...) yield rows for
+    every ticker; single-column keys fall back to ``default_ticker``.
+    """
+    # Grouping column keys by ticker, keeping payload order
+    by_ticker = {}
+    for key, values in data.items():
+        col_name, ticker = _parse_column_key(key, default_ticker)
+        by_ticker.setdefault(ticker, []).append((col_name, values))
+
+    frames = []
+    for ticker, columns in by_ticker.items():
+        first_keys = list(columns[0][1].keys())
+
+        if all(list(values.keys()) == first_keys for _, values in columns[1:]):
+            # All columns share one timestamp axis (the yfinance layout)
+            timestamps = np.fromiter(map(int, first_keys), dtype=np.int64, count=len(first_keys))
+            arrays = {
+                col_name: _column_array(list(values.values()))
+                for col_name, values in columns
+            }
+        else:
+            # Ragged columns: aligning on the union of timestamps in first-seen order
+            all_keys = list(dict.fromkeys(k for _, values in columns for k in values))
+            timestamps = np.fromiter(map(int, all_keys), dtype=np.int64, count=len(all_keys))
+            axis = pd.Index(timestamps)
+
+            arrays = {}
+            for col_name, values in columns:
+                keys = np.fromiter(map(int, values.keys()), dtype=np.int64, count=len(values))
+                column = pd.Series(_column_array(list(values.values())), index=keys)
+                arrays[col_name] = column.reindex(axis).to_numpy()
+
+        df = pd.DataFrame(arrays)
+
+        # Converting timestamp (ms) to date
+        df['Date'] = pd.to_datetime(timestamps, unit='ms')
+        df['Ticker'] = ticker
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=NUMERIC_COLUMNS + ['Date', 'Ticker'])
+
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return _finalize_frame(df)
+
+
+def read_stock_json(file_path: str, default_ticker: str = None) -> pd.DataFrame:
+    """Parse a yfinance ``to_json`` dump (single or multi-ticker) into one row per timestamp."""
+    with stage("json_decode"):
+        data = _load_json_payload(file_path)
+    with stage("frame_build"):
+        return decode_stock_json(data, default_ticker)
+
+
+def read_tail_digest(file_path: str, offset: int, size: int = 4096) -> str:
+    """Hex digest of the ``size`` bytes before ``offset``, used to detect rewrites."""
+    with open(file_path, 'rb') as f:
+        f.seek(max(offset - size, 0))
+        chunk = f.read(min(offset, size))
+    return hashlib.sha1(chunk).hexdigest()
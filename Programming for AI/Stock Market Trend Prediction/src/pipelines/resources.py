@@ -1,7 +1,160 @@
 from dagster import ConfigurableResource
 import psycopg2
-from pymongo import MongoClient
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
+from pymongo import MongoClient, monitoring
+from contextlib import contextmanager
+import atexit
 import os
+import threading
+import time
+
+
+class PoolStats:
+    """Counters shared by every user of one process-wide connection pool."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.in_use = 0
+        self.opened = 0
+        self.closed = 0
+    
+    def record_checkout(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+    
+    def record_checkin(self):
+        with self._lock:
+            self.in_use -= 1
+    
+    def record_open(self):
+        with self._lock:
+            self.opened += 1
+    
+    def record_close(self):
+        with self._lock:
+            self.closed += 1
+    
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "in_use": self.in_use,
+                "open_connections": self.opened - self.closed,
+                "total_wait_seconds": round(self.wait_seconds, 4),
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+            }
+
+
+class _PostgresPool:
+    """
+    ThreadedConnectionPool that blocks when exhausted instead of raising.
+    
+    A semaphore sized to ``maxconn`` gates ``getconn`` so callers queue for a
+    free connection, and the time spent queueing is recorded in ``stats``.
+    """
+    
+    def __init__(self, minconn: int, maxconn: int, **connect_kwargs):
+        self.pool = ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.stats = PoolStats()
+    
+    def getconn(self):
+        start = time.perf_counter()
+        self.slots.acquire()
+        
+        try:
+            conn = self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+        
+        self.stats.record_checkout(time.perf_counter() - start)
+        return conn
+    
+    def putconn(self, conn):
+        broken = bool(conn.closed)
+        
+        try:
+            if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                # Handing connections back without an open transaction
+                conn.rollback()
+            self.pool.putconn(conn, close=broken)
+        finally:
+            self.stats.record_checkin()
+            self.slots.release()
+    
+    def stats_dict(self) -> dict:
+        stats = self.stats.as_dict()
+        # Connections are opened lazily and ones beyond minconn are closed on return
+        stats["open_connections"] = len(self.pool._pool) + len(self.pool._used)
+        return stats
+    
+    def closeall(self):
+        if not self.pool.closed:
+            self.pool.closeall()
+
+
+class _MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Feeds pymongo connection pool events into a PoolStats."""
+    
+    def __init__(self, stats: PoolStats):
+        self.stats = stats
+        self._started = threading.local()
+    
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+    
+    def connection_checked_out(self, event):
+        started = getattr(self._started, "at", None)
+        self.stats.record_checkout(time.perf_counter() - started if started else 0.0)
+    
+    def connection_checked_in(self, event):
+        self.stats.record_checkin()
+    
+    def connection_created(self, event):
+        self.stats.record_open()
+    
+    def connection_closed(self, event):
+        self.stats.record_close()
+    
+    def connection_check_out_failed(self, event):
+        pass
+    
+    def connection_ready(self, event):
+        pass
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+
+
+# Process-wide pools, keyed by connection settings and pid (pools never cross a fork)
+_postgres_pools = {}
+_mongo_clients = {}
+_registry_lock = threading.Lock()
+
+
+@atexit.register
+def _close_pools():
+    for pool in _postgres_pools.values():
+        pool.closeall()
+    for client, _ in _mongo_clients.values():
+        client.close()
 
 
 class PostgreSQLResource(ConfigurableResource):
@@ -11,6 +164,9 @@ class PostgreSQLResource(ConfigurableResource):
     password: str = "dap"
     host: str = "localhost"
     port: str = "5432"
+    # Idle connections kept open; checkouts beyond max_connections wait for a free one
+    min_connections: int = 2
+    max_connections: int = 10
     
     def get_connection(self):
         
@@ -21,15 +177,63 @@ class PostgreSQLResource(ConfigurableResource):
             host=self.host,
             port=self.port
         )
+    
+    def _get_pool(self) -> _PostgresPool:
+        key = (os.getpid(), self.dbname, self.user, self.password, self.host, self.port)
+        
+        with _registry_lock:
+            pool = _postgres_pools.get(key)
+            if pool is None:
+                pool = _PostgresPool(
+                    self.min_connections,
+                    self.max_connections,
+                    dbname=self.dbname,
+                    user=self.user,
+                    password=self.password,
+                    host=self.host,
+                    port=self.port,
+                )
+                _postgres_pools[key] = pool
+        return pool
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection; it is rolled back (if needed) and returned on exit."""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            pool.putconn(conn)
+    
+    def pool_stats(self) -> dict:
+        return self._get_pool().stats_dict()
 
 
 class MongoDBResource(ConfigurableResource):
     
     connection_string: str = "mongodb://localhost:27017/"
     database_name: str = "stock_market_etl"
+    max_pool_size: int = 100
+    
+    def _get_cached_client(self):
+        key = (os.getpid(), self.connection_string, self.max_pool_size)
+        
+        with _registry_lock:
+            cached = _mongo_clients.get(key)
+            if cached is None:
+                stats = PoolStats()
+                client = MongoClient(
+                    self.connection_string,
+                    maxPoolSize=self.max_pool_size,
+                    event_listeners=[_MongoPoolListener(stats)],
+                )
+                cached = (client, stats)
+                _mongo_clients[key] = cached
+        return cached
     
     def get_client(self):
-        return MongoClient(self.connection_string)
+        return self._get_cached_client()[0]
     
     def get_database(self):
         client = self.get_client()
@@ -38,6 +242,14 @@ class MongoDBResource(ConfigurableResource):
     def get_collection(self, collection_name: str):
         db = self.get_database()
         return db[collection_name]
+    
+    @contextmanager
+    def collection(self, collection_name: str):
+        """Collection on the shared client; the client stays open for other callers."""
+        yield self.get_collection(collection_name)
+    
+    def pool_stats(self) -> dict:
+        return self._get_cached_client()[1].as_dict()
 
 
 class DataStorageResource(ConfigurableResource):
@@ -56,6 +268,14 @@ class DataStorageResource(ConfigurableResource):
     def model_dir(self):
         return os.path.join(self.base_dir, "models")
     
+    @property
+    def cache_dir(self):
+        return os.path.join(self.base_dir, "data", "cache")
+    
+    @property
+    def intermediate_dir(self):
+        return os.path.join(self.base_dir, "data", "intermediate")
+    
     def get_raw_path(self, filename: str = "") -> str:
         return os.path.join(self.raw_dir, filename)
     
@@ -64,6 +284,12 @@ class DataStorageResource(ConfigurableResource):
     
     def get_model_path(self, filename: str = "") -> str:
         return os.path.join(self.model_dir, filename)
+    
+    def get_cache_path(self, filename: str = "") -> str:
+        return os.path.join(self.cache_dir, filename)
+    
+    def get_intermediate_path(self, filename: str = "") -> str:
+        return os.path.join(self.intermediate_dir, filename)
 
 
 # Resource instances
@@ -0,0 +1,335 @@
+"""
+Stateful rolling-window feature engine with O(1) updates per bar.
+
+``engineer_features`` recomputes SMA_50, the 5-row shifts and the 5-row
+volatility over a ticker's whole history. ``FeatureEngine`` keeps, per
+ticker, only what the next bar needs:
+
+- a 50-close ``RollingWindow`` for SMA_50
+- the last 5 closes since the SMA filled, for Price_Change and Momentum_5d
+- a 5-close ``RollingWindow`` over those closes for Volatility
+- the last engineered row, held back until the next bar decides its
+  Next_Day_Target (as in chunked mode)
+
+so a new bar costs the same however long the history is. The state is
+checkpointed to JSON between runs:
+
+    engine = FeatureEngine()
+    history = engine.batch(cleaned)          # == engineer_features(cleaned); seeds the state
+    engine.save("data/processed/feature_state.json")
+
+    engine = FeatureEngine.load("data/processed/feature_state.json")
+    rows = engine.update(new_bars)           # engineered rows the new bars decided
+
+``batch`` returns the pandas rolling output itself. ``update`` matches it up
+to floating-point rounding: the window sums are recomputed from the ring
+buffer once per window length, so rounding error does not accumulate.
+"""
+
+import collections
+import json
+import math
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .features import MOMENTUM_PERIODS, SMA_WINDOW, VOLATILITY_WINDOW, engineer_features
+from .schemas import ENGINEERED_FEATURES_SCHEMA, apply_schema
+
+
+# Columns engineer_features adds to the cleaned rows, in its order
+ENGINEERED_COLUMNS = [
+    'SMA_50', 'Trend', 'Target', 'Price_Change', 'Distance_from_SMA', 'Momentum_5d', 'Volatility', 'Next_Day_Target',
+]
+
+WINDOWS = {"sma": SMA_WINDOW, "momentum": MOMENTUM_PERIODS, "volatility": VOLATILITY_WINDOW}
+
+
+class RollingWindow:
+    """
+    Fixed-size window over a stream of floats with O(1) ``push``, ``mean`` and ``std``.
+
+    Keeps a ring buffer and running sums of the values and their squares,
+    taken relative to a shift near the window's values to limit cancellation.
+    The sums are rebuilt from the buffer every ``size`` pushes (amortized
+    O(1)). A window of identical values has a std of exactly 0, as in pandas.
+    """
+
+    __slots__ = ('size', '_buffer', '_position', '_count', '_shift', '_sum', '_sum_sq', '_since_rebuild', '_same')
+
+    def __init__(self, size: int, values=()):
+        self.size = size
+        self._buffer = [0.0] * size
+        self._position = 0
+        self._count = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_rebuild = 0
+        # Consecutive pushes equal to the latest value
+        self._same = 0
+
+        for value in list(values)[-size:]:
+            self.push(value)
+
+    @property
+    def full(self) -> bool:
+        return self._count == self.size
+
+    def push(self, value: float):
+        value = float(value)
+
+        if self._count == 0:
+            self._shift = value
+        last = self._buffer[self._position - 1] if self._count else None
+        self._same = self._same + 1 if value == last else 1
+
+        if self._count == self.size:
+            old = self._buffer[self._position] - self._shift
+            self._sum -= old
+            self._sum_sq -= old * old
+        else:
+            self._count += 1
+
+        delta = value - self._shift
+        self._buffer[self._position] = value
+        self._position = (self._position + 1) % self.size
+        self._sum += delta
+        self._sum_sq += delta * delta
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.size:
+            self._rebuild()
+
+    def _rebuild(self):
+        values = self.values()
+        self._shift = sum(values) / len(values)
+        self._sum = sum(v - self._shift for v in values)
+        self._sum_sq = sum((v - self._shift) ** 2 for v in values)
+        self._since_rebuild = 0
+
+    def values(self) -> list:
+        """Window contents, oldest first."""
+        if not self.full:
+            return self._buffer[:self._count]
+        return self._buffer[self._position:] + self._buffer[:self._position]
+
+    def mean(self) -> float:
+        return self._shift + self._sum / self._count if self._count else math.nan
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), like ``Series.rolling().std()``."""
+        if self._count < 2:
+            return math.nan
+        if self._same >= self._count:
+            return 0.0
+        variance = (self._sum_sq - self._sum * self._sum / self._count) / (self._count - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class _TickerState:
+    """What one ticker's next bar needs from its history."""
+
+    def __init__(self):
+        self.rows = 0
+        self.last_date = None
+        self.sma = RollingWindow(SMA_WINDOW)
+        # Closes of the rows with an SMA (the rows engineer_features keeps), newest last
+        self.closes = collections.deque(maxlen=MOMENTUM_PERIODS)
+        self.volatility = RollingWindow(VOLATILITY_WINDOW)
+        self.pending = None
+
+    def seed(self, closes: np.ndarray):
+        """Start from the state after a history of ``closes``, with nothing held back."""
+        self.rows = len(closes)
+        self.sma = RollingWindow(SMA_WINDOW, closes[-SMA_WINDOW:])
+        trend_closes = closes[SMA_WINDOW - 1:]
+        self.closes = collections.deque(trend_closes[-MOMENTUM_PERIODS:].tolist(), maxlen=MOMENTUM_PERIODS)
+        self.volatility = RollingWindow(VOLATILITY_WINDOW, trend_closes[-VOLATILITY_WINDOW:])
+        self.pending = None
+
+    def push(self, row: dict, close: float) -> Optional[dict]:
+        """Engineered row decided by this bar (the previous trend row), if any."""
+        self.rows += 1
+        self.sma.push(close)
+        if not self.sma.full:
+            # Neutral: no SMA_50 yet, filtered out before the shifts
+            return None
+
+        sma = self.sma.mean()
+        target = int(close > sma)
+        price_change = close / self.closes[-1] - 1 if self.closes else math.nan
+        momentum = close / self.closes[0] - 1 if len(self.closes) == MOMENTUM_PERIODS else math.nan
+        self.closes.append(close)
+        self.volatility.push(close)
+
+        engineered = {
+            **row,
+            'SMA_50': sma,
+            'Trend': "Bullish" if target else "Bearish",
+            'Target': target,
+            'Price_Change': price_change,
+            'Distance_from_SMA': ((close - sma) / sma) * 100,
+            'Momentum_5d': momentum,
+            'Volatility': self.volatility.std() if self.volatility.full else math.nan,
+        }
+
+        decided, self.pending = self.pending, engineered
+        if decided is None:
+            return None
+        decided['Next_Day_Target'] = target
+        return decided
+
+    def to_json(self) -> dict:
+        return {
+            "rows": self.rows,
+            "last_date": None if self.last_date is None else pd.Timestamp(self.last_date).isoformat(),
+            "sma": self.sma.values(),
+            "closes": list(self.closes),
+            "volatility": self.volatility.values(),
+            "pending": None if self.pending is None else _encode_row(self.pending),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "_TickerState":
+        state = cls()
+        state.rows = data["rows"]
+        state.last_date = None if data["last_date"] is None else pd.Timestamp(data["last_date"])
+        state.sma = RollingWindow(SMA_WINDOW, data["sma"])
+        state.closes = collections.deque(data["closes"], maxlen=MOMENTUM_PERIODS)
+        state.volatility = RollingWindow(VOLATILITY_WINDOW, data["volatility"])
+        state.pending = None if data["pending"] is None else _decode_row(data["pending"])
+        return state
+
+
+def _missing(value) -> bool:
+    # pd.isna per value is the bulk of a push otherwise
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value)
+
+
+def _encode_row(row: dict) -> dict:
+    values, timestamps = {}, []
+    for column, value in row.items():
+        if isinstance(value, pd.Timestamp):
+            values[column] = value.isoformat()
+            timestamps.append(column)
+        elif isinstance(value, np.generic):
+            values[column] = value.item()
+        elif not isinstance(value, str) and pd.isna(value):
+            values[column] = None
+        else:
+            values[column] = value
+    return {"values": values, "timestamps": timestamps}
+
+
+def _decode_row(data: dict) -> dict:
+    row = {column: (math.nan if value is None else value) for column, value in data["values"].items()}
+    for column in data["timestamps"]:
+        row[column] = pd.Timestamp(row[column])
+    return row
+
+
+def _ticker_groups(df: pd.DataFrame):
+    # Each ticker's rows in date order, as engineer_features sees them
+    df = df.sort_values('Date', kind='stable')
+    return df.groupby('Ticker', sort=False, observed=True)
+
+
+class FeatureEngine:
+    """Per-ticker rolling feature state, updated one bar at a time."""
+
+    def __init__(self):
+        self.tickers = {}
+
+    def push(self, row: dict) -> Optional[dict]:
+        """
+        Add one bar (a cleaned row as a dict) and return the engineered row it
+        decided, or None. Rows with a missing value are dropped like
+        ``engineer_features``'s final ``dropna``.
+        """
+        close = row['Close']
+        if not isinstance(close, float):
+            close = pd.to_numeric(close, errors='coerce')
+        if _missing(close):
+            return None
+
+        ticker = str(row['Ticker'])
+        state = self.tickers.get(ticker)
+        if state is None:
+            state = self.tickers[ticker] = _TickerState()
+
+        date = row['Date'] if isinstance(row['Date'], pd.Timestamp) else pd.Timestamp(row['Date'])
+        if state.last_date is not None and date < state.last_date:
+            raise ValueError(f"Bars must arrive in date order per ticker; {ticker} went back from {state.last_date} to {date}")
+        state.last_date = date
+
+        decided = state.push(row, float(close))
+        if decided is None or any(map(_missing, decided.values())):
+            return None
+        return decided
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Push every row of ``df`` (cleaned rows, each ticker's in date order)
+        and return the engineered rows decided, typed like engineered_features.
+        """
+        columns = list(df.columns) + [col for col in ENGINEERED_COLUMNS if col not in df.columns]
+        decided = [row for row in map(self.push, df.to_dict('records')) if row is not None]
+        return apply_schema(pd.DataFrame(decided, columns=columns), ENGINEERED_FEATURES_SCHEMA)
+
+    def seed(self, df: pd.DataFrame):
+        """
+        Set every ticker of ``df`` (its cleaned history) to the state it would
+        have after pushing all its rows, without engineering them. Only the
+        last rows of each ticker are looked at.
+        """
+        for ticker, rows in _ticker_groups(df):
+            closes = pd.to_numeric(rows['Close'], errors='coerce')
+            rows = rows[closes.notna()]
+            closes = closes.dropna().to_numpy(dtype=float)
+            if not len(rows):
+                continue
+
+            # The last row goes through push so it is held back for Next_Day_Target
+            state = _TickerState()
+            state.seed(closes[:-1])
+            last = rows.iloc[-1].to_dict()
+            state.last_date = pd.Timestamp(last['Date'])
+            state.push(last, closes[-1])
+            self.tickers[str(ticker)] = state
+
+    def batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """``engineer_features(df)`` (pandas rolling windows), leaving the engine seeded with ``df``."""
+        engineered = engineer_features(df)
+        self.seed(df)
+        return engineered
+
+    def save(self, path: str):
+        """Write the state to ``path`` as JSON (atomically, like the extraction manifest)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "windows": WINDOWS,
+            "tickers": {ticker: state.to_json() for ticker, state in self.tickers.items()},
+        }
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureEngine":
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        if data["windows"] != WINDOWS:
+            raise ValueError(
+                f"{path} was written for windows {data['windows']}, the features now use {WINDOWS}; "
+                f"rebuild it from the history with batch() or seed()"
+            )
+
+        engine = cls()
+        engine.tickers = {ticker: _TickerState.from_json(state) for ticker, state in data["tickers"].items()}
+        return engine
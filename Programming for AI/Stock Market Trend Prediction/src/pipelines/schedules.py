@@ -7,5 +7,7 @@ daily_etl_schedule = ScheduleDefinition(
     name="daily_etl",
     job=etl_job,
     cron_schedule="0 2 * * *",  # 2 AM every day
-    description="Run the full ETL pipeline daily at 2 AM"
+    description="Run the full ETL pipeline daily at 2 AM",
+    # Nightly runs extend the previous forest; drift still triggers a full refit
+    run_config={"ops": {"trained_model": {"config": {"mode": "incremental"}}}},
 )
@@ -0,0 +1,93 @@
+"""
+Column dtypes for the DataFrame assets.
+
+Tickers and trend labels are categories (one small integer code per row
+instead of a Python string) and 0/1 targets are int8. Prices, volume and
+every engineered feature keep full precision, since they are stored in
+PostgreSQL and the Parquet exports as they are; the features are narrowed
+to float32 only where they become model input (the RandomForest casts its
+inputs to float32 anyway).
+"""
+
+import math
+import os
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+RAW_STOCK_SCHEMA = {
+    'Date': 'datetime64[us]',
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Volume': 'int64',
+    'Ticker': 'category',
+}
+
+ENGINEERED_FEATURES_SCHEMA = {
+    **RAW_STOCK_SCHEMA,
+    'SMA_50': 'float64',
+    'Trend': 'category',
+    'Target': 'int8',
+    'Price_Change': 'float64',
+    'Distance_from_SMA': 'float64',
+    'Momentum_5d': 'float64',
+    'Volatility': 'float64',
+    'Next_Day_Target': 'int8',
+}
+
+
+def apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Cast the columns of ``df`` named in ``schema``; columns already in shape are not copied."""
+    casts = {
+        col: dtype
+        for col, dtype in schema.items()
+        if col in df.columns and str(df[col].dtype) != dtype
+    }
+    if not casts:
+        return df
+
+    # Volume can come through as float when a source had gaps
+    if casts.get('Volume') == 'int64' and df['Volume'].isna().any():
+        casts['Volume'] = 'float64'
+
+    return df.astype(casts)
+
+
+def is_sorted_by(df: pd.DataFrame, group_column: str, order_column: str) -> bool:
+    """True if rows are grouped by ``group_column`` (groups in sorted order) and ordered within each group."""
+    if len(df) < 2:
+        return True
+    return pd.MultiIndex.from_arrays([df[group_column], df[order_column]]).is_monotonic_increasing
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB (NaN when it cannot be measured)."""
+    if resource is None:
+        if psutil is None:
+            return math.nan
+        return psutil.Process(os.getpid()).memory_info().peak_wset / 1e6
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if os.uname().sysname == "Darwin" else peak / 1e3
+
+
+def memory_metadata(df: pd.DataFrame) -> dict:
+    return {
+        "frame_mb": round(float(df.memory_usage(deep=True).sum()) / 1e6, 3),
+        "bytes_per_row": round(float(df.memory_usage(deep=True).sum()) / max(len(df), 1), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
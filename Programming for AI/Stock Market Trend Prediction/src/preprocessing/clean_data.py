@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import json
 import os
 
@@ -37,20 +38,17 @@ def load_data():
                 with open(file_path, 'r') as f:
                     data = json.load(f)
                 
-                # Extract data for each column
-                rows = {}
+                # Building one column per key, indexed by timestamp (ms)
+                columns = {}
                 for key, values in data.items():
                     # Parse column name from tuple string like "('Close', 'AAPL')"
                     col_name = key.split("'")[1]  # Extract 'Close', 'High', etc.
                     
-                    for timestamp, value in values.items():
-                        timestamp_int = int(timestamp)
-                        if timestamp_int not in rows:
-                            rows[timestamp_int] = {}
-                        rows[timestamp_int][col_name] = value
+                    timestamps = np.fromiter(map(int, values.keys()), dtype=np.int64, count=len(values))
+                    columns[col_name] = pd.Series(list(values.values()), index=timestamps)
                 
-                # Converting to DataFrame
-                df = pd.DataFrame.from_dict(rows, orient='index')
+                # Converting to DataFrame (columns are aligned on timestamp)
+                df = pd.DataFrame(columns)
                 df.index.name = 'Timestamp'
                 df.reset_index(inplace=True)
                 
@@ -11,51 +11,50 @@ PROCESSED_DIR = "C:\\Users\\Kenshin\\Documents\\Programming for AI\\Project CA2\
 
 def engineer_features(df):
     
-    features_list = []
+    # Sorting once so every ticker is a contiguous group (tickers in order of appearance)
+    df = df.sort_values(
+        ['Ticker', 'Date'],
+        key=lambda col: pd.Series(pd.factorize(col)[0], index=col.index) if col.name == 'Ticker' else col,
+        kind='stable',
+    )
     
-    for ticker in df['Ticker'].unique():
-        ticker_df = df[df['Ticker'] == ticker].copy()
-        ticker_df = ticker_df.sort_values('Date')
-        
-        # Ensuring Close is numeric
-        ticker_df['Close'] = pd.to_numeric(ticker_df['Close'], errors='coerce')
-        ticker_df = ticker_df.dropna(subset=['Close'])
+    # Ensuring Close is numeric
+    df['Close'] = pd.to_numeric(df['Close'], errors='coerce')
+    df = df.dropna(subset=['Close'])
 
-        # 1. First Feature - SMA 50
-        ticker_df['SMA_50'] = ticker_df['Close'].rolling(window=50).mean()
-        
-        # 2. Trend (Ground Truth for classification)
-        # Logic: Bullish if Close > SMA
-        def classify_trend(row):
-            if pd.isna(row['SMA_50']): 
-                return "Neutral"
-            return "Bullish" if row['Close'] > row['SMA_50'] else "Bearish"
-            
-        ticker_df['Trend'] = ticker_df.apply(classify_trend, axis=1)
-        
-        # Filtering Neutral for training
-        ticker_df = ticker_df[ticker_df['Trend'] != 'Neutral'].copy()
-        ticker_df['Target'] = (ticker_df['Trend'] == 'Bullish').astype(int)
-        
-        # 3. Price Change
-        ticker_df['Price_Change'] = ticker_df['Close'].pct_change()
-        
-        # 4. Distance from SMA
-        ticker_df['Distance_from_SMA'] = ((ticker_df['Close'] - ticker_df['SMA_50']) / ticker_df['SMA_50']) * 100
-        
-        # 5. Momentum 5d
-        ticker_df['Momentum_5d'] = ticker_df['Close'].pct_change(periods=5)
-        
-        # 6. Volatility (5d std)
-        ticker_df['Volatility'] = ticker_df['Close'].rolling(window=5).std()
-        
-        # 7. Target for Prediction: NEXT Day's Trend
-        ticker_df['Next_Day_Target'] = ticker_df['Target'].shift(-1)
-        
-        features_list.append(ticker_df)
-        
-    full_df = pd.concat(features_list, ignore_index=True)
-    full_df = full_df.dropna()  # Drop NaN from rolling/shift
+    # 1. First Feature - SMA 50
+    df['SMA_50'] = df.groupby('Ticker', sort=False)['Close'].rolling(window=50).mean().to_numpy()
+    
+    # 2. Trend (Ground Truth for classification)
+    # Logic: Bullish if Close > SMA
+    df['Trend'] = np.where(
+        df['SMA_50'].isna(),
+        "Neutral",
+        np.where(df['Close'] > df['SMA_50'], "Bullish", "Bearish"),
+    )
+    
+    # Filtering Neutral for training
+    df = df[df['Trend'] != 'Neutral'].reset_index(drop=True)
+    df['Target'] = (df['Trend'] == 'Bullish').astype(int)
+    
+    close_groups = df.groupby('Ticker', sort=False)['Close']
+    
+    # 3. Price Change
+    df['Price_Change'] = df['Close'] / close_groups.shift(1) - 1
+    
+    # 4. Distance from SMA
+    df['Distance_from_SMA'] = ((df['Close'] - df['SMA_50']) / df['SMA_50']) * 100
+    
+    # 5. Momentum 5d
+    df['Momentum_5d'] = df['Close'] / close_groups.shift(5) - 1
+    
+    # 6. Volatility (5d std)
+    df['Volatility'] = close_groups.rolling(window=5).std().to_numpy()
+    
+    # 7. Target for Prediction: NEXT Day's Trend
+    df['Next_Day_Target'] = df.groupby('Ticker', sort=False)['Target'].shift(-1)
+    
+    full_df = df.dropna()  # Drop NaN from rolling/shift
     
     return full_df
 
@@ -0,0 +1,112 @@
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import pytest
+from dagster import materialize
+
+from src.pipelines import resources as resources_module
+from src.pipelines.cache import AssetCacheResource
+from src.pipelines.io_manager import ParquetIOManager
+from src.pipelines.profiling import ProfilingResource
+from src.pipelines.resources import DataStorageResource, MongoDBResource
+from src.pipelines.schemas import RAW_STOCK_SCHEMA, apply_schema
+
+
+CSV_HEADER = (
+    "Price,Close,High,Low,Open,Volume\n"
+    "Ticker,TEST,TEST,TEST,TEST,TEST\n"
+    "Date,,,,,\n"
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = DataStorageResource(base_dir=str(tmp_path))
+    os.makedirs(storage.raw_dir)
+    return storage
+
+
+@pytest.fixture
+def run_assets(storage):
+    """Materialize assets against ``storage`` with the pipeline's IO manager and no content cache."""
+
+    def run(assets, run_config=None, selection=None, **resources):
+        result = materialize(
+            assets,
+            run_config=run_config,
+            selection=selection,
+            resources={
+                "storage": storage,
+                "io_manager": ParquetIOManager(storage=storage),
+                "asset_cache": AssetCacheResource(storage=storage, enabled=False),
+                "profiling": ProfilingResource(),
+                **resources,
+            },
+        )
+        assert result.success
+        return result
+
+    return run
+
+
+def make_cleaned_prices(tickers=("AAA", "BBB", "CCC"), days=160, seed=0) -> pd.DataFrame:
+    """A cleaned_stock_data-shaped frame of random-walk prices, grouped by ticker in date order."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=days)
+    frames = []
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+        frames.append(pd.DataFrame({
+            'Date': dates,
+            'Close': close,
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Open': close * (1 + rng.normal(0, 0.005, days)),
+            'Volume': rng.integers(1_000, 100_000, days),
+            'Ticker': ticker,
+        }))
+    return apply_schema(pd.concat(frames, ignore_index=True), RAW_STOCK_SCHEMA)
+
+
+@pytest.fixture
+def cleaned_prices():
+    return make_cleaned_prices()
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """A mongomock client and a ``MongoDBResource`` whose connections go to it."""
+    mongomock = pytest.importorskip("mongomock")
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(resources_module, "MongoClient", lambda *args, **kwargs: client)
+    # A connection string of its own, so no pooled client from another test is reused
+    return client, MongoDBResource(connection_string=f"mongodb://{uuid.uuid4().hex}:27017/")
+
+
+@pytest.fixture
+def pg_cursor():
+    """
+    A cursor on a disposable Postgres (``BENCH_PG_*`` variables, as for the
+    benchmarks) whose search_path is a fresh schema. Everything is rolled
+    back afterwards; the test is skipped when no server is configured.
+    """
+    fields = ["dbname", "user", "password", "host", "port"]
+    params = {field: os.environ[f"BENCH_PG_{field.upper()}"] for field in fields if f"BENCH_PG_{field.upper()}" in os.environ}
+    if not params:
+        pytest.skip("no BENCH_PG_* Postgres configured")
+    try:
+        conn = psycopg2.connect(**params)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres not reachable: {e}")
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE SCHEMA {schema}; SET LOCAL search_path TO {schema}")
+        yield cursor
+    finally:
+        conn.rollback()
+        conn.close()
@@ -0,0 +1,137 @@
+import os
+
+import pandas as pd
+from dagster import AssetExecutionContext, asset
+
+from src.pipelines.assets.extraction import raw_stock_csv_data
+from src.pipelines.assets.transformation import cleaned_stock_data, engineered_features
+from src.pipelines.cache import INDEX_FILE, AssetCacheResource, content_cached, file_fingerprint
+
+from .conftest import CSV_HEADER, make_cleaned_prices
+
+
+ROWS = (
+    "2024-01-02,100.5,101.0,99.0,100.0,1000\n"
+    "2024-01-03,101.5,102.0,100.0,101.0,1100\n"
+)
+
+# Times the side-effecting asset below ran its body
+WRITES = []
+
+
+@asset
+@content_cached(side_effects=True)
+def database_write(context: AssetExecutionContext):
+    WRITES.append(context.run.run_id)
+    return {"rows": 1}
+
+
+def _cache_status(result, asset_name: str) -> str:
+    return result.asset_materializations_for_node(asset_name)[0].metadata["cache"].value
+
+
+def test_fingerprint_changes_on_append(tmp_path):
+    path = tmp_path / "stock_data_TEST.csv"
+    path.write_text(CSV_HEADER + ROWS)
+    before = file_fingerprint(str(path))
+    assert file_fingerprint(str(path)) == before
+
+    with open(path, 'a') as f:
+        f.write("2024-01-04,102.5,103.0,101.0,102.0,1200\n")
+    assert file_fingerprint(str(path)) != before
+
+
+def test_edit_that_keeps_size_and_mtime_is_a_miss(storage, run_assets):
+    path = os.path.join(storage.raw_dir, "stock_data_TEST.csv")
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER + ROWS)
+    cache = AssetCacheResource(storage=storage)
+    run_assets([raw_stock_csv_data], asset_cache=cache)
+
+    # A corrected historical bar, restored with the old timestamps (as cp -p or rsync -t would)
+    stat = os.stat(path)
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER + ROWS.replace("100.5", "100.7"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.path.getsize(path) == stat.st_size
+
+    result = run_assets([raw_stock_csv_data], asset_cache=cache)
+    assert _cache_status(result, "raw_stock_csv_data") == "miss"
+    assert result.output_for_node("raw_stock_csv_data")['Close'].iloc[0] == 100.7
+
+
+def test_hit_reads_the_io_manager_output(storage, run_assets):
+    path = os.path.join(storage.raw_dir, "stock_data_TEST.csv")
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER + ROWS)
+    cache = AssetCacheResource(storage=storage)
+
+    first = run_assets([raw_stock_csv_data], asset_cache=cache)
+    second = run_assets([raw_stock_csv_data], asset_cache=cache)
+
+    assert _cache_status(first, "raw_stock_csv_data") == "miss"
+    assert _cache_status(second, "raw_stock_csv_data") == "hit"
+    pd.testing.assert_frame_equal(
+        second.output_for_node("raw_stock_csv_data"), first.output_for_node("raw_stock_csv_data")
+    )
+    # Only the key index is kept, no copy of the output
+    assert os.listdir(cache.root) == [INDEX_FILE]
+
+    with open(path, 'a') as f:
+        f.write("2024-01-04,102.5,103.0,101.0,102.0,1200\n")
+    third = run_assets([raw_stock_csv_data], asset_cache=cache)
+
+    assert _cache_status(third, "raw_stock_csv_data") == "miss"
+    assert len(third.output_for_node("raw_stock_csv_data")) == 3
+
+
+def test_output_not_replaced_since_the_key_is_a_miss(storage, run_assets):
+    with open(os.path.join(storage.raw_dir, "stock_data_TEST.csv"), 'w') as f:
+        f.write(CSV_HEADER + ROWS)
+    cache = AssetCacheResource(storage=storage)
+    run_assets([raw_stock_csv_data], asset_cache=cache)
+
+    # A key recorded for a run that failed before the IO manager stored its output
+    key = cache.latest_key("raw_stock_csv_data")
+    cache.record("raw_stock_csv_data", ["raw_stock_csv_data"], key)
+
+    assert cache.lookup("raw_stock_csv_data", ["raw_stock_csv_data"], key) is None
+
+
+def test_side_effects_run_unless_opted_in(storage, run_assets):
+    WRITES.clear()
+    cache = AssetCacheResource(storage=storage)
+
+    first = run_assets([database_write], asset_cache=cache)
+    second = run_assets([database_write], asset_cache=cache)
+    assert [_cache_status(r, "database_write") for r in (first, second)] == ["bypass", "bypass"]
+    assert len(WRITES) == 2
+
+    opted_in = AssetCacheResource(storage=storage, cache_side_effects=True)
+    third = run_assets([database_write], asset_cache=opted_in)
+    assert _cache_status(third, "database_write") == "hit"
+    assert len(WRITES) == 2
+
+
+def test_fan_out_is_skipped_on_a_hit(storage, run_assets):
+    combined = make_cleaned_prices(days=80)
+    cache = AssetCacheResource(storage=storage)
+
+    @asset(name="combined_raw_data")
+    def combined_raw_data_source():
+        return combined
+
+    def run():
+        result = run_assets([combined_raw_data_source, cleaned_stock_data, engineered_features], asset_cache=cache)
+        steps = {event.step_key.split("[")[0] for event in result.get_step_success_events()}
+        return result, steps
+
+    first, first_steps = run()
+    second, second_steps = run()
+
+    assert "engineered_features.engineer_ticker_features" in first_steps
+    assert "engineered_features.engineer_ticker_features" not in second_steps
+    assert _cache_status(second, "engineered_features") == "hit"
+    pd.testing.assert_frame_equal(
+        second.output_for_node("engineered_features"), first.output_for_node("engineered_features")
+    )
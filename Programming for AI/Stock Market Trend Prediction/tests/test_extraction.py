@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+
+from src.pipelines.assets.extraction import raw_stock_csv_data
+from src.pipelines.readers import read_stock_csv
+
+from .conftest import CSV_HEADER
+
+
+FIRST_ROWS = (
+    "2024-01-02,100.5,101.0,99.0,100.0,1000\n"
+    "2024-01-03,101.5,102.0,100.0,101.0,1100\n"
+    "2024-01-04,102.5,103.0,101.0,102.0,1200\n"
+)
+
+
+def _append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def test_half_written_line_is_left_for_the_next_read(tmp_path):
+    path = tmp_path / "stock_data_TEST.csv"
+    path.write_text(CSV_HEADER + FIRST_ROWS)
+    _append(path, "2024-01-05,12")
+
+    df, columns, offset = read_stock_csv(str(path))
+    assert len(df) == 3
+    assert offset == len((CSV_HEADER + FIRST_ROWS).encode())
+
+    _append(path, "3.45,124.0,122.0,123.0,1300\n")
+    new_df, _, next_offset = read_stock_csv(str(path), offset=offset, column_names=columns)
+
+    assert len(new_df) == 1
+    assert new_df['Date'].iloc[0] == pd.Timestamp("2024-01-05")
+    assert new_df['Close'].iloc[0] == 123.45
+    assert next_offset == path.stat().st_size
+
+
+def test_appended_rows_survive_a_run_during_the_write(storage, run_assets):
+    path = f"{storage.raw_dir}/stock_data_TEST.csv"
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER + FIRST_ROWS)
+    _append(path, "2024-01-05,12")
+
+    first = run_assets([raw_stock_csv_data]).output_for_node("raw_stock_csv_data")
+    assert first['Date'].max() == pd.Timestamp("2024-01-04")
+
+    _append(path, "3.45,124.0,122.0,123.0,1300\n2024-01-08,124.5,125.0,123.0,124.0,1400\n")
+    second = run_assets([raw_stock_csv_data]).output_for_node("raw_stock_csv_data")
+
+    assert len(second) == 5
+    assert second['Date'].is_unique
+    assert second.loc[second['Date'] == pd.Timestamp("2024-01-05"), 'Close'].item() == 123.45
+
+
+def test_edit_that_keeps_size_and_mtime_is_read_again(storage, run_assets):
+    path = f"{storage.raw_dir}/stock_data_TEST.csv"
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER + FIRST_ROWS)
+    run_assets([raw_stock_csv_data])
+
+    # A corrected historical bar, restored with the old timestamps (as cp -p or rsync -t would)
+    stat = os.stat(path)
+    with open(path, 'w') as f:
+        f.write(CSV_HEADER + FIRST_ROWS.replace("100.5", "100.7"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    df = run_assets([raw_stock_csv_data]).output_for_node("raw_stock_csv_data")
+    assert df.loc[df['Date'] == pd.Timestamp("2024-01-02"), 'Close'].item() == 100.7
@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from src.pipelines.chunked import RollingFeatureState, engineer_chunks
+from src.pipelines.features import engineer_features
+from src.pipelines.rolling import FeatureEngine
+from src.pipelines.schemas import ENGINEERED_FEATURES_SCHEMA, apply_schema
+
+
+def per_ticker_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The original per-ticker loop engineer_features replaced."""
+    features_list = []
+    for ticker in df['Ticker'].unique():
+        ticker_df = df[df['Ticker'] == ticker].copy().sort_values('Date')
+        ticker_df['Close'] = pd.to_numeric(ticker_df['Close'], errors='coerce')
+        ticker_df = ticker_df.dropna(subset=['Close'])
+        ticker_df['SMA_50'] = ticker_df['Close'].rolling(window=50).mean()
+        ticker_df['Trend'] = [
+            "Neutral" if pd.isna(sma) else ("Bullish" if close > sma else "Bearish")
+            for close, sma in zip(ticker_df['Close'], ticker_df['SMA_50'])
+        ]
+        ticker_df = ticker_df[ticker_df['Trend'] != 'Neutral'].copy()
+        ticker_df['Target'] = (ticker_df['Trend'] == 'Bullish').astype(int)
+        ticker_df['Price_Change'] = ticker_df['Close'].pct_change()
+        ticker_df['Distance_from_SMA'] = ((ticker_df['Close'] - ticker_df['SMA_50']) / ticker_df['SMA_50']) * 100
+        ticker_df['Momentum_5d'] = ticker_df['Close'].pct_change(periods=5)
+        ticker_df['Volatility'] = ticker_df['Close'].rolling(window=5).std()
+        ticker_df['Next_Day_Target'] = ticker_df['Target'].shift(-1)
+        features_list.append(ticker_df)
+    return pd.concat(features_list, ignore_index=True).dropna()
+
+
+def typed(df: pd.DataFrame) -> pd.DataFrame:
+    return apply_schema(df, ENGINEERED_FEATURES_SCHEMA)
+
+
+def in_ticker_order(df: pd.DataFrame) -> pd.DataFrame:
+    return typed(df).sort_values(['Ticker', 'Date'], kind='stable').reset_index(drop=True)
+
+
+@pytest.mark.parametrize("ticker_dtype", ["category", "str"])
+def test_engineer_features_matches_per_ticker_loop(cleaned_prices, ticker_dtype):
+    df = cleaned_prices.astype({'Ticker': ticker_dtype})
+    assert_frame_equal(typed(engineer_features(df)), typed(per_ticker_features(df)))
+
+
+def test_engineer_features_matches_per_ticker_loop_on_shuffled_rows(cleaned_prices):
+    df = cleaned_prices.sample(frac=1, random_state=7)
+    assert_frame_equal(typed(engineer_features(df)), typed(per_ticker_features(df)))
+
+
+def test_feature_engine_update_matches_batch(cleaned_prices):
+    expected = in_ticker_order(engineer_features(cleaned_prices))
+
+    # One bar at a time from an empty state
+    assert_frame_equal(in_ticker_order(FeatureEngine().update(cleaned_prices)), expected, rtol=1e-9)
+
+    # Seeded from a history, then updated with the bars after it
+    cutoff = cleaned_prices['Date'].unique()[100]
+    engine = FeatureEngine()
+    history = engine.batch(cleaned_prices[cleaned_prices['Date'] < cutoff])
+    updated = engine.update(cleaned_prices[cleaned_prices['Date'] >= cutoff])
+    assert_frame_equal(in_ticker_order(pd.concat([typed(history), updated])), expected, rtol=1e-9)
+
+
+def test_feature_engine_checkpoint_round_trip(cleaned_prices, tmp_path):
+    cutoff = cleaned_prices['Date'].unique()[120]
+    head = cleaned_prices[cleaned_prices['Date'] < cutoff]
+    tail = cleaned_prices[cleaned_prices['Date'] >= cutoff]
+
+    engine = FeatureEngine()
+    engine.batch(head)
+    engine.save(str(tmp_path / "feature_state.json"))
+
+    reloaded = FeatureEngine.load(str(tmp_path / "feature_state.json"))
+    assert_frame_equal(reloaded.update(tail), engine.update(tail))
+
+
+def test_feature_engine_rejects_bars_out_of_order(cleaned_prices):
+    engine = FeatureEngine()
+    engine.update(cleaned_prices.iloc[10:20])
+    with pytest.raises(ValueError):
+        engine.update(cleaned_prices.iloc[:1])
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 37, 500])
+def test_rolling_feature_state_across_chunks(cleaned_prices, chunk_rows):
+    chunks = [
+        rows.iloc[start:start + chunk_rows].reset_index(drop=True)
+        for _, rows in cleaned_prices.groupby('Ticker', sort=False, observed=True)
+        for start in range(0, len(rows), chunk_rows)
+    ]
+    engineered = pd.concat(engineer_chunks(chunks, RollingFeatureState()), ignore_index=True)
+
+    expected = typed(engineer_features(cleaned_prices)).reset_index(drop=True)
+    assert_frame_equal(typed(engineered), expected)
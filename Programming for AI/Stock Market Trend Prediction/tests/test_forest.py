@@ -0,0 +1,82 @@
+import os
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.model import artifact as artifact_module
+from src.model.artifact import ModelArtifact, write_artifact
+from src.model.forest import CompiledForest
+
+
+FEATURES = ['Price_Change', 'Distance_from_SMA', 'Momentum_5d', 'Volatility']
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, len(FEATURES)))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(0, 0.5, len(X)) > 0).astype(int)
+    # sklearn >= 1.4 learns where NaNs go at every split
+    X[rng.random(X.shape) < 0.05] = np.nan
+
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+    X_test = rng.normal(size=(300, len(FEATURES)))
+    X_test[rng.random(X_test.shape) < 0.1] = np.nan
+    return model, X_test
+
+
+def test_compiled_forest_matches_sklearn(fitted):
+    model, X = fitted
+    compiled = CompiledForest.from_sklearn(model)
+
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_compiled_forest_blocks_and_threads_agree(fitted):
+    model, X = fitted
+    compiled = CompiledForest.from_sklearn(model)
+
+    expected = compiled.predict_proba(X)
+    np.testing.assert_array_equal(compiled.predict_proba(X, block_rows=64, n_jobs=3), expected)
+
+
+def test_artifact_reload_is_memory_mapped(fitted, tmp_path):
+    model, X = fitted
+    write_artifact(str(tmp_path), model, FEATURES, {"n_estimators": 25}, "0123456789abcdef", {"accuracy": 1.0})
+
+    artifact = ModelArtifact.open(str(tmp_path))
+    assert artifact.feature_cols == FEATURES
+    assert isinstance(artifact.model.threshold, np.memmap)
+    np.testing.assert_allclose(artifact.model.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 2, 3, 4, 5, 678901)
+
+
+def test_artifact_versions_never_share_a_directory(fitted, tmp_path, monkeypatch):
+    model, _ = fitted
+    args = (model, FEATURES, {"n_estimators": 25}, "0123456789abcdef", {"accuracy": 1.0})
+    first = write_artifact(str(tmp_path), *args)
+    second = write_artifact(str(tmp_path), *args)
+
+    # Same data in the same second still gets a version of its own, and nothing is left over
+    assert first != second
+    assert ModelArtifact.open(str(tmp_path)).path == second
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(first), os.path.basename(second), "LATEST"])
+
+    # A version name that is already taken is an error, not an overwrite
+    monkeypatch.setattr(artifact_module, "datetime", FrozenDatetime)
+    monkeypatch.setattr(artifact_module.uuid, "uuid4", lambda: uuid.UUID(int=0))
+    taken = write_artifact(str(tmp_path), *args)
+    with pytest.raises(FileExistsError):
+        write_artifact(str(tmp_path), *args)
+    assert ModelArtifact.open(str(tmp_path)).path == taken
+    assert len(os.listdir(tmp_path)) == 4
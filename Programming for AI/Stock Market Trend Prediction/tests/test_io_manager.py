@@ -0,0 +1,56 @@
+import os
+
+import pytest
+from dagster import AssetIn, asset
+from pandas.testing import assert_frame_equal
+
+from src.pipelines.features import engineer_features
+from src.pipelines.io_manager import read_partitioned_frame, write_partitioned_frame
+from src.pipelines.schemas import ENGINEERED_FEATURES_SCHEMA, apply_schema
+
+
+@pytest.fixture
+def engineered(cleaned_prices):
+    # engineer_features leaves gaps in the index where dropna removed rows
+    return apply_schema(engineer_features(cleaned_prices), ENGINEERED_FEATURES_SCHEMA)
+
+
+def test_round_trip_keeps_values_dtypes_and_index(engineered, tmp_path):
+    path = str(tmp_path / "engineered_features")
+    manifest = write_partitioned_frame(engineered, path)
+
+    assert [p["ticker"] for p in manifest["partitions"]] == ["AAA", "BBB", "CCC"]
+    assert_frame_equal(read_partitioned_frame(path), engineered)
+
+
+def test_round_trip_keeps_interleaved_row_order(cleaned_prices, tmp_path):
+    shuffled = cleaned_prices.sample(frac=1, random_state=3).reset_index(drop=True)
+    path = str(tmp_path / "shuffled")
+    write_partitioned_frame(shuffled, path)
+
+    assert_frame_equal(read_partitioned_frame(path), shuffled)
+
+
+def test_columns_and_tickers_are_pruned(engineered, tmp_path):
+    path = str(tmp_path / "engineered_features")
+    write_partitioned_frame(engineered, path)
+
+    df = read_partitioned_frame(path, columns=['Date', 'Close'], tickers=['BBB'])
+    expected = engineered.loc[engineered['Ticker'] == 'BBB', ['Date', 'Close']]
+    assert_frame_equal(df, expected)
+
+
+def test_io_manager_serves_pruned_inputs(engineered, storage, run_assets):
+    @asset
+    def features():
+        return engineered
+
+    @asset(ins={"features": AssetIn(metadata={"columns": ['Date', 'Ticker', 'Volatility'], "tickers": ['CCC']})})
+    def ccc_volatility(features):
+        return features
+
+    result = run_assets([features, ccc_volatility])
+
+    assert os.path.isdir(storage.get_intermediate_path("features"))
+    expected = engineered.loc[engineered['Ticker'] == 'CCC', ['Date', 'Ticker', 'Volatility']]
+    assert_frame_equal(result.output_for_node("ccc_volatility"), expected)
@@ -0,0 +1,43 @@
+import pytest
+
+from src.pipelines.mongo_load import RAW_KEY, ensure_raw_indexes, write_ohlcv
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["test"]["raw_stock_data"]
+
+
+def test_rewriting_unchanged_bars_modifies_nothing(collection, cleaned_prices):
+    ensure_raw_indexes(collection)
+
+    first = write_ohlcv(collection, cleaned_prices, "2024-01-01T00:00:00", batch_size=100)
+    second = write_ohlcv(collection, cleaned_prices, "2024-01-02T00:00:00", batch_size=100)
+
+    assert first["upserted"] == len(cleaned_prices)
+    assert (second["upserted"], second["modified"], second["matched"]) == (0, 0, len(cleaned_prices))
+    assert collection.count_documents({}) == len(cleaned_prices)
+    assert collection.count_documents({"ingested_at": "2024-01-01T00:00:00"}) == len(cleaned_prices)
+
+
+def test_changed_bars_are_updated_in_place(collection, cleaned_prices):
+    ensure_raw_indexes(collection)
+    write_ohlcv(collection, cleaned_prices, "2024-01-01T00:00:00")
+
+    changed = cleaned_prices.iloc[:5].assign(Close=cleaned_prices['Close'].iloc[:5] + 1)
+    counts = write_ohlcv(collection, changed, "2024-01-02T00:00:00")
+
+    assert (counts["upserted"], counts["modified"]) == (0, 5)
+    doc = collection.find_one({"ticker": "AAA", "date": changed['Date'].iloc[0].isoformat()})
+    assert doc["ohlcv"]["close"] == pytest.approx(changed['Close'].iloc[0])
+    assert doc["ingested_at"] == "2024-01-01T00:00:00"
+
+
+def test_older_non_unique_key_is_rebuilt_as_unique(collection):
+    collection.create_index(RAW_KEY)
+    ensure_raw_indexes(collection)
+
+    keys = [index for index in collection.index_information().values() if index["key"] == RAW_KEY]
+    assert len(keys) == 1 and keys[0].get("unique")
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from src.pipelines.features import engineer_features
+from src.pipelines.pg_load import (
+    PROCESSED_DATA_SCHEMA,
+    ensure_processed_data_table,
+    merge_processed_data,
+    replace_processed_data,
+    to_processed_rows,
+)
+
+
+@pytest.fixture
+def processed_rows(cleaned_prices):
+    return to_processed_rows(engineer_features(cleaned_prices)).reset_index(drop=True)
+
+
+def with_repeated_keys(rows: pd.DataFrame) -> pd.DataFrame:
+    """``rows`` plus a changed copy of its first ten rows, appended last."""
+    repeated = rows.iloc[:10].assign(close_price=rows['close_price'].iloc[:10] + 1)
+    return pd.concat([rows, repeated], ignore_index=True)
+
+
+def stored(cursor) -> pd.DataFrame:
+    cursor.execute("SELECT ticker, trade_date, close_price FROM processed_data ORDER BY ticker, trade_date")
+    return pd.DataFrame(cursor.fetchall(), columns=['ticker', 'trade_date', 'close_price'])
+
+
+def assert_last_row_won(cursor, rows: pd.DataFrame):
+    df = stored(cursor)
+    assert len(df) == len(rows.drop_duplicates(['ticker', 'trade_date']))
+    first = df[(df['ticker'] == rows['ticker'].iloc[0]) & (df['trade_date'] == rows['trade_date'].iloc[0])]
+    assert float(first['close_price'].item()) == pytest.approx(rows['close_price'].iloc[0] + 1)
+
+
+@pytest.mark.parametrize("method", ["copy", "execute_values"])
+def test_replace_keeps_the_last_row_of_a_repeated_key(pg_cursor, processed_rows, method):
+    _, written, _ = replace_processed_data(pg_cursor, with_repeated_keys(processed_rows), "flat", method=method)
+    assert written == len(processed_rows)
+    assert_last_row_won(pg_cursor, processed_rows)
+
+
+def test_merge_keeps_the_last_row_of_a_repeated_key(pg_cursor, processed_rows):
+    layout, _ = ensure_processed_data_table(pg_cursor)
+    _, inserted, updated, _ = merge_processed_data(pg_cursor, with_repeated_keys(processed_rows), layout)
+
+    assert (inserted, updated) == (len(processed_rows), 0)
+    assert_last_row_won(pg_cursor, processed_rows)
+
+    # Merging the same rows again changes nothing
+    assert merge_processed_data(pg_cursor, with_repeated_keys(processed_rows), layout)[1:3] == (0, 0)
+
+
+def test_unique_index_is_built_over_an_older_table_with_duplicates(pg_cursor, processed_rows):
+    # A table from before merge mode: no unique key, and a key loaded twice
+    pg_cursor.execute(f"""
+        CREATE TABLE processed_data ({PROCESSED_DATA_SCHEMA});
+        CREATE INDEX idx_ticker_date ON processed_data(ticker, trade_date);
+    """)
+    replace_rows = with_repeated_keys(processed_rows)
+    columns = ", ".join(replace_rows.columns)
+    for row in replace_rows.astype(object).itertuples(index=False):
+        pg_cursor.execute(f"INSERT INTO processed_data ({columns}) VALUES %s", (tuple(row),))
+
+    _, deleted = ensure_processed_data_table(pg_cursor)
+
+    assert deleted == 10
+    pg_cursor.execute("SELECT indisunique FROM pg_index WHERE indexrelid = 'idx_ticker_date'::regclass")
+    assert pg_cursor.fetchone()[0]
+    assert_last_row_won(pg_cursor, processed_rows)
+
+
+def test_partitioned_layout_keeps_the_last_row_of_a_repeated_key(pg_cursor, processed_rows):
+    _, written, attached = replace_processed_data(pg_cursor, with_repeated_keys(processed_rows), "partitioned")
+    assert attached
+    assert written == len(processed_rows)
+    assert_last_row_won(pg_cursor, processed_rows)
+
+    # Merging into partitions that do not exist yet attaches them through the same path
+    pg_cursor.execute("DROP TABLE processed_data")
+    layout, _ = ensure_processed_data_table(pg_cursor, "partitioned")
+    _, inserted, updated, attached = merge_processed_data(pg_cursor, with_repeated_keys(processed_rows), layout)
+
+    assert attached
+    assert (inserted, updated) == (len(processed_rows), 0)
+    assert_last_row_won(pg_cursor, processed_rows)
@@ -0,0 +1,82 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import warnings
+
+import numpy as np
+import pytest
+
+from src.model.serving import FEATURE_COLUMNS, PredictionService, make_server
+
+
+class _StubModel:
+    """predict_proba from the first feature; fails on rows flagged with -1."""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict_proba(self, X):
+        self.release.wait()
+        if (X[:, 0] == -1).any():
+            raise RuntimeError("model failure")
+        p = 1 / (1 + np.exp(-X[:, 0]))
+        return np.column_stack([1 - p, p])
+
+
+ROW = dict.fromkeys(FEATURE_COLUMNS, 0.5)
+
+
+def test_cancelled_requests_do_not_stop_the_batcher():
+    model = _StubModel()
+    with PredictionService(model, max_wait_ms=50) as service:
+        model.release.clear()
+        blocking = service.submit(ROW)
+        # Queued behind the blocked batch, then cancelled before it is scored
+        cancelled = service.submit(ROW)
+        assert cancelled.cancel()
+        model.release.set()
+
+        assert blocking.result(5).shape == (1, 2)
+        assert service.predict_proba(ROW, timeout=5).shape == (1, 2)
+
+
+def test_warning_filter_does_not_leak():
+    filters = list(warnings.filters)
+    with PredictionService(_StubModel()) as service:
+        service.predict(ROW, timeout=5)
+    assert warnings.filters == filters
+
+
+@pytest.fixture
+def server():
+    with PredictionService(_StubModel()) as service:
+        server = make_server(service, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+        server.server_close()
+
+
+def _post(url, payload):
+    request = urllib.request.Request(url + "/predict", data=json.dumps(payload).encode(), method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_http_status_codes(server):
+    status, body = _post(server, {"instances": [ROW]})
+    assert status == 200 and len(body["predictions"]) == 1
+
+    assert _post(server, {"instances": [{"SMA_50": 1.0}]})[0] == 400
+
+    status, body = _post(server, {"instances": [dict(ROW, SMA_50=-1)]})
+    assert status == 500
+    assert "model failure" in body["error"]
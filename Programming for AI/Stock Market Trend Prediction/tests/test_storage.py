@@ -0,0 +1,50 @@
+import os
+
+from dagster import AssetExecutionContext, asset
+from sklearn.ensemble import RandomForestClassifier
+
+from src.model.artifact import write_artifact
+from src.pipelines.assets.storage import mongodb_model_results, mongodb_raw_data
+from src.pipelines.mongo_load import RAW_COLLECTION
+
+
+def test_sinks_report_throughput_and_overlap(run_assets, storage, cleaned_prices, mongo):
+    client, mongodb = mongo
+    X = cleaned_prices[["Open", "High", "Low", "Close"]].to_numpy()
+    model = RandomForestClassifier(n_estimators=2, random_state=0).fit(X, X[:, 3] > X[:, 0])
+
+    @asset(name="combined_raw_data")
+    def combined_raw_data_source():
+        return cleaned_prices
+
+    @asset(name="trained_model")
+    def trained_model_source(context: AssetExecutionContext):
+        path = write_artifact(storage.get_model_path("artifacts"), model, ["Open", "High", "Low", "Close"], {}, "0" * 16, {})
+        context.add_output_metadata({"artifact_version": os.path.basename(path)})
+        return {"accuracy": 0.5}
+
+    @asset(name="model_metrics")
+    def model_metrics_source():
+        return {"accuracy": 0.5}
+
+    result = run_assets(
+        [combined_raw_data_source, trained_model_source, model_metrics_source, mongodb_raw_data, mongodb_model_results],
+        mongodb=mongodb,
+    )
+
+    assert client["stock_market_etl"][RAW_COLLECTION].count_documents({}) == len(cleaned_prices)
+    document = client["stock_market_etl"]["model_results"].find_one()
+    assert document["metrics"] == {"accuracy": 0.5}
+    assert document["artifact_version"] == document["artifact_manifest"]["version"]
+    metadata = {
+        name: {key: value.value for key, value in result.asset_materializations_for_node(name)[0].metadata.items()}
+        for name in ["mongodb_raw_data", "mongodb_model_results"]
+    }
+    assert metadata["mongodb_raw_data"]["sink_rows"] == len(cleaned_prices)
+    assert metadata["mongodb_model_results"]["sink_rows"] == 1
+
+    # materialize() runs the sinks one after another; the second one sees both
+    last = max(metadata.values(), key=lambda m: m["sink_finished_at"])
+    assert last["storage_sinks_finished"] == 2
+    assert 0 < last["storage_serial_seconds"] <= last["storage_wall_seconds"] + 1e-3
+    assert last["storage_overlap"] <= 1.0
@@ -0,0 +1,33 @@
+import os
+
+import pandas as pd
+
+from src.pipelines.assets.streaming import chunked_etl
+from src.pipelines.mongo_load import RAW_COLLECTION
+from src.pipelines.resources import PostgreSQLResource
+
+from .conftest import CSV_HEADER, make_cleaned_prices
+
+
+def test_no_postgres_connection_without_postgres_writes(run_assets, storage, mongo):
+    client, mongodb = mongo
+    prices = make_cleaned_prices(days=80)
+    for ticker, frame in prices.groupby('Ticker'):
+        rows = frame[['Date', 'Close', 'High', 'Low', 'Open', 'Volume']].to_csv(header=False, index=False)
+        with open(os.path.join(storage.raw_dir, f"stock_data_{ticker}.csv"), 'w') as f:
+            f.write(CSV_HEADER.replace("TEST", ticker) + rows)
+
+    # Nothing listens here; borrowing a connection would fail the run
+    postgres = PostgreSQLResource(host="postgres.invalid", min_connections=0)
+    result = run_assets(
+        [chunked_etl],
+        run_config={"ops": {"chunked_etl": {"config": {"chunk_rows": 50, "write_postgres": False}}}},
+        postgres=postgres,
+        mongodb=mongodb,
+    )
+
+    summary = result.output_for_node("chunked_etl")
+    assert summary["chunks"] > 3
+    assert summary["commits"] == 0
+    assert client["stock_market_etl"][RAW_COLLECTION].count_documents({}) == len(prices)
+    assert len(pd.read_parquet(storage.get_processed_path("training_data.parquet"))) == summary["engineered_rows"]